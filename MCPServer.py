@@ -13,7 +13,9 @@ This module is intentionally thin. All business logic lives in:
 """
 import logging
 from fastmcp import FastMCP
+from fastmcp.server.middleware import Middleware
 
+from core import tracing
 from core.logging_config import setup_logging
 
 setup_logging()
@@ -28,23 +30,32 @@ from tools.jira_tools  import jira_add_comment, jira_resolve_issue
 from tools.approval    import request_approval, post_approval_outcome
 
 
-mcp = FastMCP("mcp_automation")
+class _TraceToolCalls(Middleware):
+    """Open each tool call's root span before FastMCP validates its arguments."""
+
+    async def on_call_tool(self, context, call_next):
+        with tracing.start_trace(f"tool/{context.message.name}", tool=context.message.name):
+            return await call_next(context)
 
-mcp.tool(name="get_ospf")(get_ospf)
-mcp.tool(name="get_bgp")(get_bgp)
-mcp.tool(name="get_routing")(get_routing)
-mcp.tool(name="get_routing_policies")(get_routing_policies)
-mcp.tool(name="get_interfaces")(get_interfaces)
-mcp.tool(name="ping")(ping)
-mcp.tool(name="traceroute")(traceroute)
-mcp.tool(name="run_show")(run_show)
-mcp.tool(name="get_intent")(get_intent)
-mcp.tool(name="assess_risk")(assess_risk)
-mcp.tool(name="push_config")(push_config)
-mcp.tool(name="jira_add_comment")(jira_add_comment)
-mcp.tool(name="jira_resolve_issue")(jira_resolve_issue)
-mcp.tool(name="request_approval")(request_approval)
-mcp.tool(name="post_approval_outcome")(post_approval_outcome)
+
+mcp = FastMCP("mcp_automation")
+mcp.add_middleware(_TraceToolCalls())
+
+mcp.tool(name="get_ospf")(tracing.tool(get_ospf))
+mcp.tool(name="get_bgp")(tracing.tool(get_bgp))
+mcp.tool(name="get_routing")(tracing.tool(get_routing))
+mcp.tool(name="get_routing_policies")(tracing.tool(get_routing_policies))
+mcp.tool(name="get_interfaces")(tracing.tool(get_interfaces))
+mcp.tool(name="ping")(tracing.tool(ping))
+mcp.tool(name="traceroute")(tracing.tool(traceroute))
+mcp.tool(name="run_show")(tracing.tool(run_show))
+mcp.tool(name="get_intent")(tracing.tool(get_intent))
+mcp.tool(name="assess_risk")(tracing.tool(assess_risk))
+mcp.tool(name="push_config")(tracing.tool(push_config))
+mcp.tool(name="jira_add_comment")(tracing.tool(jira_add_comment))
+mcp.tool(name="jira_resolve_issue")(tracing.tool(jira_resolve_issue))
+mcp.tool(name="request_approval")(tracing.tool(request_approval))
+mcp.tool(name="post_approval_outcome")(tracing.tool(post_approval_outcome))
 
 log.info("aiNOC MCP Server started — 15 tools registered")
 
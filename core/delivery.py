@@ -0,0 +1,10 @@
+"""Delivery outcomes shared by the outbox (core/outbox.py) and the clients it calls."""
+
+
+class DeliveryUncertain(Exception):
+    """A notification was sent but its outcome is unknown (timeout, dropped connection,
+    502/504): the server may have acted on it, so sending it again could duplicate it.
+
+    A False return or any other exception means the request was turned away unprocessed
+    and is safe to retry.
+    """
@@ -4,10 +4,21 @@ Discord-based remote approval for On-Call fix proposals.
 The agent calls request_approval() (via MCP tools/approval.py) which:
   1. Posts a rich embed to the configured Discord channel with findings + proposed fix
   2. Adds ✅ and ❌ reactions to the message so the operator can respond
-  3. Polls Discord's reaction API until a human reacts or the timeout expires
+  3. Waits for a human reaction or the timeout: reactions arrive as Gateway events
+     (core/discord_gateway.py), with polling of the reaction API as fallback
   4. Posts a reply to the original message showing the final outcome
 
-No web server, no inbound connections — all outbound Discord REST API calls.
+No web server, no inbound connections — outbound Discord REST API calls plus one
+outbound Gateway WebSocket while an approval is pending.
+All REST calls go through _request(): one pooled aiohttp.ClientSession per event loop,
+queued per Discord rate-limit bucket and paced by the X-RateLimit-* / Retry-After
+headers (core/discord_ratelimit.py). Long-lived callers such as the watcher call
+close() on shutdown.
+
+The watcher's notifications (post_investigation_started, post_session_complete,
+post_session_error, post_deferred_list, post_progress_update) are sent through its
+outbox (core/outbox.py): they return False when Discord turned the post away, so it can
+retry them, and raise DeliveryUncertain when the post may have gone through.
 """
 import asyncio
 import logging
@@ -17,6 +28,9 @@ from datetime import datetime, timezone, timedelta
 
 import aiohttp
 
+from core import discord_gateway
+from core.delivery import DeliveryUncertain
+from core.discord_ratelimit import RateLimiter
 from core.vault import get_secret
 
 log = logging.getLogger("ainoc.discord")
@@ -26,6 +40,8 @@ APPROVE_EMOJI = "✅"
 REJECT_EMOJI = "❌"
 _APPROVE_ENC = urllib.parse.quote(APPROVE_EMOJI, safe="")
 _REJECT_ENC = urllib.parse.quote(REJECT_EMOJI, safe="")
+POLL_INTERVAL = 5  # seconds between REST reaction checks when the Gateway is not used
+MESSAGE_MAX_CHARS = 2000  # Discord's limit on a message's content
 
 RISK_COLORS = {"low": 0x00B300, "medium": 0xFFA500, "high": 0xFF0000}
 RISK_LABELS = {"low": "🟢 LOW", "medium": "🟡 MEDIUM", "high": "🔴 HIGH"}
@@ -36,6 +52,42 @@ OUTCOME_COLORS = {
     "expired": 0x808080,
 }
 
+# Pooled HTTP session and its rate limiter — created lazily and bound to the event loop
+# that created them, so the watcher's long-lived loop reuses keep-alive connections to
+# discord.com and its rate-limit state.
+_session: aiohttp.ClientSession | None = None
+_session_loop: asyncio.AbstractEventLoop | None = None
+_limiter: RateLimiter | None = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """Return the pooled ClientSession for the running event loop, creating it if needed."""
+    global _session, _session_loop, _limiter
+    loop = asyncio.get_running_loop()
+    if _session is None or _session_loop is not loop:
+        _session = aiohttp.ClientSession()
+        _session_loop = loop
+        _limiter = RateLimiter()
+    return _session
+
+
+def _request(method: str, path: str, **kwargs):
+    """Send a Discord API request through its rate-limit bucket; use as `async with ... as resp`.
+
+    path is relative to DISCORD_API. Auth headers are added (JSON ones when json= is given).
+    """
+    session = _get_session()
+    kwargs.setdefault("headers", _json_headers() if "json" in kwargs else _auth_headers())
+    return _limiter.request(session, method, f"{DISCORD_API}{path}", path, **kwargs)
+
+
+async def close() -> None:
+    """Close the pooled session. Safe to call when no session was created."""
+    global _session, _session_loop, _limiter
+    session, _session, _session_loop, _limiter = _session, None, None, None
+    if session is not None:
+        await session.close()
+
 
 def is_configured() -> bool:
     """Return True if both DISCORD_BOT_TOKEN and DISCORD_CHANNEL_ID are set."""
@@ -129,124 +181,135 @@ async def post_approval_request(
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
 
-    async with aiohttp.ClientSession() as session:
-        # Post the message
-        async with session.post(
-            f"{DISCORD_API}/channels/{_channel()}/messages",
-            headers=_json_headers(),
-            json={"embeds": [embed]},
-        ) as resp:
-            if resp.status not in (200, 201):
-                body = await resp.text()
-                raise RuntimeError(f"Discord post failed ({resp.status}): {body[:200]}")
-            data = await resp.json()
-            message_id: str = data["id"]
-
-        # Add ✅ reaction (bot's own — gives operator a tap target)
-        async with session.put(
-            f"{DISCORD_API}/channels/{_channel()}/messages/{message_id}"
-            f"/reactions/{_APPROVE_ENC}/@me",
-            headers=_auth_headers(),
-        ) as resp:
-            if resp.status not in (200, 204):
-                log.warning("Failed to add ✅ reaction (HTTP %d) — operator cannot approve via Discord", resp.status)
-
-        await asyncio.sleep(0.3)  # Brief pause to stay within Discord rate limits
-
-        # Add ❌ reaction
-        async with session.put(
-            f"{DISCORD_API}/channels/{_channel()}/messages/{message_id}"
-            f"/reactions/{_REJECT_ENC}/@me",
-            headers=_auth_headers(),
-        ) as resp:
-            if resp.status not in (200, 204):
-                log.warning("Failed to add ❌ reaction (HTTP %d) — operator cannot reject via Discord", resp.status)
+    # Post the message
+    async with _request("POST", f"/channels/{_channel()}/messages", json={"embeds": [embed]}) as resp:
+        if resp.status not in (200, 201):
+            body = await resp.text()
+            raise RuntimeError(f"Discord post failed ({resp.status}): {body[:200]}")
+        data = await resp.json()
+        message_id: str = data["id"]
+
+    # Add ✅ and ❌ reactions (bot's own — gives operator tap targets). Both are queued at
+    # once; the reaction bucket's rate-limit headers decide how soon the second goes out.
+    await asyncio.gather(
+        _add_reaction(message_id, APPROVE_EMOJI, _APPROVE_ENC, "approve"),
+        _add_reaction(message_id, REJECT_EMOJI, _REJECT_ENC, "reject"),
+    )
 
     log.info("Discord approval request posted: message_id=%s", message_id)
     return message_id
 
 
+async def _add_reaction(message_id: str, emoji: str, emoji_enc: str, action: str) -> None:
+    async with _request("PUT", f"/channels/{_channel()}/messages/{message_id}/reactions/{emoji_enc}/@me") as resp:
+        if resp.status not in (200, 204):
+            log.warning("Failed to add %s reaction (HTTP %d) — operator cannot %s via Discord", emoji, resp.status, action)
+
+
+async def _find_human_reaction(message_id: str) -> tuple[str, str] | None:
+    """Check the ✅ then ❌ reactions over REST. Returns (emoji, username) of the first human, or None."""
+    for emoji, emoji_enc in ((APPROVE_EMOJI, _APPROVE_ENC), (REJECT_EMOJI, _REJECT_ENC)):
+        async with _request("GET", f"/channels/{_channel()}/messages/{message_id}/reactions/{emoji_enc}") as resp:
+            if resp.status == 200:
+                users = await resp.json()
+                # Filter out bot accounts
+                human = next((u for u in users if not u.get("bot")), None)
+                if human:
+                    return emoji, human.get("username", "operator")
+    return None
+
+
+async def _acknowledge(message_id: str, emoji: str, username: str) -> dict:
+    """Reply to the approval message with the received decision and return the decision dict."""
+    if emoji == APPROVE_EMOJI:
+        log.info("Discord approval received from %s", username)
+        content = f"✅ Approval received from @{username}. aiNOC is proceeding with the fix."
+        decision = {"decision": "approved", "approved_by": username}
+    else:
+        log.info("Discord rejection received from %s", username)
+        content = f"❌ Rejection received from @{username}. aiNOC will not apply the fix."
+        decision = {"decision": "rejected", "rejected_by": username}
+    try:
+        async with _request(
+            "POST",
+            f"/channels/{_channel()}/messages",
+            json={"content": content, "message_reference": {"message_id": message_id}},
+        ):
+            pass
+    except Exception:
+        pass
+    return decision
+
+
+async def _wait_on_gateway(
+    message_id: str,
+    deadline: datetime,
+) -> tuple[str, str] | None:
+    """Wait for the reaction on the Discord Gateway until deadline.
+
+    Returns (emoji, username), or None on timeout or if the Gateway is unusable — the
+    caller then polls for whatever time is left. Reactions added before the connection
+    was READY are caught by one REST check at that point.
+    """
+    remaining = (deadline - datetime.now(timezone.utc)).total_seconds()
+    if remaining <= 0:
+        return None
+    token = get_secret("ainoc/discord", "bot_token", fallback_env="DISCORD_BOT_TOKEN")
+    try:
+        return await asyncio.wait_for(
+            discord_gateway.wait_for_reaction(
+                _get_session(), token, message_id, (APPROVE_EMOJI, REJECT_EMOJI),
+                on_ready=lambda: _find_human_reaction(message_id),
+            ),
+            timeout=remaining,
+        )
+    except asyncio.TimeoutError:
+        return None
+    except Exception as e:
+        log.warning("Discord gateway unavailable (%s) — falling back to polling", e)
+        return None
+
+
 async def poll_for_reaction(
     message_id: str,
     timeout_minutes: int = 10,
 ) -> dict:
-    """Poll Discord for a human user's reaction. Returns decision dict."""
-    deadline = datetime.now(timezone.utc) + timedelta(minutes=timeout_minutes)
-    poll_interval = 5  # seconds
+    """Wait for a human user's reaction. Returns decision dict.
 
-    log.info(
-        "Polling Discord for approval on message %s (timeout=%dm)",
-        message_id,
-        timeout_minutes,
-    )
+    With DISCORD_GATEWAY enabled (the default) the reaction arrives as a Gateway
+    MESSAGE_REACTION_ADD event and resolves the approval immediately; if the Gateway
+    connection fails, the reaction endpoints are polled every POLL_INTERVAL seconds
+    for the rest of the timeout.
+    """
+    deadline = datetime.now(timezone.utc) + timedelta(minutes=timeout_minutes)
 
-    async with aiohttp.ClientSession() as session:
-        while datetime.now(timezone.utc) < deadline:
-            await asyncio.sleep(poll_interval)
-
-            # Check ✅ reactions — filter out bot accounts
-            async with session.get(
-                f"{DISCORD_API}/channels/{_channel()}/messages/{message_id}"
-                f"/reactions/{_APPROVE_ENC}",
-                headers=_auth_headers(),
-            ) as resp:
-                if resp.status == 200:
-                    users = await resp.json()
-                    human = next((u for u in users if not u.get("bot")), None)
-                    if human:
-                        username = human.get("username", "operator")
-                        log.info("Discord approval received from %s", username)
-                        try:
-                            async with session.post(
-                                f"{DISCORD_API}/channels/{_channel()}/messages",
-                                headers=_json_headers(),
-                                json={
-                                    "content": f"✅ Approval received from @{username}. aiNOC is proceeding with the fix.",
-                                    "message_reference": {"message_id": message_id},
-                                },
-                            ):
-                                pass
-                        except Exception:
-                            pass
-                        return {"decision": "approved", "approved_by": username}
-
-            # Check ❌ reactions — filter out bot accounts
-            async with session.get(
-                f"{DISCORD_API}/channels/{_channel()}/messages/{message_id}"
-                f"/reactions/{_REJECT_ENC}",
-                headers=_auth_headers(),
-            ) as resp:
-                if resp.status == 200:
-                    users = await resp.json()
-                    human = next((u for u in users if not u.get("bot")), None)
-                    if human:
-                        username = human.get("username", "operator")
-                        log.info("Discord rejection received from %s", username)
-                        try:
-                            async with session.post(
-                                f"{DISCORD_API}/channels/{_channel()}/messages",
-                                headers=_json_headers(),
-                                json={
-                                    "content": f"❌ Rejection received from @{username}. aiNOC will not apply the fix.",
-                                    "message_reference": {"message_id": message_id},
-                                },
-                            ):
-                                pass
-                        except Exception:
-                            pass
-                        return {"decision": "rejected", "rejected_by": username}
+    if discord_gateway.is_enabled():
+        log.info(
+            "Waiting on Discord gateway for approval on message %s (timeout=%dm)",
+            message_id,
+            timeout_minutes,
+        )
+        found = await _wait_on_gateway(message_id, deadline)
+        if found:
+            return await _acknowledge(message_id, *found)
+
+    if datetime.now(timezone.utc) < deadline:
+        log.info(
+            "Polling Discord for approval on message %s (timeout=%dm)",
+            message_id,
+            timeout_minutes,
+        )
+    while datetime.now(timezone.utc) < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        found = await _find_human_reaction(message_id)
+        if found:
+            return await _acknowledge(message_id, *found)
 
     # Remove the bot's own reactions so operator can't click stale buttons after expiry
     try:
-        async with aiohttp.ClientSession() as cleanup_session:
-            for emoji_enc in (_APPROVE_ENC, _REJECT_ENC):
-                async with cleanup_session.delete(
-                    f"{DISCORD_API}/channels/{_channel()}/messages/{message_id}"
-                    f"/reactions/{emoji_enc}/@me",
-                    headers=_auth_headers(),
-                ):
-                    pass
-                await asyncio.sleep(0.3)
+        await asyncio.gather(*(
+            _remove_own_reaction(message_id, emoji_enc) for emoji_enc in (_APPROVE_ENC, _REJECT_ENC)
+        ))
     except Exception as e:
         log.warning("Failed to remove reactions on expiry: %s", e)
 
@@ -254,10 +317,47 @@ async def poll_for_reaction(
     return {"decision": "expired"}
 
 
+async def _remove_own_reaction(message_id: str, emoji_enc: str) -> None:
+    async with _request("DELETE", f"/channels/{_channel()}/messages/{message_id}/reactions/{emoji_enc}/@me"):
+        pass
+
+
+# Answers after which a message may or may not have been posted
+_UNCERTAIN_STATUSES = {502, 504}
+
+
+async def _post_notification(what: str, payload: dict) -> bool:
+    """POST an outbox-delivered message to the channel.
+
+    Returns True once posted, False if Discord turned it away (4xx, 503, connection
+    refused, 500). Raises DeliveryUncertain on a timeout, a dropped connection or a
+    502/504, where resending could post it twice.
+    """
+    try:
+        async with _request("POST", f"/channels/{_channel()}/messages", json=payload) as resp:
+            if resp.status in (200, 201):
+                return True
+            body = await resp.text()
+            if resp.status in _UNCERTAIN_STATUSES:
+                raise DeliveryUncertain(f"Discord {what} post answered {resp.status}: {body[:200]}")
+            log.warning("Discord %s post failed (%s): %s", what, resp.status, body[:200])
+            return False
+    except DeliveryUncertain:
+        raise
+    except (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError) as exc:
+        log.warning("Failed to post %s to Discord: %s", what, exc)
+        return False
+    except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+        raise DeliveryUncertain(f"Discord {what} post: {type(exc).__name__}: {exc}") from exc
+    except Exception as exc:
+        log.warning("Failed to post %s to Discord: %s", what, exc)
+        return False
+
+
 async def post_deferred_list(
     events: list,
     issue_key: str | None = None,
-) -> None:
+) -> bool:
     """Post an informational embed listing deferred SLA failures. No reactions, no polling."""
     lines = []
     for i, e in enumerate(events, 1):
@@ -279,17 +379,10 @@ async def post_deferred_list(
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            f"{DISCORD_API}/channels/{_channel()}/messages",
-            headers=_json_headers(),
-            json={"embeds": [embed]},
-        ) as resp:
-            if resp.status not in (200, 201):
-                body_text = await resp.text()
-                raise RuntimeError(f"Discord deferred list post failed ({resp.status}): {body_text[:200]}")
-
+    if not await _post_notification("deferred list", {"embeds": [embed]}):
+        return False
     log.info("Deferred SLA failure list posted to Discord (%d event(s))", len(events))
+    return True
 
 
 async def post_investigation_started(
@@ -301,12 +394,35 @@ async def post_investigation_started(
     session_name: str | None = None,
     inventory_source: str | None = None,
     credential_source: str | None = None,
-) -> None:
-    """Post an informational embed when an on-call investigation begins. No reactions, no polling."""
+    correlated_events: list | None = None,
+    ticket_pending: bool = False,
+) -> bool | None:
+    """Post an informational embed when an on-call investigation begins. No reactions, no polling.
+
+    correlated_events lists other SLA path failures grouped into this session by the
+    watcher's storm correlation stage; they are summarised in the embed description.
+    ticket_pending=True means the Jira ticket is still being created in parallel (the key
+    appears in the session-complete embed instead).
+    """
     if not is_configured():
-        return
+        return None
 
-    ticket_line = f"**Jira ticket:** {issue_key}" if issue_key else "No Jira ticket"
+    if issue_key:
+        ticket_line = f"**Jira ticket:** {issue_key}"
+    elif ticket_pending:
+        ticket_line = "**Jira ticket:** being created"
+    else:
+        ticket_line = "No Jira ticket"
+    correlated_line = ""
+    if correlated_events:
+        names = ", ".join(
+            f"{e.get('device_name', e.get('device', '?'))} ({e.get('path_id', '?')})"
+            for e in correlated_events
+        )
+        correlated_line = (
+            f"**Correlated failures:** {len(correlated_events)} more path(s) — "
+            f"{_truncate(names, 300)}\n"
+        )
     source_line = (
         f"\n📦 Inventory: {inventory_source} · 🔑 Credentials: {credential_source}"
         if inventory_source and credential_source
@@ -319,6 +435,7 @@ async def post_investigation_started(
             f"**Device:** {device_name} ({device_ip})\n"
             f"**Event:** {_truncate(event_msg, 300)}\n"
             f"**Event time:** {event_ts}\n"
+            f"{correlated_line}"
             f"{ticket_line}{source_line}\n\n"
             f"⏳ *Currently investigating — please wait for summary and proposed fix.*"
         ),
@@ -327,20 +444,10 @@ async def post_investigation_started(
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
 
-    try:
-        async with aiohttp.ClientSession() as http:
-            async with http.post(
-                f"{DISCORD_API}/channels/{_channel()}/messages",
-                headers=_json_headers(),
-                json={"embeds": [embed]},
-            ) as resp:
-                if resp.status not in (200, 201):
-                    body = await resp.text()
-                    log.warning("Discord investigation-started post failed (%s): %s", resp.status, body[:200])
-                    return
-        log.info("Investigation-started notification posted to Discord")
-    except Exception as exc:
-        log.warning("Failed to post investigation-started to Discord: %s", exc)
+    if not await _post_notification("investigation-started", {"embeds": [embed]}):
+        return False
+    log.info("Investigation-started notification posted to Discord")
+    return True
 
 
 async def post_session_complete(
@@ -351,7 +458,7 @@ async def post_session_complete(
     session_cost: float | None = None,
     session_duration: str | None = None,
     approval_used: bool = False,
-) -> None:
+) -> bool | None:
     """Post a green embed when the agent session exits normally.
 
     If approval_used is False: describes the outcome as transient/self-recovered.
@@ -359,7 +466,7 @@ async def post_session_complete(
     covers the fix result.
     """
     if not is_configured():
-        return
+        return None
 
     ticket_line = f"Jira ticket: **{issue_key}**" if issue_key else "No Jira ticket"
 
@@ -388,20 +495,10 @@ async def post_session_complete(
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
 
-    try:
-        async with aiohttp.ClientSession() as http:
-            async with http.post(
-                f"{DISCORD_API}/channels/{_channel()}/messages",
-                headers=_json_headers(),
-                json={"embeds": [embed]},
-            ) as resp:
-                if resp.status not in (200, 201):
-                    body = await resp.text()
-                    log.warning("Discord session-complete post failed (%s): %s", resp.status, body[:200])
-                    return
-        log.info("Session complete (transient) notification posted to Discord")
-    except Exception as exc:
-        log.warning("Failed to post session complete to Discord: %s", exc)
+    if not await _post_notification("session-complete", {"embeds": [embed]}):
+        return False
+    log.info("Session complete (transient) notification posted to Discord")
+    return True
 
 
 async def post_session_error(
@@ -414,10 +511,10 @@ async def post_session_error(
     log_tail: str | None = None,
     session_cost: float | None = None,
     session_duration: str | None = None,
-) -> None:
+) -> bool | None:
     """Post a red error embed when the agent session ends abnormally (timeout, crash, watcher error)."""
     if not is_configured():
-        return
+        return None
 
     error_labels = {
         "timeout": "⏱ Session Timeout",
@@ -457,37 +554,32 @@ async def post_session_error(
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
 
-    try:
-        async with aiohttp.ClientSession() as http:
-            async with http.post(
-                f"{DISCORD_API}/channels/{_channel()}/messages",
-                headers=_json_headers(),
-                json={"embeds": [embed]},
-            ) as resp:
-                if resp.status not in (200, 201):
-                    body = await resp.text()
-                    log.warning("Discord session-error post failed (%s): %s", resp.status, body[:200])
-                    return
-        log.info("Session error notification posted to Discord (error_type=%s)", error_type)
-    except Exception as exc:
-        log.warning("Failed to post session error to Discord: %s", exc)
+    if not await _post_notification("session-error", {"embeds": [embed]}):
+        return False
+    log.info("Session error notification posted to Discord (error_type=%s)", error_type)
+    return True
+
+
+async def post_progress_update(message: str) -> bool | None:
+    """Post a plain text progress message to the Discord channel.
+
+    Returns True once posted, False if Discord turned it away, None when Discord is not
+    configured; raises DeliveryUncertain when it may or may not have been posted.
+    """
+    return await post_progress_updates([message])
 
 
-async def post_progress_update(message: str) -> None:
-    """Post a plain text progress message to the Discord channel."""
+async def post_progress_updates(messages: list[str]) -> bool | None:
+    """Post several progress messages as one Discord message, one line each.
+
+    The watcher's outbox folds progress updates queued back to back into one call,
+    within MESSAGE_MAX_CHARS. Returns like post_progress_update.
+    """
     if not is_configured():
-        return
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{DISCORD_API}/channels/{_channel()}/messages",
-                headers=_json_headers(),
-                json={"content": message},
-            ) as resp:
-                if resp.status not in (200, 201):
-                    log.warning("Progress update post failed (%s)", resp.status)
-    except Exception as exc:
-        log.warning("Failed to post progress update: %s", exc)
+        return None
+    return await _post_notification(
+        "progress update", {"content": _truncate("\n".join(messages), MESSAGE_MAX_CHARS)},
+    )
 
 
 async def post_outcome(
@@ -534,16 +626,15 @@ async def post_outcome(
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            f"{DISCORD_API}/channels/{_channel()}/messages",
-            headers=_json_headers(),
-            json={
-                "embeds": [outcome_embed],
-                "message_reference": {"message_id": original_message_id},
-            },
-        ) as resp:
-            if resp.status not in (200, 201):
-                log.warning(
-                    "Failed to post Discord outcome reply (status=%d)", resp.status
-                )
+    async with _request(
+        "POST",
+        f"/channels/{_channel()}/messages",
+        json={
+            "embeds": [outcome_embed],
+            "message_reference": {"message_id": original_message_id},
+        },
+    ) as resp:
+        if resp.status not in (200, 201):
+            log.warning(
+                "Failed to post Discord outcome reply (status=%d)", resp.status
+            )
@@ -0,0 +1,169 @@
+"""
+Discord Gateway (WebSocket) listener for approval reactions.
+
+poll_for_reaction() in core/discord_approval.py uses it to learn about ✅/❌
+reactions the moment they are added (MESSAGE_REACTION_ADD dispatches) instead of
+polling the reaction REST endpoints every few seconds. Only what that needs is
+implemented: HELLO → IDENTIFY → heartbeats → READY → dispatches. There is no
+resume: if the connection drops, the caller falls back to REST polling.
+
+Environment variables (read at call time):
+  DISCORD_GATEWAY       1 (default) waits for approvals on the Gateway; 0 polls only
+  DISCORD_GATEWAY_URL   Gateway URL (default: wss://gateway.discord.gg/?v=10&encoding=json);
+                        point it at a local fake gateway for testing
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+
+import aiohttp
+
+log = logging.getLogger("ainoc.discord")
+
+DEFAULT_GATEWAY_URL = "wss://gateway.discord.gg/?v=10&encoding=json"
+INTENT_GUILD_MESSAGE_REACTIONS = 1 << 10
+
+# Gateway opcodes
+OP_DISPATCH = 0
+OP_HEARTBEAT = 1
+OP_IDENTIFY = 2
+OP_RECONNECT = 7
+OP_INVALID_SESSION = 9
+OP_HELLO = 10
+OP_HEARTBEAT_ACK = 11
+
+
+class GatewayError(ConnectionError):
+    """The Gateway connection failed, closed, or stopped acknowledging heartbeats."""
+
+
+def is_enabled() -> bool:
+    return os.getenv("DISCORD_GATEWAY", "1").lower() not in ("0", "false", "no")
+
+
+def gateway_url() -> str:
+    return os.getenv("DISCORD_GATEWAY_URL", DEFAULT_GATEWAY_URL)
+
+
+async def _receive(ws) -> dict:
+    msg = await ws.receive()
+    if msg.type == aiohttp.WSMsgType.TEXT:
+        return json.loads(msg.data)
+    raise GatewayError(f"gateway connection closed (code {ws.close_code})")
+
+
+async def reaction_events(session: aiohttp.ClientSession, token: str,
+                          intents: int = INTENT_GUILD_MESSAGE_REACTIONS):
+    """Connect, identify and yield dispatches: READY first, then MESSAGE_REACTION_ADD.
+
+    Yields {"t": event name, "d": event data}. A background reader handles heartbeat
+    ACKs so a slow consumer never looks like a dead connection. Raises GatewayError
+    when the connection drops, Discord asks for a reconnect, or a heartbeat goes
+    unacknowledged (zombied connection).
+    """
+    try:
+        ws = await session.ws_connect(gateway_url())
+    except (aiohttp.ClientError, OSError) as e:
+        raise GatewayError(f"cannot connect to gateway: {e}") from e
+
+    seq = None
+    acked = True
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def _heartbeat(interval: float) -> None:
+        nonlocal acked
+        await asyncio.sleep(interval * random.random())  # jitter, as the Gateway docs ask
+        try:
+            while True:
+                if not acked:
+                    log.warning("Discord gateway heartbeat not acknowledged — closing connection")
+                    await ws.close(code=4000)
+                    return
+                acked = False
+                await ws.send_json({"op": OP_HEARTBEAT, "d": seq})
+                await asyncio.sleep(interval)
+        except Exception as e:
+            events.put_nowait(GatewayError(f"heartbeat failed: {e}"))
+
+    async def _read() -> None:
+        nonlocal seq, acked
+        try:
+            while True:
+                payload = await _receive(ws)
+                op = payload.get("op")
+                if payload.get("s") is not None:
+                    seq = payload["s"]
+                if op == OP_HEARTBEAT_ACK:
+                    acked = True
+                elif op == OP_HEARTBEAT:  # the Gateway may ask for one immediately
+                    await ws.send_json({"op": OP_HEARTBEAT, "d": seq})
+                elif op in (OP_RECONNECT, OP_INVALID_SESSION):
+                    raise GatewayError(f"gateway requested reconnect (op {op})")
+                elif op == OP_DISPATCH and payload.get("t") in ("READY", "MESSAGE_REACTION_ADD"):
+                    events.put_nowait({"t": payload["t"], "d": payload.get("d") or {}})
+        except Exception as e:
+            events.put_nowait(e if isinstance(e, GatewayError) else GatewayError(str(e)))
+
+    tasks = []
+    try:
+        hello = await _receive(ws)
+        if hello.get("op") != OP_HELLO:
+            raise GatewayError(f"expected HELLO, got op {hello.get('op')}")
+        tasks.append(asyncio.create_task(_heartbeat(hello["d"]["heartbeat_interval"] / 1000)))
+        tasks.append(asyncio.create_task(_read()))
+        await ws.send_json({"op": OP_IDENTIFY, "d": {
+            "token": token,
+            "intents": intents,
+            "properties": {"os": "linux", "browser": "aiNOC", "device": "aiNOC"},
+        }})
+        while True:
+            item = await events.get()
+            if isinstance(item, GatewayError):
+                raise item
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await ws.close()
+
+
+async def wait_for_reaction(
+    session: aiohttp.ClientSession,
+    token: str,
+    message_id: str,
+    emojis: tuple[str, ...],
+    on_ready=None,
+) -> tuple[str, str]:
+    """Block until a human reacts to message_id with one of emojis. Returns (emoji, username).
+
+    Reactions by bots (including this one) are ignored. on_ready is an optional
+    coroutine function run once the Gateway is READY; the caller uses it to catch
+    reactions added before the connection was up, and a non-None result is
+    returned as-is. Raises GatewayError if the connection is lost.
+    """
+    events = reaction_events(session, token)
+    self_id = None
+    try:
+        async for event in events:
+            data = event["d"]
+            if event["t"] == "READY":
+                self_id = (data.get("user") or {}).get("id")
+                log.info("Discord gateway ready — waiting for reactions on message %s", message_id)
+                if on_ready is not None:
+                    found = await on_ready()
+                    if found is not None:
+                        return found
+                continue
+            if data.get("message_id") != message_id:
+                continue
+            emoji = (data.get("emoji") or {}).get("name")
+            user = (data.get("member") or {}).get("user") or {}
+            if emoji not in emojis or user.get("bot") or data.get("user_id") == self_id:
+                continue
+            return emoji, user.get("username") or "operator"
+    finally:
+        await events.aclose()
+    raise GatewayError("gateway stream ended")
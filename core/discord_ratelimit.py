@@ -0,0 +1,161 @@
+"""
+Per-route request queues for the Discord REST API.
+
+Discord rate-limits each route (method + path, per channel) in buckets and reports
+the state of the bucket on every response:
+
+  X-RateLimit-Bucket       opaque bucket id shared by routes with a common limit
+  X-RateLimit-Limit        requests allowed per window
+  X-RateLimit-Remaining    requests left in the current window
+  X-RateLimit-Reset-After  seconds until the window resets
+  Retry-After              on 429: seconds to wait (X-RateLimit-Global: the whole bot)
+
+RateLimiter queues requests per bucket (asyncio.Lock is FIFO) and sends them as fast
+as those headers allow instead of sleeping a fixed interval between calls. While a
+bucket's limit or current window is unknown only one request is in flight; once the
+headers have told us both, requests are pipelined until Remaining reaches zero. A 429
+parks the bucket (or every bucket, for a global limit) for Retry-After and the request
+is retried.
+"""
+import asyncio
+import contextlib
+import logging
+import re
+import time
+
+log = logging.getLogger("ainoc.discord")
+
+MAX_429_RETRIES = 3
+
+_ID_SEGMENT_RE = re.compile(r"/(messages|reactions)/[^/]+")
+_CHANNEL_RE = re.compile(r"/channels/([^/]+)")
+
+
+def _header(headers, name: str) -> str | None:
+    value = headers.get(name) if headers is not None else None
+    return value if isinstance(value, str) else None
+
+
+class _Bucket:
+    __slots__ = ("lock", "limit", "remaining", "reset_at")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.limit: int | None = None
+        self.remaining = 1
+        self.reset_at = 0.0
+
+
+class RateLimiter:
+    """Queue Discord API requests per rate-limit bucket, driven by response headers."""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._bucket_ids: dict[str, str] = {}  # route -> X-RateLimit-Bucket
+        self._buckets: dict[str, _Bucket] = {}
+        self._global_until = 0.0
+        self.stats = {"requests": 0, "waits": 0, "retries": 0}
+
+    @staticmethod
+    def route(method: str, path: str) -> tuple[str, str]:
+        """Return (route, major parameter) for an API path — the unit Discord limits by."""
+        match = _CHANNEL_RE.match(path)
+        template = _ID_SEGMENT_RE.sub(r"/\1/:id", path)
+        return f"{method.upper()} {template}", match.group(1) if match else ""
+
+    def _bucket(self, route: str, major: str) -> _Bucket:
+        key = f"{self._bucket_ids.get(route, route)}:{major}"
+        return self._buckets.setdefault(key, _Bucket())
+
+    async def _acquire(self, bucket: _Bucket) -> bool:
+        """Wait for a free slot in the bucket. Returns True if the lock is still held."""
+        await bucket.lock.acquire()
+        try:
+            while True:
+                now = self._clock()
+                wait = max(self._global_until, bucket.reset_at if bucket.remaining <= 0 else 0.0) - now
+                if wait <= 0:
+                    break
+                self.stats["waits"] += 1
+                await asyncio.sleep(wait)
+            new_window = bucket.remaining <= 0
+            if new_window:
+                bucket.remaining = bucket.limit or 1
+            bucket.remaining -= 1
+        except BaseException:
+            bucket.lock.release()
+            raise
+        if bucket.limit is None or new_window:
+            # Unknown limit or reset time: hold the queue until this response's headers arrive
+            return True
+        bucket.lock.release()
+        return False
+
+    def _update(self, route: str, major: str, bucket: _Bucket, headers) -> None:
+        bucket_id = _header(headers, "X-RateLimit-Bucket")
+        if bucket_id and self._bucket_ids.get(route) != bucket_id:
+            self._bucket_ids[route] = bucket_id
+            self._buckets.setdefault(f"{bucket_id}:{major}", bucket)
+        try:
+            limit = int(_header(headers, "X-RateLimit-Limit"))
+            remaining = int(_header(headers, "X-RateLimit-Remaining"))
+            reset_at = self._clock() + float(_header(headers, "X-RateLimit-Reset-After"))
+        except (TypeError, ValueError):
+            return
+        same_window = abs(reset_at - bucket.reset_at) < 1.0
+        # Pipelined responses can arrive out of order: never raise Remaining within a window
+        bucket.remaining = min(bucket.remaining, remaining) if same_window else remaining
+        bucket.limit = limit
+        bucket.reset_at = reset_at
+
+    async def _retry_after(self, bucket: _Bucket, resp) -> None:
+        retry_after = _header(resp.headers, "Retry-After")
+        is_global = _header(resp.headers, "X-RateLimit-Global") == "true"
+        try:
+            body = await resp.json()
+            retry_after = body.get("retry_after", retry_after)
+            is_global = is_global or bool(body.get("global"))
+        except Exception:
+            pass
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = 1.0
+        until = self._clock() + delay
+        if is_global:
+            self._global_until = max(self._global_until, until)
+        else:
+            bucket.remaining = 0
+            bucket.reset_at = until
+        log.warning("Discord rate limited (%s) — retrying in %.2fs", "global" if is_global else "bucket", delay)
+
+    @contextlib.asynccontextmanager
+    async def request(self, session, method: str, url: str, path: str, **kwargs):
+        """Send one request through its bucket queue and yield the response.
+
+        path is the API path (without the base URL) used to identify the route.
+        A 429 is retried up to MAX_429_RETRIES times; after that it is yielded as-is.
+        """
+        route, major = self.route(method, path)
+        retries = 0
+        while True:
+            bucket = self._bucket(route, major)
+            held = await self._acquire(bucket)
+            stack = contextlib.AsyncExitStack()
+            try:
+                self.stats["requests"] += 1
+                resp = await stack.enter_async_context(getattr(session, method.lower())(url, **kwargs))
+                self._update(route, major, bucket, resp.headers)
+            finally:
+                if held:
+                    bucket.lock.release()
+            if resp.status != 429 or retries >= MAX_429_RETRIES:
+                break
+            await self._retry_after(bucket, resp)
+            await stack.aclose()
+            retries += 1
+            self.stats["retries"] += 1
+        try:
+            yield resp
+        finally:
+            await stack.aclose()
@@ -0,0 +1,139 @@
+"""Block readers for large append-only text files.
+
+Session stream-json files (logs/.session-*.tmp) grow to many MB with
+--include-partial-messages, but the watcher only needs their last few lines
+(the final "result" event for cost, a short tail for crash embeds). These
+helpers seek to EOF and read fixed-size blocks backwards, so memory stays at
+one block plus the longest line, regardless of file size.
+
+Forward following (the dashboard tailing a live session file) uses LineReader —
+one open handle, fixed-size chunks into a reused buffer, partial-line carry —
+woken by inotify_open() where the kernel supports it.
+
+Lines are decoded as UTF-8 with errors="replace"; a trailing "\\r" is stripped.
+"""
+import ctypes
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+# 64 KiB — a session's final "result" line usually fits in one or two blocks.
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace").rstrip("\r")
+
+
+def iter_lines_reversed(path: str | Path, block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[str]:
+    """Yield the lines of a file from last to first, reading backwards from EOF.
+
+    The empty string after a terminal newline is not yielded; blank lines inside the
+    file are. Raises OSError if the file cannot be opened.
+    """
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        non_empty = pos > 0
+        carry = b""
+        first_block = True  # always holds the file's last byte
+        while pos > 0:
+            size = min(block_size, pos)
+            pos -= size
+            f.seek(pos)
+            parts = (f.read(size) + carry).split(b"\n")
+            # parts[0] may be the tail of a line that starts in an earlier block
+            carry = parts[0]
+            complete = parts[1:]
+            if first_block and complete and complete[-1] == b"":
+                complete.pop()
+            first_block = False
+            for raw in reversed(complete):
+                yield _decode(raw)
+        if non_empty:
+            yield _decode(carry)  # the file's first line
+
+
+def read_tail_lines(path: str | Path, n: int, block_size: int = DEFAULT_BLOCK_SIZE) -> list[str]:
+    """Return the last n lines of a file in file order (fewer if the file is shorter)."""
+    if n <= 0:
+        return []
+    tail: list[str] = []
+    for line in iter_lines_reversed(path, block_size):
+        tail.append(line)
+        if len(tail) >= n:
+            break
+    tail.reverse()
+    return tail
+
+
+class LineReader:
+    """Read complete lines appended to a file since the last call, through one open handle.
+
+    Each read_lines() call reads whatever is new in block_size chunks into a reused
+    buffer; a trailing partial line is carried over until its newline arrives.
+    Raises OSError if the file cannot be opened.
+    """
+
+    def __init__(self, path: str | Path, block_size: int = DEFAULT_BLOCK_SIZE):
+        self._fh = open(path, "rb")
+        self._buf = bytearray(block_size)
+        self._view = memoryview(self._buf)
+        self._carry = bytearray()
+
+    def read_lines(self, final: bool = False) -> list[str]:
+        """Return the new complete lines. final=True also returns a trailing partial line."""
+        lines: list[str] = []
+        while n := self._fh.readinto(self._buf):
+            chunk = self._view[:n]
+            end = self._buf.rfind(b"\n", 0, n)
+            if end < 0:
+                self._carry += chunk
+                continue
+            self._carry += chunk[:end]
+            lines.extend(_decode(raw) for raw in self._carry.split(b"\n"))
+            self._carry = bytearray(chunk[end + 1:])
+        if final and self._carry:
+            lines.append(_decode(bytes(self._carry)))
+            self._carry.clear()
+        return lines
+
+    def close(self) -> None:
+        self._view.release()
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def inotify_open(path: str | Path, mask: int = IN_MODIFY) -> int | None:
+    """Return a non-blocking inotify fd watching path, or None where inotify is unavailable.
+
+    The fd becomes readable when the file changes; register it with loop.add_reader()
+    and call inotify_drain() after each wake-up. The caller closes it with os.close().
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(path), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def inotify_drain(fd: int) -> None:
+    """Discard queued inotify events so the fd stops polling readable."""
+    try:
+        while os.read(fd, 4096):
+            pass
+    except BlockingIOError:
+        pass
@@ -0,0 +1,204 @@
+"""Bounded-size incident digest for the On-Call agent prompt.
+
+The watcher collects device state for the failing SLA path before launching the agent
+(see _collect_incident_digest in oncall/watcher.py) and this module reduces it to a few
+lines of facts the agent would otherwise spend tool calls rediscovering:
+
+  - per path link (INTENT.json direct_links between path devices): local interface
+    status and the OSPF/BGP adjacency state towards the neighbor address
+  - at the ECMP node: which ecmp_next_hops appear in the route to destination_ip
+
+Tool results arrive in three shapes depending on transport — RESTCONF JSON, Genie
+parsed dicts, or raw CLI text — so the extractors below search generically for the
+neighbor address / interface name instead of parsing one model.
+"""
+import re
+
+# OSPF neighbor states as printed by IOS ("FULL/DR", "2WAY/DROTHER", ...)
+_OSPF_STATE_RE = re.compile(r"^(FULL|2WAY|INIT|DOWN|ATTEMPT|EXSTART|EXCHANGE|LOADING)(/|$)", re.I)
+_STATE_KEYS = ("state", "state_pfxrcd", "session_state")
+_TRUNCATED = "  … (digest truncated)"
+
+
+def _norm_state(state) -> str:
+    """Collapse transport-specific spellings: ospf-nbr-full / FULL/DR → FULL, fsm-established / 12 → ESTABLISHED."""
+    text = str(state).strip()
+    if text.isdigit():  # BGP summary State/PfxRcd column: a prefix count means Established
+        return "ESTABLISHED"
+    return text.removeprefix("ospf-nbr-").removeprefix("fsm-").split("/")[0].upper()
+
+
+def _find_key(data, keys: tuple):
+    """Depth-first search for the first value stored under one of keys."""
+    if isinstance(data, dict):
+        for key in keys:
+            if key in data and not isinstance(data[key], (dict, list)):
+                return data[key]
+        children = data.values()
+    elif isinstance(data, list):
+        children = data
+    else:
+        return None
+    for child in children:
+        found = _find_key(child, keys)
+        if found is not None:
+            return found
+    return None
+
+
+def peer_state(data, peer_ip: str) -> str | None:
+    """Return the normalised adjacency state for peer_ip, or None if the peer is absent."""
+    if isinstance(data, str):
+        for line in data.splitlines():
+            tokens = line.split()
+            if peer_ip not in tokens:
+                continue
+            for token in tokens:
+                if _OSPF_STATE_RE.match(token):
+                    return _norm_state(token)
+            if tokens[0] == peer_ip:  # BGP summary row: state or prefix count is last
+                return _norm_state(tokens[-1])
+        return None
+    if isinstance(data, dict):
+        if peer_ip in data and isinstance(data[peer_ip], dict):  # Genie: keyed by address
+            state = _find_key(data[peer_ip], _STATE_KEYS)
+            if state is not None:
+                return _norm_state(state)
+        if "state" in data and peer_ip in data.values():  # RESTCONF / Genie: address field
+            return _norm_state(data["state"])
+        children = data.values()
+    elif isinstance(data, list):
+        children = data
+    else:
+        return None
+    for child in children:
+        state = peer_state(child, peer_ip)
+        if state is not None:
+            return state
+    return None
+
+
+def interface_status(data, name: str) -> str | None:
+    """Return "status/protocol" (or enabled/disabled for RESTCONF config data), None if not found."""
+    if isinstance(data, str):
+        for line in data.splitlines():
+            tokens = line.split()
+            if tokens and tokens[0] == name and len(tokens) >= 3:
+                status = "admin-down" if "administratively" in tokens else tokens[-2]
+                return f"{status}/{tokens[-1]}"
+        return None
+    if isinstance(data, dict):
+        entry = data.get(name)
+        if isinstance(entry, dict) and "status" in entry:  # Genie show ip interface brief
+            status = "admin-down" if "administratively" in str(entry["status"]) else entry["status"]
+            return f"{status}/{entry.get('protocol', '?')}"
+        if data.get("name") == name:  # RESTCONF ietf-interfaces
+            if "oper-status" in data:
+                return str(data["oper-status"])
+            if "enabled" in data:
+                return "enabled" if data["enabled"] else "disabled"
+        children = data.values()
+    elif isinstance(data, list):
+        children = data
+    else:
+        return None
+    for child in children:
+        status = interface_status(child, name)
+        if status is not None:
+            return status
+    return None
+
+
+def ip_mentioned(data, ip: str) -> bool:
+    """True if ip appears as a whole address anywhere in data (keys, values or text)."""
+    if isinstance(data, str):
+        return re.search(rf"(?<![\d.]){re.escape(ip)}(?![\d])", data) is not None
+    if isinstance(data, dict):
+        return any(ip_mentioned(k, ip) or ip_mentioned(v, ip) for k, v in data.items())
+    if isinstance(data, list):
+        return any(ip_mentioned(item, ip) for item in data)
+    return False
+
+
+def _usable(result) -> dict | None:
+    """The searchable part of a tool result: parsed output when present, else raw."""
+    if not isinstance(result, dict) or "error" in result:
+        return None
+    raw = result.get("raw")
+    if isinstance(raw, dict) and "error" in raw:
+        return None
+    return {"parsed": result["parsed"]} if result.get("parsed") is not None else {"raw": raw}
+
+
+def path_links(routers: dict, nodes) -> list[tuple[str, str, dict]]:
+    """(device, peer, link) for every direct link between two path nodes, both directions."""
+    links = []
+    for device in sorted(nodes):
+        for peer, link in sorted(routers.get(device, {}).get("direct_links", {}).items()):
+            if peer in nodes:
+                links.append((device, peer, link))
+    return links
+
+
+def build_digest(sla_path: dict, routers: dict, nodes, state: dict,
+                 route: dict | None = None, max_chars: int = 1500) -> str:
+    """Render the digest text.
+
+    state: {device: {"ospf_neighbors"|"bgp_summary"|"interfaces": tool result}} (from the
+    watcher prefetch); route: get_routing result for destination_ip on the ECMP node.
+    Facts whose data did not arrive in time are shown as "?", never guessed.
+    Output is cut on a line boundary to at most max_chars, truncation marker included.
+    """
+    link_lines = []
+    for device, peer, link in path_links(routers, nodes):
+        per_device = state.get(device, {})
+        intf = link.get("local_interface", "?")
+        remote_ip = link.get("remote_ip", "")
+
+        intf_data = _usable(per_device.get("interfaces"))
+        intf_state = (interface_status(intf_data, intf) or "not found") if intf_data else "?"
+
+        adjacency, absent, missing = None, [], []
+        for query, proto in (("ospf_neighbors", "OSPF"), ("bgp_summary", "BGP")):
+            data = _usable(per_device.get(query))
+            if data is None:
+                missing.append(f"{proto} ?")
+                continue
+            found = peer_state(data, remote_ip)
+            if found:
+                adjacency = f"{proto} {found}"
+                break
+            absent.append(proto)
+        if adjacency is None:
+            adjacency = ", ".join(([f"no {'/'.join(absent)} neighbor"] if absent else []) + missing)
+        link_lines.append(f"    {device} {intf} → {peer} ({remote_ip}): intf {intf_state}, {adjacency}")
+
+    if sla_path.get("ecmp") and sla_path.get("ecmp_node"):
+        node = sla_path["ecmp_node"]
+        dest = sla_path.get("destination_ip", "?")
+        route_data = _usable(route)
+        hops = []
+        for next_hop in sla_path.get("ecmp_next_hops", []):
+            nh_ip = routers.get(node, {}).get("direct_links", {}).get(next_hop, {}).get("remote_ip")
+            if route_data is None or not nh_ip:
+                hops.append(f"{next_hop} ?")
+            else:
+                hops.append(f"{next_hop} {'present' if ip_mentioned(route_data, nh_ip) else 'MISSING'}")
+        ecmp_line = f"  ECMP next-hops at {node} toward {dest}: {', '.join(hops) or 'none defined'}"
+    else:
+        ecmp_line = None
+
+    out = ["  Path links (interface status, adjacency to neighbor address):", *link_lines] if link_lines else []
+    if ecmp_line:
+        out.append(ecmp_line)
+    if sum(len(line) + 1 for line in out) - 1 <= max_chars:
+        return "\n".join(out)
+    text, used = [], 0
+    for line in out:  # cut, keeping room for the marker
+        if used + len(line) + 1 + len(_TRUNCATED) > max_chars:
+            break
+        text.append(line)
+        used += len(line) + 1
+    if used + len(_TRUNCATED) <= max_chars:
+        text.append(_TRUNCATED)
+    return "\n".join(text)
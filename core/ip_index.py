@@ -0,0 +1,182 @@
+"""IP address → device reverse index.
+
+Covers every address the lab knows about:
+  - management hosts from the inventory (core.inventory.devices — NetBox or NETWORK.json)
+  - both ends of every INTENT.json direct_link (local_ip / remote_ip → device + interface)
+  - each direct_link subnet, for addresses that are not an interface (e.g. a /30 network)
+
+Exact addresses resolve with one dict lookup; anything else falls back to a
+longest-prefix match over the link subnets (one dict lookup per distinct prefix length).
+
+Consumers:
+  - oncall/watcher.py   — load_device_map()/resolve_device(); also writes INDEX_FILE
+  - tools/operational.py — traceroute hop annotation (hop_devices)
+  - dashboard/ws_bridge.py — host labels on tool results, read from INDEX_FILE
+    (the bridge talks to the watcher through the filesystem only)
+"""
+import ipaddress
+import json
+import logging
+import os
+import re
+from pathlib import Path
+
+log = logging.getLogger("ainoc.ip_index")
+
+PROJECT_DIR = Path(__file__).parent.parent
+INTENT_FILE = PROJECT_DIR / "intent" / "INTENT.json"
+INDEX_FILE = PROJECT_DIR / "data" / "ip_index.json"
+
+_IPV4_RE = re.compile(r"(?<![\d.])(?:\d{1,3}\.){3}\d{1,3}(?![\d.])")
+
+
+class IpIndex:
+    """Address lookup table. hosts: {ip: entry}; subnets: {cidr: entry}.
+
+    Host entries: {"device", "interface", "kind": "mgmt"|"interface"}.
+    Subnet entries: {"subnet", "devices": [a, b]}.
+    """
+
+    def __init__(self, hosts: dict | None = None, subnets: dict | None = None):
+        self.hosts: dict[str, dict] = dict(hosts or {})
+        self.subnets: dict[str, dict] = {}
+        self._by_prefix: dict[int, dict[int, dict]] = {}
+        for cidr, entry in (subnets or {}).items():
+            self.add_subnet(cidr, entry)
+
+    def add_host(self, ip: str, device: str, interface: str | None = None, kind: str = "interface") -> None:
+        """Register an address. The first registration wins (inventory before intent)."""
+        if ip and ip not in self.hosts:
+            self.hosts[ip] = {"device": device, "interface": interface, "kind": kind}
+
+    def add_subnet(self, cidr: str, entry: dict) -> None:
+        try:
+            net = ipaddress.ip_network(cidr, strict=False)
+        except ValueError:
+            log.debug("ip_index: ignoring invalid subnet %r", cidr)
+            return
+        self.subnets[str(net)] = entry
+        self._by_prefix.setdefault(net.prefixlen, {})[int(net.network_address)] = entry
+
+    def lookup(self, ip: str) -> dict | None:
+        """Exact address match, else the longest matching link subnet, else None."""
+        entry = self.hosts.get(ip)
+        if entry is not None:
+            return entry
+        try:
+            addr = int(ipaddress.IPv4Address(ip))
+        except ValueError:
+            return None
+        for prefixlen in sorted(self._by_prefix, reverse=True):
+            mask = (0xFFFFFFFF << (32 - prefixlen)) & 0xFFFFFFFF
+            entry = self._by_prefix[prefixlen].get(addr & mask)
+            if entry is not None:
+                return entry
+        return None
+
+    def device_map(self) -> dict[str, str]:
+        """{ip: device name} for every known address (the watcher's device_map shape)."""
+        return {ip: entry["device"] for ip, entry in self.hosts.items()}
+
+    def annotate(self, text) -> dict[str, str]:
+        """{ip: label} for every resolvable IPv4 address in text, in order of appearance."""
+        if not isinstance(text, str):
+            return {}
+        labels = {}
+        for ip in _IPV4_RE.findall(text):
+            if ip not in labels:
+                entry = self.lookup(ip)
+                if entry is not None:
+                    labels[ip] = label(entry)
+        return labels
+
+    def to_dict(self) -> dict:
+        return {"hosts": self.hosts, "subnets": self.subnets}
+
+
+def label(entry: dict) -> str:
+    """Short human-readable form: "E1C GigabitEthernet2", "C1C (mgmt)", "C1C–E1C link 10.0.0.24/30"."""
+    if "devices" in entry:
+        return f"{'–'.join(entry['devices'])} link {entry.get('subnet', '')}".strip()
+    if entry.get("kind") == "mgmt":
+        return f"{entry['device']} (mgmt)"
+    if entry.get("interface"):
+        return f"{entry['device']} {entry['interface']}"
+    return entry["device"]
+
+
+def build_index(devices: dict, routers: dict) -> IpIndex:
+    """Build the index from inventory devices ({name: {host, ...}}) and INTENT.json routers."""
+    index = IpIndex()
+    for name, info in devices.items():
+        host = info.get("host") if isinstance(info, dict) else None
+        if host:
+            index.add_host(host, name, kind="mgmt")
+    # Local ends first so a device's own interface name wins over the far-side view
+    for name, router in routers.items():
+        for link in router.get("direct_links", {}).values():
+            index.add_host(link.get("local_ip"), name, link.get("local_interface"))
+    for name, router in routers.items():
+        for peer, link in router.get("direct_links", {}).items():
+            index.add_host(link.get("remote_ip"), peer)
+            if link.get("subnet"):
+                index.add_subnet(link["subnet"], {"subnet": link["subnet"], "devices": sorted([name, peer])})
+    return index
+
+
+def _load_intent_routers() -> dict:
+    try:
+        return json.loads(INTENT_FILE.read_text()).get("routers", {})
+    except (OSError, ValueError) as e:
+        log.debug("ip_index: could not load INTENT.json: %s", e)
+        return {}
+
+
+_cached: IpIndex | None = None
+_cached_mtime: float | None = None
+
+
+def get_index() -> IpIndex:
+    """Process-wide index over core.inventory.devices and INTENT.json.
+
+    Built on first use and rebuilt when INTENT.json changes.
+    """
+    global _cached, _cached_mtime
+    try:
+        mtime = INTENT_FILE.stat().st_mtime
+    except OSError:
+        mtime = None
+    if _cached is None or mtime != _cached_mtime:
+        from core.inventory import devices
+        _cached = build_index(devices, _load_intent_routers())
+        _cached_mtime = mtime
+    return _cached
+
+
+def write_index(index: IpIndex, path: Path | None = None) -> None:
+    """Persist the index for processes that do not load the inventory (the dashboard)."""
+    path = path or INDEX_FILE
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(index.to_dict()))
+        os.replace(tmp, path)
+    except OSError as e:
+        log.warning("Could not write IP index %s: %s", path, e)
+
+
+_loaded: tuple[Path, float, IpIndex] | None = None
+
+
+def load_index(path: Path | None = None) -> IpIndex | None:
+    """Read a persisted index, re-reading only when the file changes. None if unavailable."""
+    global _loaded
+    path = path or INDEX_FILE
+    try:
+        mtime = path.stat().st_mtime
+        if _loaded is None or _loaded[:2] != (path, mtime):
+            data = json.loads(path.read_text())
+            _loaded = (path, mtime, IpIndex(data.get("hosts"), data.get("subnets")))
+    except (OSError, ValueError):
+        return None
+    return _loaded[2]
@@ -1,22 +1,36 @@
 """Async Jira REST API v3 client.
 
-Used by oncall/watcher.py (via asyncio.run) for ticket creation, and by
+Used by oncall/watcher.py (on its long-lived event loop) for ticket creation, and by
 MCPServer.py (via MCP tools) for comments and resolution.
 
+All calls share one pooled aiohttp.ClientSession per event loop, so keep-alive
+connections and TLS sessions are reused across requests. Call close() on shutdown.
+
+Transient failures are retried up to JIRA_MAX_RETRIES times (default 2) with exponential
+backoff, honouring Retry-After: 429/503 and connection failures always (Jira turned the
+request away unprocessed), 500/502/504 and timeouts only for idempotent calls (transition
+lookups and transitions) — the backend may have processed the request behind a gateway
+error or a slow answer, so a retried create or comment POST could duplicate the ticket
+or comment. Every call's latency is recorded per operation; stats() summarises it.
+
 All functions check for required env vars — if absent, log a warning and
 return gracefully so the workflow continues unchanged.
 """
 
 import asyncio
 import base64
+import contextlib
 import logging
 import os
+import time
+from collections import deque
 
 import aiohttp
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from core.delivery import DeliveryUncertain
 from core.vault import get_secret
 
 log = logging.getLogger(__name__)
@@ -24,6 +38,43 @@ log = logging.getLogger(__name__)
 # Timeout for all Jira API calls — shorter than device timeout since Jira is cloud-hosted.
 _JIRA_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=5)
 
+# Retry policy for transient failures (see module docstring)
+RETRY_BACKOFF_SECONDS = 0.5
+_RETRY_AFTER_CAP_SECONDS = 30.0
+_ALWAYS_RETRY_STATUSES = {429, 503}  # rejected before processing
+_IDEMPOTENT_RETRY_STATUSES = {500, 502, 504}  # may have been processed behind the error
+_UNCERTAIN_STATUSES = {502, 504}  # a gateway's answer: the comment may exist (DeliveryUncertain)
+
+# Jira rejects comment bodies above 32,767 characters; batches are split below that
+_COMMENT_BATCH_CHARS = 30000
+
+# Per-operation call statistics; latencies cover the last _LATENCY_WINDOW calls
+_LATENCY_WINDOW = 256
+_stats: dict[str, dict] = {}
+
+# Pooled HTTP session — created lazily on first use and bound to the event loop that
+# created it. A different running loop (e.g. a new asyncio.run) gets a fresh session.
+_session: aiohttp.ClientSession | None = None
+_session_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """Return the pooled ClientSession for the running event loop, creating it if needed."""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session_loop is not loop:
+        _session = aiohttp.ClientSession(timeout=_JIRA_TIMEOUT)
+        _session_loop = loop
+    return _session
+
+
+async def close() -> None:
+    """Close the pooled session. Safe to call when no session was created."""
+    global _session, _session_loop
+    session, _session, _session_loop = _session, None, None
+    if session is not None:
+        await session.close()
+
 
 def _config() -> dict:
     """Read Jira config from env vars at call time (not cached at import)."""
@@ -51,6 +102,90 @@ def _headers() -> dict:
     }
 
 
+def _max_retries() -> int:
+    return max(0, int(os.getenv("JIRA_MAX_RETRIES", "2")))
+
+
+def _retry_delay(attempt: int, headers=None) -> float:
+    retry_after = headers.get("Retry-After") if headers is not None else None
+    if isinstance(retry_after, str):
+        try:
+            return min(float(retry_after), _RETRY_AFTER_CAP_SECONDS)
+        except ValueError:
+            pass
+    return RETRY_BACKOFF_SECONDS * 2 ** attempt
+
+
+def _record(op: str, seconds: float, ok: bool, retries: int) -> None:
+    entry = _stats.setdefault(op, {
+        "calls": 0, "errors": 0, "retries": 0, "latency": deque(maxlen=_LATENCY_WINDOW),
+    })
+    entry["calls"] += 1
+    entry["errors"] += 0 if ok else 1
+    entry["retries"] += retries
+    entry["latency"].append(seconds)
+    log.debug("Jira %s: %s in %.0f ms (%d retr%s)", op, "ok" if ok else "failed",
+              seconds * 1000, retries, "y" if retries == 1 else "ies")
+
+
+def stats() -> dict:
+    """Per-operation call counts, errors, retries and p50/p95/max latency in ms."""
+    result = {}
+    for op, entry in _stats.items():
+        latency = sorted(entry["latency"])
+        result[op] = {
+            "calls": entry["calls"],
+            "errors": entry["errors"],
+            "retries": entry["retries"],
+            "p50_ms": round(latency[len(latency) // 2] * 1000, 1),
+            "p95_ms": round(latency[min(len(latency) - 1, int(len(latency) * 0.95))] * 1000, 1),
+            "max_ms": round(latency[-1] * 1000, 1),
+        }
+    return result
+
+
+@contextlib.asynccontextmanager
+async def _request(op: str, method: str, url: str, *, idempotent: bool, **kwargs):
+    """Send a Jira request on the pooled session with bounded retry; yield the final response.
+
+    Connection errors/timeouts that exhaust the retries are raised as-is. The whole
+    call, retries included, is recorded under op.
+    """
+    session = _get_session()
+    start = time.monotonic()
+    retries = 0
+    ok = False
+    stack = contextlib.AsyncExitStack()
+    try:
+        while True:
+            stack = contextlib.AsyncExitStack()
+            try:
+                resp = await stack.enter_async_context(
+                    getattr(session, method)(url, headers=_headers(), **kwargs)
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                retryable = idempotent or isinstance(exc, aiohttp.ClientConnectorError)
+                if not retryable or retries >= _max_retries():
+                    raise
+                reason, delay = type(exc).__name__, _retry_delay(retries)
+            else:
+                retryable = resp.status in _ALWAYS_RETRY_STATUSES or (
+                    idempotent and resp.status in _IDEMPOTENT_RETRY_STATUSES
+                )
+                if not retryable or retries >= _max_retries():
+                    break
+                reason, delay = f"HTTP {resp.status}", _retry_delay(retries, resp.headers)
+                await stack.aclose()
+            retries += 1
+            log.warning("Jira %s: %s — retry %d/%d in %.1fs", op, reason, retries, _max_retries(), delay)
+            await asyncio.sleep(delay)
+        ok = resp.status < 400
+        yield resp
+    finally:
+        await stack.aclose()
+        _record(op, time.monotonic() - start, ok, retries)
+
+
 def _to_adf(text: str) -> dict:
     """Convert a plain-text string to minimal Atlassian Document Format (ADF)."""
     paragraphs = []
@@ -92,59 +227,100 @@ async def create_issue(
     }
 
     try:
-        async with aiohttp.ClientSession(headers=_headers(), timeout=_JIRA_TIMEOUT) as session:
-            url = f"{cfg['base_url']}/rest/api/3/issue"
-            async with session.post(url, json=body) as resp:
-                if resp.status == 201:
-                    data = await resp.json()
-                    return data["key"]
-
-                # Fall back to Task if the configured issue type is rejected
-                if resp.status == 400:
-                    body["fields"]["issuetype"] = {"name": "Task"}
-                    async with session.post(url, json=body) as resp2:
-                        if resp2.status == 201:
-                            data = await resp2.json()
-                            log.warning(
-                                "Jira: issue type '%s' rejected, created as Task: %s",
-                                cfg["issue_type"], data["key"],
-                            )
-                            return data["key"]
-                        err = await resp2.text()
-                        log.error(
-                            "Jira create_issue failed (fallback): %s %s",
-                            resp2.status, err[:200],
+        url = f"{cfg['base_url']}/rest/api/3/issue"
+        async with _request("create_issue", "post", url, json=body, idempotent=False) as resp:
+            if resp.status == 201:
+                data = await resp.json()
+                return data["key"]
+
+            # Fall back to Task if the configured issue type is rejected
+            if resp.status == 400:
+                body["fields"]["issuetype"] = {"name": "Task"}
+                async with _request("create_issue", "post", url, json=body, idempotent=False) as resp2:
+                    if resp2.status == 201:
+                        data = await resp2.json()
+                        log.warning(
+                            "Jira: issue type '%s' rejected, created as Task: %s",
+                            cfg["issue_type"], data["key"],
                         )
-                        return None
+                        return data["key"]
+                    err = await resp2.text()
+                    log.error(
+                        "Jira create_issue failed (fallback): %s %s",
+                        resp2.status, err[:200],
+                    )
+                    return None
 
-                err = await resp.text()
-                log.error("Jira create_issue failed: %s %s", resp.status, err[:200])
-                return None
+            err = await resp.text()
+            log.error("Jira create_issue failed: %s %s", resp.status, err[:200])
+            return None
     except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
         log.error("Jira create_issue failed (connection error): %s", exc)
         return None
 
 
-async def add_comment(issue_key: str, comment_text: str) -> None:
-    """Add a plain-text comment to a Jira issue."""
+async def add_comment(issue_key: str, comment_text: str) -> bool | None:
+    """Add a plain-text comment to a Jira issue.
+
+    Returns True once posted, False if Jira rejected it or was unreachable (the watcher's
+    outbox retries those), None when Jira is not configured. Raises DeliveryUncertain
+    when Jira may have posted it anyway (a timeout, a dropped connection or a 502/504),
+    so the outbox does not post it twice.
+    """
+    return await add_comments(issue_key, [comment_text])
+
+
+def _batch_adf(comments: list[str]) -> dict:
+    """One ADF document holding several comment bodies, separated by horizontal rules."""
+    content: list[dict] = []
+    for text in comments:
+        if content:
+            content.append({"type": "rule"})
+        content.extend(_to_adf(text)["content"])
+    return {"version": 1, "type": "doc", "content": content}
+
+
+async def add_comments(issue_key: str, comments: list[str]) -> bool | None:
+    """Post several plain-text comment bodies to a Jira issue as one comment.
+
+    Bodies are joined with horizontal rules; a batch too large for a single Jira
+    comment is split over as few requests as possible. Returns like add_comment; a
+    failure part-way leaves the earlier requests posted, so callers that retry (the
+    outbox) pass no more than _COMMENT_BATCH_CHARS at a time.
+    """
     if not _is_configured():
         log.warning("Jira not configured — skipping comment on %s", issue_key)
-        return
+        return None
 
-    cfg = _config()
-    body = {"body": _to_adf(comment_text)}
-    try:
-        async with aiohttp.ClientSession(headers=_headers(), timeout=_JIRA_TIMEOUT) as session:
-            url = f"{cfg['base_url']}/rest/api/3/issue/{issue_key}/comment"
-            async with session.post(url, json=body) as resp:
+    batches: list[list[str]] = []
+    size = 0
+    for text in comments:
+        if not batches or size + len(text) > _COMMENT_BATCH_CHARS:
+            batches.append([])
+            size = 0
+        batches[-1].append(text)
+        size += len(text)
+
+    url = f"{_config()['base_url']}/rest/api/3/issue/{issue_key}/comment"
+    for batch in batches:
+        try:
+            async with _request("add_comment", "post", url, json={"body": _batch_adf(batch)},
+                                idempotent=False) as resp:
                 if resp.status not in (200, 201):
                     err = await resp.text()
+                    if resp.status in _UNCERTAIN_STATUSES:
+                        raise DeliveryUncertain(f"Jira add_comment on {issue_key}: {resp.status} {err[:200]}")
                     log.error(
                         "Jira add_comment failed on %s: %s %s",
                         issue_key, resp.status, err[:200],
                     )
-    except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
-        log.error("Jira add_comment failed on %s (connection error): %s", issue_key, exc)
+                    return False
+        except (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError) as exc:
+            log.error("Jira add_comment failed on %s (connection error): %s", issue_key, exc)
+            return False
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            raise DeliveryUncertain(f"Jira add_comment on {issue_key}: {type(exc).__name__}: {exc}") from exc
+    return True
 
 
 async def resolve_issue(
@@ -164,18 +340,17 @@ async def resolve_issue(
         return
 
     cfg = _config()
+    url = f"{cfg['base_url']}/rest/api/3/issue/{issue_key}/transitions"
     try:
-        async with aiohttp.ClientSession(headers=_headers(), timeout=_JIRA_TIMEOUT) as session:
-            url = f"{cfg['base_url']}/rest/api/3/issue/{issue_key}/transitions"
-            async with session.get(url) as resp:
-                if resp.status != 200:
-                    log.warning(
-                        "Jira: could not fetch transitions for %s — comment only",
-                        issue_key,
-                    )
-                    await add_comment(issue_key, resolution_comment)
-                    return
-                data = await resp.json()
+        async with _request("get_transitions", "get", url, idempotent=True) as resp:
+            if resp.status != 200:
+                log.warning(
+                    "Jira: could not fetch transitions for %s — comment only",
+                    issue_key,
+                )
+                await _resolution_comment(issue_key, resolution_comment)
+                return
+            data = await resp.json()
     except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
         log.error("Jira resolve_issue failed on %s (connection error): %s", issue_key, exc)
         return
@@ -191,18 +366,17 @@ async def resolve_issue(
     if transition_id:
         resolution_name = "Won't Fix" if resolution.lower() in {"won't fix", "wont fix"} else "Done"
         try:
-            async with aiohttp.ClientSession(headers=_headers(), timeout=_JIRA_TIMEOUT) as session:
-                payload = {
-                    "transition": {"id": transition_id},
-                    "fields": {"resolution": {"name": resolution_name}},
-                }
-                async with session.post(url, json=payload) as resp:
-                    if resp.status not in (200, 204):
-                        err = await resp.text()
-                        log.warning(
-                            "Jira transition failed for %s: %s %s",
-                            issue_key, resp.status, err[:200],
-                        )
+            payload = {
+                "transition": {"id": transition_id},
+                "fields": {"resolution": {"name": resolution_name}},
+            }
+            async with _request("transition", "post", url, json=payload, idempotent=True) as resp:
+                if resp.status not in (200, 204):
+                    err = await resp.text()
+                    log.warning(
+                        "Jira transition failed for %s: %s %s",
+                        issue_key, resp.status, err[:200],
+                    )
         except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
             log.error("Jira transition failed on %s (connection error): %s", issue_key, exc)
     else:
@@ -212,4 +386,11 @@ async def resolve_issue(
         )
 
     # Always add the resolution comment regardless of transition outcome
-    await add_comment(issue_key, resolution_comment)
+    await _resolution_comment(issue_key, resolution_comment)
+
+
+async def _resolution_comment(issue_key: str, text: str) -> None:
+    try:
+        await add_comment(issue_key, text)
+    except DeliveryUncertain as exc:
+        log.error("Jira resolution comment on %s may not have been posted: %s", issue_key, exc)
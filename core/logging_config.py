@@ -5,47 +5,197 @@ Provides a JSONFormatter and two setup functions:
   setup_watcher_logging()  — extends setup_logging() with a rotating file handler
                              on ainoc.watcher for the on-call watcher process
 
+Handlers sit behind a QueueHandler: the emitting thread (usually the event loop) only
+renders the message and enqueues the record, and a QueueListener thread formats and
+writes it, so a slow stderr or disk never stalls the loop. stop_logging() flushes the
+queues; it is registered with atexit.
+
+Noisy DEBUG loggers are rate-limited per second (LOG_DEBUG_RATE_LIMITS); records over
+the limit are dropped and the count is attached to the next one let through as the
+"suppressed" field.
+
 Environment variables:
-  LOG_LEVEL   DEBUG | INFO | WARNING | ERROR   (default: INFO)
-  LOG_FORMAT  json | text                       (default: json)
+  LOG_LEVEL              DEBUG | INFO | WARNING | ERROR   (default: INFO)
+  LOG_FORMAT             json | text                       (default: json)
+  LOG_ASYNC              0 to write from the emitting thread (default: 1)
+  LOG_DEBUG_RATE_LIMITS  logger=records/s[,...]            (default: ainoc.transport.ssh=20)
 """
+import atexit
+import copy
 import json
 import logging
 import os
+import queue
+import threading
 from datetime import datetime, timezone
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
-# Standard LogRecord attributes that should NOT be forwarded as extra JSON fields.
-_STANDARD_ATTRS = frozenset({
-    "args", "created", "exc_info", "exc_text", "filename", "funcName",
-    "levelname", "levelno", "lineno", "message", "module", "msecs", "msg",
-    "name", "pathname", "process", "processName", "relativeCreated",
-    "stack_info", "taskName", "thread", "threadName",
-})
+try:
+    import orjson  # optional — faster JSON encoding of log records
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    _ORJSON_AVAILABLE = False
+
+# Standard LogRecord attributes that should NOT be forwarded as extra JSON fields:
+# everything a bare LogRecord carries on this Python, plus what formatters add.
+_STANDARD_ATTRS = frozenset(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {
+    "message", "asctime", "taskName",
+}
+
+_json_encoder = json.JSONEncoder(default=str)  # reused; json.dumps(default=...) builds one per call
+
+
+def _dumps(entry: dict) -> str:
+    if _ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(entry, default=str).decode()
+        except TypeError:
+            pass  # e.g. non-str keys or oversized ints in an extra field
+    return _json_encoder.encode(entry)
 
 
 class JSONFormatter(logging.Formatter):
     """Emit one JSON object per log record — friendly for log-aggregation pipelines."""
 
+    def __init__(self):
+        super().__init__()
+        self._ts_cache: tuple[int, str] = (-1, "")  # (epoch second, formatted prefix)
+
+    def _timestamp(self, record: logging.LogRecord) -> str:
+        second = int(record.created)
+        cached_second, prefix = self._ts_cache
+        if second != cached_second:
+            prefix = datetime.fromtimestamp(second, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+            self._ts_cache = (second, prefix)
+        return f"{prefix}.{int(record.msecs):03d}Z"
+
     def format(self, record: logging.LogRecord) -> str:
-        ts = (
-            datetime.fromtimestamp(record.created, tz=timezone.utc)
-            .strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
-        )
         entry: dict = {
-            "ts":     ts,
+            "ts":     self._timestamp(record),
             "level":  record.levelname,
             "logger": record.name,
             "msg":    record.getMessage(),
         }
-        if record.exc_info:
+        # exc_text is pre-rendered by _DeferredQueueHandler; exc_info is set otherwise
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        elif record.exc_info:
             entry["exc"] = self.formatException(record.exc_info)
         # Forward any extra fields added via logging.info("...", extra={...})
-        for key, val in record.__dict__.items():
-            if key not in _STANDARD_ATTRS:
-                entry[key] = val
-        return json.dumps(entry, default=str)
+        attrs = record.__dict__
+        for key in attrs.keys() - _STANDARD_ATTRS:
+            entry[key] = attrs[key]
+        return _dumps(entry)
+
+
+class DebugRateLimit(logging.Filter):
+    """Let at most N DEBUG records per second through for the configured loggers.
+
+    limits maps a logger name to records per second and also covers its children.
+    INFO and above always pass. The number of records dropped since the last one let
+    through is attached to it as the "suppressed" attribute.
+    """
+
+    def __init__(self, limits: dict[str, float]):
+        super().__init__()
+        self._limits = limits
+        self._resolved: dict[str, str | None] = {}  # record.name -> configured logger
+        self._windows: dict[str, list] = {}  # configured logger -> [start, count, suppressed]
+        self._lock = threading.Lock()
+
+    def _limited_logger(self, name: str) -> str | None:
+        try:
+            return self._resolved[name]
+        except KeyError:
+            pass
+        candidate = name
+        while candidate and candidate not in self._limits:
+            candidate = candidate.rpartition(".")[0]
+        self._resolved[name] = candidate or None
+        return candidate or None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        limited = self._limited_logger(record.name)
+        if limited is None:
+            return True
+        with self._lock:
+            window = self._windows.setdefault(limited, [record.created, 0, 0])
+            if record.created - window[0] >= 1.0:
+                window[0], window[1] = record.created, 0
+            if window[1] >= self._limits[limited]:
+                window[2] += 1
+                return False
+            window[1] += 1
+            if window[2]:
+                record.suppressed, window[2] = window[2], 0
+        return True
+
+
+def _debug_rate_limits() -> dict[str, float]:
+    limits = {}
+    for item in os.getenv("LOG_DEBUG_RATE_LIMITS", "ainoc.transport.ssh=20").split(","):
+        name, _, rate = item.partition("=")
+        try:
+            limits[name.strip()] = float(rate)
+        except ValueError:
+            continue
+    return {name: rate for name, rate in limits.items() if name}
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    prepare() only renders the message (args may be mutable) and the traceback (the
+    exception's frames should not outlive the call); the formatter runs on the
+    listener thread, so the JSON fields and extras survive the trip.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_exc_formatter = logging.Formatter()
+_listeners: list[QueueListener] = []
+
+
+def _deferred(handler: logging.Handler) -> logging.Handler:
+    """Put handler behind a queue drained by its own listener thread (unless LOG_ASYNC=0).
+
+    The returned QueueHandler exposes the listener as .listener.
+    """
+    if os.getenv("LOG_ASYNC", "1") == "0":
+        return handler
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    qh = _DeferredQueueHandler(records)
+    qh.setLevel(handler.level)
+    qh.listener = listener
+    return qh
+
+
+def _underlying(handler: logging.Handler) -> tuple:
+    listener = getattr(handler, "listener", None)
+    return listener.handlers if listener is not None else (handler,)
+
+
+def stop_logging() -> None:
+    """Write out every queued record and stop the listener threads. Safe to call twice."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(stop_logging)
 
 
 def _make_formatter() -> logging.Formatter:
@@ -72,8 +222,11 @@ def setup_logging() -> None:
     sh = logging.StreamHandler()
     sh.setLevel(level)
     sh.setFormatter(_make_formatter())
-    root.addHandler(sh)
-
+    handler = _deferred(sh)
+    limits = _debug_rate_limits()
+    if limits:
+        handler.addFilter(DebugRateLimit(limits))
+    root.addHandler(handler)
 
 
 def setup_watcher_logging(log_file: Path) -> None:
@@ -90,11 +243,11 @@ def setup_watcher_logging(log_file: Path) -> None:
     watcher_log = logging.getLogger("ainoc.watcher")
 
     # Avoid adding a second file handler if already set up (e.g. in tests)
-    if any(isinstance(h, RotatingFileHandler) for h in watcher_log.handlers):
+    if any(isinstance(u, RotatingFileHandler) for h in watcher_log.handlers for u in _underlying(h)):
         return
 
     log_file.parent.mkdir(parents=True, exist_ok=True)
     fh = RotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=3)
     fh.setLevel(logging.DEBUG)
     fh.setFormatter(JSONFormatter())
-    watcher_log.addHandler(fh)
+    watcher_log.addHandler(_deferred(fh))
@@ -0,0 +1,299 @@
+"""Durable outbox for the watcher's Jira and Discord notifications.
+
+submit() records a notification in a local SQLite database and returns at once; a
+background dispatcher delivers it, retrying with exponential backoff, so the incident
+path never waits on a slow or unavailable ticketing/chat API and no update is lost
+across a watcher restart.
+
+Every entry belongs to a stream (one per Jira issue, one for the Discord channel).
+Entries in a stream are delivered strictly in order: a failing entry holds back the
+ones behind it until it succeeds or is parked as dead after OUTBOX_MAX_ATTEMPTS;
+other streams keep flowing. Every entry has an idempotency key — submitting a key
+that is already queued, or was delivered within the retention window, is a no-op.
+
+An entry's kind names the function that delivers it ("jira_client.add_comment",
+"discord_approval.post_session_error", ...); it is called with the stored keyword
+arguments and fails if it raises or returns False. A failure that may have been
+delivered anyway (DeliveryUncertain: a timeout or gateway error after the request was
+sent) is not retried — resending could duplicate the comment or message — but parked
+as dead for an operator to check. When no dispatcher is running (MCP tools, tests,
+one-off scripts) submit() just awaits the call directly.
+
+Notifications queued back to back are delivered together: the dispatcher folds up to
+BATCH_MAX consecutive Jira comments for the same issue into one jira_client.add_comments()
+request, and consecutive Discord progress updates into one
+discord_approval.post_progress_updates() message — never more than fits in a single
+request, so a failed one is retried whole without repeating anything already posted.
+
+Environment variables (read at call time):
+  OUTBOX_DB             SQLite file (default: data/outbox.db)
+  OUTBOX_MAX_ATTEMPTS   delivery attempts before an entry is parked as dead (default: 8)
+  OUTBOX_DRAIN_SECONDS  how long the watcher waits on shutdown for due entries (default: 5)
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import time
+from pathlib import Path
+
+from core import discord_approval, jira_client
+from core.delivery import DeliveryUncertain
+
+log = logging.getLogger("ainoc.outbox")
+
+PROJECT_DIR = Path(__file__).parent.parent
+RETRY_BASE_SECONDS = 2.0
+RETRY_MAX_SECONDS = 300.0
+RETENTION_SECONDS = 7 * 86400  # delivered entries are kept this long for idempotency
+BATCH_MAX = 20
+# Kinds folded into one call when queued back to back in a stream with otherwise equal
+# arguments: kind -> (batch function, item argument, list argument, size limit)
+_FOLDED = {
+    "jira_client.add_comment": (
+        "jira_client.add_comments", "comment_text", "comments", "jira_client._COMMENT_BATCH_CHARS",
+    ),
+    "discord_approval.post_progress_update": (
+        "discord_approval.post_progress_updates", "message", "messages", "discord_approval.MESSAGE_MAX_CHARS",
+    ),
+}
+
+_TARGETS = {"jira_client": jira_client, "discord_approval": discord_approval}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    key         TEXT NOT NULL UNIQUE,
+    stream      TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    next_at     REAL NOT NULL,
+    created_at  REAL NOT NULL,
+    last_error  TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (status, stream, id);
+"""
+
+
+def db_path() -> Path:
+    return Path(os.getenv("OUTBOX_DB", str(PROJECT_DIR / "data" / "outbox.db")))
+
+
+def _max_attempts() -> int:
+    return max(1, int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8")))
+
+
+def _resolve(kind: str):
+    module, _, name = kind.partition(".")
+    target = getattr(_TARGETS.get(module), name, None)
+    if target is None:
+        raise LookupError(f"unknown outbox kind {kind!r}")
+    return target
+
+
+def _default_key(kind: str, stream: str, payload: str) -> str:
+    return hashlib.sha256(f"{kind}\0{stream}\0{payload}".encode()).hexdigest()[:32]
+
+
+class Outbox:
+    """SQLite-backed queue plus the dispatcher that drains it. One per watcher process."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.execute(
+            "DELETE FROM outbox WHERE status = 'done' AND created_at < ?",
+            (time.time() - RETENTION_SECONDS,),
+        )
+        self._wake = asyncio.Event()
+        self._busy: set[str] = set()  # streams with a delivery in flight
+        self._deliveries: set[asyncio.Task] = set()
+
+    def enqueue(self, kind: str, stream: str, payload: dict, key: str | None = None) -> bool:
+        """Store an entry. Returns False if its idempotency key is already known."""
+        body = json.dumps(payload, sort_keys=True, default=str)
+        now = time.time()
+        cur = self._db.execute(
+            "INSERT OR IGNORE INTO outbox (key, stream, kind, payload, next_at, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key or _default_key(kind, stream, body), stream, kind, body, now, now),
+        )
+        self._wake.set()
+        return cur.rowcount == 1
+
+    def pending(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def dead(self) -> list[dict]:
+        rows = self._db.execute("SELECT * FROM outbox WHERE status = 'dead' ORDER BY id").fetchall()
+        return [dict(r) for r in rows]
+
+    def _heads(self) -> list[sqlite3.Row]:
+        """The oldest pending entry of every stream."""
+        return self._db.execute(
+            "SELECT o.* FROM outbox o JOIN ("
+            "  SELECT MIN(id) AS id FROM outbox WHERE status = 'pending' GROUP BY stream"
+            ") h ON o.id = h.id ORDER BY o.id"
+        ).fetchall()
+
+    def _batch(self, head: sqlite3.Row) -> list[sqlite3.Row]:
+        """head plus the entries of its kind queued right behind it with the same other
+        arguments (see _FOLDED), as many as the batch function sends in a single request."""
+        if head["kind"] not in _FOLDED:
+            return [head]
+        _, item, _, limit = _FOLDED[head["kind"]]
+        rows = self._db.execute(
+            "SELECT * FROM outbox WHERE status = 'pending' AND stream = ? AND id >= ? "
+            "ORDER BY id LIMIT ?",
+            (head["stream"], head["id"], BATCH_MAX),
+        ).fetchall()
+        head_payload = json.loads(head["payload"])
+        size = len(head_payload.pop(item, ""))
+        batch = [head]
+        for row in rows[1:]:
+            payload = json.loads(row["payload"])
+            size += len(payload.pop(item, "")) + 1  # + separator
+            if row["kind"] != head["kind"] or payload != head_payload or size > _resolve(limit):
+                break
+            batch.append(row)
+        return batch
+
+    async def run(self) -> None:
+        """Dispatch due stream heads until cancelled."""
+        while True:
+            self._wake.clear()
+            now = time.time()
+            wait = None
+            for row in self._heads():
+                if row["stream"] in self._busy:
+                    continue
+                if row["next_at"] > now:
+                    wait = min(wait, row["next_at"] - now) if wait is not None else row["next_at"] - now
+                    continue
+                self._busy.add(row["stream"])
+                task = asyncio.create_task(self._deliver(self._batch(row)))
+                self._deliveries.add(task)
+                task.add_done_callback(self._deliveries.discard)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _deliver(self, rows: list[sqlite3.Row]) -> None:
+        """Deliver a stream head (with its batch, if any). Failures are charged to the head."""
+        row = rows[0]
+        attempts = row["attempts"] + 1
+        try:
+            if len(rows) > 1:
+                batch_kind, item, items, _ = _FOLDED[row["kind"]]
+                payloads = [json.loads(r["payload"]) for r in rows]
+                args = {k: v for k, v in payloads[0].items() if k != item}
+                result = await _resolve(batch_kind)(**args, **{items: [p[item] for p in payloads]})
+            else:
+                result = await _resolve(row["kind"])(**json.loads(row["payload"]))
+            if result is False:
+                raise RuntimeError("delivery reported failure")
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:500]
+            if isinstance(e, DeliveryUncertain):
+                self._db.executemany(
+                    "UPDATE outbox SET status = 'dead', attempts = attempts + 1, last_error = ? WHERE id = ?",
+                    [(error, r["id"]) for r in rows],
+                )
+                log.error("Outbox: %s (%s) may or may not have been delivered — not retried, check it: %s",
+                          row["kind"], row["stream"], error)
+            elif isinstance(e, LookupError) or attempts >= _max_attempts():
+                self._db.execute(
+                    "UPDATE outbox SET status = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                    (attempts, error, row["id"]),
+                )
+                log.error("Outbox: giving up on %s (%s) after %d attempt(s): %s",
+                          row["kind"], row["stream"], attempts, error)
+            else:
+                delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+                delay *= random.uniform(0.8, 1.2)
+                self._db.execute(
+                    "UPDATE outbox SET attempts = ?, next_at = ?, last_error = ? WHERE id = ?",
+                    (attempts, time.time() + delay, error, row["id"]),
+                )
+                log.warning("Outbox: %s (%s) failed (attempt %d), retrying in %.0fs: %s",
+                            row["kind"], row["stream"], attempts, delay, error)
+        else:
+            self._db.executemany(
+                "UPDATE outbox SET status = 'done', attempts = attempts + 1, last_error = NULL WHERE id = ?",
+                [(r["id"],) for r in rows],
+            )
+        finally:
+            self._busy.discard(row["stream"])
+            self._wake.set()
+
+    async def drain(self, timeout: float) -> None:
+        """Wait up to timeout seconds for entries that are due now to be delivered."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            due = self._db.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status = 'pending' AND next_at <= ?", (time.time(),),
+            ).fetchone()[0]
+            if not due and not self._deliveries:
+                return
+            await asyncio.sleep(0.05)
+
+    async def close(self) -> None:
+        for task in list(self._deliveries):
+            task.cancel()
+        await asyncio.gather(*self._deliveries, return_exceptions=True)
+        self._db.close()
+
+
+_outbox: Outbox | None = None
+_dispatcher: asyncio.Task | None = None
+
+
+def start(path: Path | None = None) -> Outbox:
+    """Open the outbox and start its dispatcher on the running loop (entries left over
+    from a previous run are delivered first)."""
+    global _outbox, _dispatcher
+    _outbox = Outbox(path or db_path())
+    _dispatcher = asyncio.get_running_loop().create_task(_outbox.run())
+    backlog = _outbox.pending()
+    if backlog:
+        log.info("Outbox: %d undelivered notification(s) from a previous run", backlog)
+    return _outbox
+
+
+async def stop(drain_timeout: float = 5.0) -> None:
+    """Give due entries up to drain_timeout seconds to go out, then stop the dispatcher.
+    Whatever is left stays in the database for the next start()."""
+    global _outbox, _dispatcher
+    outbox, dispatcher, _outbox, _dispatcher = _outbox, _dispatcher, None, None
+    if outbox is None:
+        return
+    await outbox.drain(drain_timeout)
+    dispatcher.cancel()
+    await asyncio.gather(dispatcher, return_exceptions=True)
+    remaining = outbox.pending()
+    await outbox.close()
+    if remaining:
+        log.warning("Outbox: %d notification(s) left for the next start", remaining)
+
+
+async def submit(kind: str, *, stream: str, key: str | None = None, **payload):
+    """Queue a notification for delivery, or call it directly when no dispatcher is running.
+
+    kind is "<module>.<function>" (see _TARGETS), payload its keyword arguments (JSON-
+    serialisable). key defaults to a hash of kind, stream and payload.
+    """
+    if _outbox is None:
+        return await _resolve(kind)(**payload)
+    if not _outbox.enqueue(kind, stream, payload, key):
+        log.debug("Outbox: duplicate %s (%s) ignored", kind, key)
+    return None
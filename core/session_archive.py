@@ -0,0 +1,273 @@
+"""Compressed, indexed archive of finished agent session streams.
+
+After each On-Call session the watcher archives logs/.session-<name>.tmp (the
+stream-json NDJSON written by `claude -p --output-format stream-json`) instead of
+deleting it:
+
+  <name>.ndjson.gz    — gzip, written as independent members ("frames") of about
+                        SESSION_ARCHIVE_FRAME_KB uncompressed each. Any frame can be
+                        decompressed on its own from its byte offset, so a post-mortem
+                        can jump to a tool call without inflating the whole stream.
+  <name>.index.json   — sidecar: session metadata (device, issue key, cost, duration,
+                        exit), frame table (offset, length, first line, line count) and
+                        every tool call with the line/frame it starts on.
+
+Retention is enforced after every archive: oldest sessions are removed once the
+archive exceeds SESSION_ARCHIVE_MAX_MB or is older than SESSION_ARCHIVE_MAX_AGE_DAYS.
+
+Environment variables (read at call time):
+  SESSION_ARCHIVE_DIR            archive directory (default: logs/sessions)
+  SESSION_ARCHIVE_MAX_MB         total size budget in MB; 0 disables archiving (default: 200)
+  SESSION_ARCHIVE_MAX_AGE_DAYS   maximum age in days; 0 disables the age limit (default: 30)
+  SESSION_ARCHIVE_FRAME_KB       uncompressed frame size in KB (default: 256)
+"""
+import gzip
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+log = logging.getLogger("ainoc.session_archive")
+
+PROJECT_DIR = Path(__file__).parent.parent
+_ARCHIVE_SUFFIX = ".ndjson.gz"
+_INDEX_SUFFIX = ".index.json"
+
+
+def archive_dir() -> Path:
+    return Path(os.getenv("SESSION_ARCHIVE_DIR", str(PROJECT_DIR / "logs" / "sessions")))
+
+
+def _max_bytes() -> int:
+    return int(float(os.getenv("SESSION_ARCHIVE_MAX_MB", "200")) * 1024 * 1024)
+
+
+def _max_age_seconds() -> float:
+    return float(os.getenv("SESSION_ARCHIVE_MAX_AGE_DAYS", "30")) * 86400
+
+
+def _frame_bytes() -> int:
+    return max(1, int(os.getenv("SESSION_ARCHIVE_FRAME_KB", "256"))) * 1024
+
+
+def is_enabled() -> bool:
+    """Archiving is on unless the size budget is set to 0."""
+    return _max_bytes() > 0
+
+
+def _tool_call(line: str) -> dict | None:
+    """Return {"id", "name"} if the NDJSON line starts a tool_use block, else None."""
+    if '"tool_use"' not in line:  # cheap pre-filter — most lines are text deltas
+        return None
+    try:
+        obj = json.loads(line)
+    except ValueError:
+        return None
+    ev = obj.get("event", {}) if obj.get("type") == "stream_event" else {}
+    cb = ev.get("content_block", {}) if ev.get("type") == "content_block_start" else {}
+    if cb.get("type") != "tool_use":
+        return None
+    return {"id": cb.get("id", ""), "name": cb.get("name", "")}
+
+
+def archive_session(session_json: Path, meta: dict | None = None) -> Path | None:
+    """Compress a finished session stream into the archive and write its sidecar index.
+
+    meta is merged into the index (session_name, device_name, device_ip, issue_key,
+    started_at, duration_s, exit, ...). The raw file is left in place — the caller
+    decides whether to delete it. Returns the archive path, or None if archiving is
+    disabled or the source file is missing.
+    """
+    if not is_enabled() or not session_json.exists():
+        return None
+
+    meta = dict(meta or {})
+    name = meta.get("session_name") or session_json.stem.removeprefix(".session-")
+    out_dir = archive_dir()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    archive_path = out_dir / f"{name}{_ARCHIVE_SUFFIX}"
+    tmp_path = archive_path.with_suffix(".tmp")
+
+    frame_limit = _frame_bytes()
+    frames: list[dict] = []
+    tool_calls: list[dict] = []
+    cost = None
+    line_no = 0
+    raw_bytes = 0
+    buf: list[bytes] = []
+    buf_size = 0
+    buf_first_line = 0
+
+    def _flush(out) -> None:
+        nonlocal buf, buf_size
+        if not buf:
+            return
+        data = gzip.compress(b"".join(buf), compresslevel=6)
+        frames.append({
+            "offset": out.tell(),
+            "length": len(data),
+            "first_line": buf_first_line,
+            "lines": len(buf),
+        })
+        out.write(data)
+        buf, buf_size = [], 0
+
+    with open(session_json, "rb") as src, open(tmp_path, "wb") as out:
+        for raw in src:
+            if not buf:
+                buf_first_line = line_no
+            buf.append(raw)
+            buf_size += len(raw)
+            raw_bytes += len(raw)
+
+            line = raw.decode("utf-8", errors="replace")
+            call = _tool_call(line)
+            if call:
+                call.update(line=line_no, frame=len(frames))
+                tool_calls.append(call)
+            elif '"type":"result"' in line or '"type": "result"' in line:
+                try:
+                    cost = json.loads(line).get("total_cost_usd", cost)
+                except ValueError:
+                    pass
+
+            line_no += 1
+            if buf_size >= frame_limit:
+                _flush(out)
+        _flush(out)
+        compressed_bytes = out.tell()
+
+    tmp_path.replace(archive_path)
+
+    index = {
+        "session_name": name,
+        **meta,
+        "cost_usd": meta["cost_usd"] if meta.get("cost_usd") is not None else cost,
+        "archive": archive_path.name,
+        "archived_at": time.time(),
+        "raw_bytes": raw_bytes,
+        "compressed_bytes": compressed_bytes,
+        "line_count": line_no,
+        "frames": frames,
+        "tool_calls": tool_calls,
+    }
+    index_path = out_dir / f"{name}{_INDEX_SUFFIX}"
+    tmp_index = index_path.with_suffix(".tmp")
+    tmp_index.write_text(json.dumps(index))
+    tmp_index.replace(index_path)
+
+    log.info(
+        "Session archived: %s (%d lines, %d → %d bytes, %d frame(s), %d tool call(s))",
+        archive_path.name, line_no, raw_bytes, compressed_bytes, len(frames), len(tool_calls),
+    )
+    return archive_path
+
+
+def load_index(session_name: str) -> dict | None:
+    """Return the sidecar index for an archived session, or None if absent/corrupt."""
+    try:
+        return json.loads((archive_dir() / f"{session_name}{_INDEX_SUFFIX}").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def list_sessions() -> list[dict]:
+    """Return all archived session indexes, newest first. Frame tables are omitted."""
+    sessions = []
+    for path in archive_dir().glob(f"*{_INDEX_SUFFIX}"):
+        try:
+            index = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        index.pop("frames", None)
+        sessions.append(index)
+    sessions.sort(key=lambda i: i.get("archived_at", 0), reverse=True)
+    return sessions
+
+
+def read_frame(session_name: str, frame_no: int, index: dict | None = None) -> list[str]:
+    """Decompress one frame and return its lines (without trailing newlines)."""
+    index = index or load_index(session_name)
+    if not index or not 0 <= frame_no < len(index["frames"]):
+        return []
+    frame = index["frames"][frame_no]
+    with open(archive_dir() / index["archive"], "rb") as f:
+        f.seek(frame["offset"])
+        data = gzip.decompress(f.read(frame["length"]))
+    lines = data.split(b"\n")
+    if lines and lines[-1] == b"":
+        lines.pop()
+    return [line.decode("utf-8", errors="replace") for line in lines]
+
+
+def read_lines(session_name: str, start: int, count: int) -> list[str]:
+    """Return lines [start, start + count) of an archived session, inflating only the frames needed."""
+    index = load_index(session_name)
+    if not index or count <= 0:
+        return []
+    end = start + count
+    out: list[str] = []
+    for frame_no, frame in enumerate(index["frames"]):
+        f_start, f_end = frame["first_line"], frame["first_line"] + frame["lines"]
+        if f_end <= start:
+            continue
+        if f_start >= end:
+            break
+        lines = read_frame(session_name, frame_no, index)
+        out.extend(lines[max(0, start - f_start):end - f_start])
+    return out
+
+
+def iter_session_lines(session_name: str, start: int = 0, index: dict | None = None):
+    """Yield the lines of an archived session from line start on, one frame in memory at a time.
+
+    Frames that end before start are skipped without being read.
+    """
+    index = index or load_index(session_name)
+    if not index:
+        return
+    for frame_no, frame in enumerate(index["frames"]):
+        if frame["first_line"] + frame["lines"] <= start:
+            continue
+        lines = read_frame(session_name, frame_no, index)
+        yield from lines[max(0, start - frame["first_line"]):]
+
+
+def enforce_retention() -> list[str]:
+    """Delete archived sessions older than the age limit, then oldest-first until under budget.
+
+    A no-op when archiving is disabled, so existing archives are never wiped by
+    SESSION_ARCHIVE_MAX_MB=0. Returns the names of removed sessions.
+    """
+    out_dir = archive_dir()
+    if not is_enabled() or not out_dir.exists():
+        return []
+
+    entries = []
+    for archive in out_dir.glob(f"*{_ARCHIVE_SUFFIX}"):
+        name = archive.name[: -len(_ARCHIVE_SUFFIX)]
+        index = out_dir / f"{name}{_INDEX_SUFFIX}"
+        try:
+            size = archive.stat().st_size + (index.stat().st_size if index.exists() else 0)
+            mtime = archive.stat().st_mtime
+        except OSError:
+            continue
+        entries.append((mtime, name, size))
+    entries.sort()  # oldest first
+
+    max_bytes, max_age = _max_bytes(), _max_age_seconds()
+    now = time.time()
+    total = sum(size for _, _, size in entries)
+    removed = []
+    for mtime, name, size in entries:
+        too_old = max_age > 0 and now - mtime > max_age
+        if not too_old and total <= max_bytes:
+            break
+        (out_dir / f"{name}{_ARCHIVE_SUFFIX}").unlink(missing_ok=True)
+        (out_dir / f"{name}{_INDEX_SUFFIX}").unlink(missing_ok=True)
+        total -= size
+        removed.append(name)
+    if removed:
+        log.info("Session archive retention removed %d session(s): %s", len(removed), ", ".join(removed))
+    return removed
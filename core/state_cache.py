@@ -0,0 +1,138 @@
+"""Short-lived device state cache shared between the On-Call watcher and the MCP server.
+
+When an SLA Down event fires, the watcher pre-warms read-only state (OSPF neighbors,
+BGP summary, interfaces, routing table) for the failing path's devices while the
+correlation hold and agent start-up are still running. The results are stored here,
+one JSON file per (device, action, transport), so the MCP server — a separate process —
+can answer the agent's first tool calls without touching the device.
+
+Entries are single-use: take() claims an entry by renaming it, so each prefetched
+result is served at most once and every repeat call goes to the device. Entries older
+than STATE_CACHE_TTL_SECONDS are discarded, and push_config invalidates a device's
+entries so post-change verification never sees pre-change state.
+
+Environment variables (read at call time):
+  STATE_CACHE_DIR           cache directory (default: data/state_cache)
+  STATE_CACHE_TTL_SECONDS   entry lifetime in seconds; 0 disables prefetch and cache (default: 120)
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+log = logging.getLogger("ainoc.state_cache")
+
+PROJECT_DIR = Path(__file__).parent.parent
+_SUFFIX = ".json"
+
+# Set while the watcher prefetches: execute_command stores results instead of serving them.
+_recording: ContextVar[bool] = ContextVar("state_cache_recording", default=False)
+
+
+def cache_dir() -> Path:
+    return Path(os.getenv("STATE_CACHE_DIR", str(PROJECT_DIR / "data" / "state_cache")))
+
+
+def ttl_seconds() -> float:
+    return float(os.getenv("STATE_CACHE_TTL_SECONDS", "120"))
+
+
+def is_enabled() -> bool:
+    """The cache is on unless the TTL is set to 0."""
+    return ttl_seconds() > 0
+
+
+@contextmanager
+def recording():
+    """Within this context (and tasks created from it), execute_command results are stored."""
+    token = _recording.set(True)
+    try:
+        yield
+    finally:
+        _recording.reset(token)
+
+
+def is_recording() -> bool:
+    return _recording.get()
+
+
+def _action_key(action) -> str:
+    """Stable text form of a CLI string, RESTCONF dict or ActionChain."""
+    actions = getattr(action, "actions", None)  # ActionChain without importing platforms
+    if actions is not None:
+        action = {"chain": [list(tier) for tier in actions]}
+    return json.dumps(action, sort_keys=True, default=str)
+
+
+def _entry_path(device: str, action, transport: str | None) -> Path:
+    digest = hashlib.sha1(
+        f"{transport or ''}|{_action_key(action)}".encode()
+    ).hexdigest()[:20]
+    return cache_dir() / f"{device}__{digest}{_SUFFIX}"
+
+
+def store(device: str, action, transport: str | None, result: dict) -> bool:
+    """Write a successful execute_command result. Error results are never cached."""
+    if not is_enabled() or not isinstance(result, dict) or "error" in result:
+        return False
+    raw = result.get("raw")
+    if isinstance(raw, dict) and "error" in raw:
+        return False
+    try:
+        path = _entry_path(device, action, transport)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps({"stored_at": time.time(), "result": result}, default=str))
+        tmp.replace(path)
+        return True
+    except (OSError, TypeError, ValueError) as e:
+        log.debug("state cache store failed for %s: %s", device, e)
+        return False
+
+
+def take(device: str, action, transport: str | None = None) -> dict | None:
+    """Claim and return a fresh cached result, or None on miss.
+
+    The entry is removed either way — concurrent callers for the same key cannot both
+    receive it. Hits are marked with _cache_hit and _cache_age_s.
+    """
+    if not is_enabled():
+        return None
+    path = _entry_path(device, action, transport)
+    claimed = path.with_suffix(f".{uuid.uuid4().hex}.claim")
+    try:
+        os.rename(path, claimed)
+    except OSError:
+        return None  # miss (or the cache directory does not exist yet)
+    try:
+        entry = json.loads(claimed.read_text())
+    except (OSError, ValueError):
+        return None
+    finally:
+        claimed.unlink(missing_ok=True)
+
+    age = time.time() - entry.get("stored_at", 0)
+    if age > ttl_seconds() or not isinstance(entry.get("result"), dict):
+        return None
+    result = entry["result"]
+    result["_cache_hit"] = True
+    result["_cache_age_s"] = round(age, 1)
+    return result
+
+
+def invalidate(device: str | None = None) -> int:
+    """Remove cached entries for one device, or all entries when device is None."""
+    pattern = f"{device}__*{_SUFFIX}" if device else f"*{_SUFFIX}"
+    removed = 0
+    try:
+        for path in cache_dir().glob(pattern):
+            path.unlink(missing_ok=True)
+            removed += 1
+    except OSError as e:
+        log.debug("state cache invalidate failed: %s", e)
+    return removed
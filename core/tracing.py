@@ -0,0 +1,247 @@
+"""Lightweight tracing of MCP tool calls, from the tool handler down to the device round trip.
+
+Every tool call is one trace. MCPServer opens the root span around FastMCP's handling of
+the call (argument validation included); tool() wraps each handler and @traced marks
+the functions worth timing on the way down (get_action, execute_command, _execute_single,
+execute_restconf, execute_ssh, Genie parsing, the trimmers). The current span lives in a
+ContextVar, so spans nest across awaits; outside a trace span() and @traced cost one
+ContextVar lookup.
+
+When the root span ends the trace is appended as one line to TRACE_FILE in OTLP/JSON
+shape (an ExportTraceServiceRequest, as written by the OpenTelemetry file exporter),
+and the tool result carries a per-span summary under "_timings".
+
+Environment variables (read at call time):
+  TRACING     0 to disable (default: 1)
+  TRACE_FILE  JSONL export file (default: data/traces.jsonl); rotated once above 10 MB
+"""
+import contextlib
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+log = logging.getLogger("ainoc.tracing")
+
+PROJECT_DIR = Path(__file__).parent.parent
+TRACE_FILE_MAX_BYTES = 10 * 1024 * 1024
+
+# Unix-epoch nanoseconds for perf_counter readings: monotonic durations, OTLP timestamps
+_EPOCH_OFFSET_NS = time.time_ns() - time.perf_counter_ns()
+
+_STATUS_OK, _STATUS_ERROR = 1, 2  # OTLP Status.code
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: "_Trace", name: str, parent_id: str | None, attributes: dict):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: int | None = None
+        self.attributes = attributes
+        self.error: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end - self.start_ns) / 1e6
+
+
+class _Trace:
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.spans: list[Span] = []  # finished spans
+
+
+_current: ContextVar[Span | None] = ContextVar("ainoc_current_span", default=None)
+
+
+def is_enabled() -> bool:
+    return os.getenv("TRACING", "1") != "0"
+
+
+def trace_file() -> Path:
+    return Path(os.getenv("TRACE_FILE", str(PROJECT_DIR / "data" / "traces.jsonl")))
+
+
+@contextlib.contextmanager
+def _open(trace: _Trace, name: str, parent_id: str | None, attributes: dict):
+    s = Span(trace, name, parent_id, attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"[:500]
+        raise
+    finally:
+        s.end_ns = time.perf_counter_ns()
+        _current.reset(token)
+        trace.spans.append(s)
+
+
+@contextlib.contextmanager
+def start_trace(name: str, **attributes):
+    """Open a trace's root span (a child span if a trace is already active).
+
+    Yields the span, or None when tracing is disabled. The trace is exported on exit.
+    """
+    parent = _current.get()
+    if parent is not None:
+        with _open(parent.trace, name, parent.span_id, attributes) as s:
+            yield s
+        return
+    if not is_enabled():
+        yield None
+        return
+    trace = _Trace()
+    try:
+        with _open(trace, name, None, attributes) as s:
+            yield s
+    finally:
+        _export(trace)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """Open a child span of the current one. A no-op yielding None outside a trace."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    with _open(parent.trace, name, parent.span_id, attributes) as s:
+        yield s
+
+
+def annotate(**attributes) -> None:
+    """Add attributes to the current span, if any."""
+    s = _current.get()
+    if s is not None:
+        s.attributes.update(attributes)
+
+
+def set_error(message: str) -> None:
+    """Mark the current span as failed without raising (e.g. an {"error": ...} result)."""
+    s = _current.get()
+    if s is not None:
+        s.error = str(message)[:500]
+
+
+def traced(fn=None, *, name: str | None = None):
+    """Decorator: run fn (sync or async) in a child span named after it."""
+    if fn is None:
+        return functools.partial(traced, name=name)
+    span_name = name or fn.__name__
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return await fn(*args, **kwargs)
+            with span(span_name):
+                return await fn(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _current.get() is None:
+            return fn(*args, **kwargs)
+        with span(span_name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def timings(root: Span) -> dict:
+    """Summarise a trace for a tool result: total and per-name milliseconds (summed)."""
+    spans: dict[str, float] = {}
+    for s in root.trace.spans:
+        spans[s.name] = round(spans.get(s.name, 0.0) + s.duration_ms, 2)
+    return {"total_ms": round(root.duration_ms, 2), "spans": spans}
+
+
+def tool(fn):
+    """Wrap an async MCP tool handler: trace it and add "_timings" to its dict result.
+
+    Under MCPServer's root span the time since the call started (FastMCP argument
+    parsing and Pydantic validation) is recorded as a "validate_args" span; called
+    directly, the wrapper opens the trace itself.
+    """
+    tool_name = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        with contextlib.ExitStack() as stack:
+            root = _current.get()
+            if root is None:
+                root = stack.enter_context(start_trace(f"tool/{tool_name}", tool=tool_name))
+            else:
+                validate = Span(root.trace, "validate_args", root.span_id, {})
+                validate.start_ns, validate.end_ns = root.start_ns, time.perf_counter_ns()
+                root.trace.spans.append(validate)
+            with span(tool_name):
+                result = await fn(*args, **kwargs)
+            if root is not None and isinstance(result, dict):
+                result = {**result, "_timings": timings(root)}
+            return result
+
+    return wrapper
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(trace: _Trace, s: Span) -> dict:
+    entry = {
+        "traceId": trace.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(s.start_ns + _EPOCH_OFFSET_NS),
+        "endTimeUnixNano": str(s.end_ns + _EPOCH_OFFSET_NS),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+        "status": {"code": _STATUS_ERROR, "message": s.error} if s.error else {"code": _STATUS_OK},
+    }
+    if s.parent_id:
+        entry["parentSpanId"] = s.parent_id
+    return entry
+
+
+def to_otlp(trace: _Trace) -> dict:
+    """The trace as an OTLP/JSON ExportTraceServiceRequest."""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "ainoc-mcp"}}]},
+        "scopeSpans": [{
+            "scope": {"name": "ainoc.tracing"},
+            "spans": [_otlp_span(trace, s) for s in sorted(trace.spans, key=lambda s: (s.start_ns, s.parent_id is not None))],
+        }],
+    }]}
+
+
+def _export(trace: _Trace) -> None:
+    """Append the trace to TRACE_FILE. Best-effort: tracing never fails a tool call."""
+    path = trace_file()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists() and path.stat().st_size > TRACE_FILE_MAX_BYTES:
+            path.replace(path.with_name(path.name + ".1"))
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(to_otlp(trace), separators=(",", ":")) + "\n")
+    except Exception as e:
+        log.warning("Trace export to %s failed: %s", path, e)
@@ -5,43 +5,77 @@
 #!/usr/bin/env python3
 """
 aiNOC Dashboard WebSocket Bridge
-Tail-follows the watcher's stream-json NDJSON session file and broadcasts
-parsed events to connected browser clients over WebSocket.
+Tail-follows the watcher's stream-json NDJSON session files and sends parsed
+events to the browser clients subscribed to each session over WebSocket.
 Serves dashboard/index.html on the same port as the WebSocket server.
 
 Runs as a standalone always-on systemd service (oncall-dashboard.service),
 independent of the watcher. If not running, watcher operates normally.
-Communication with watcher is via filesystem only:
-  - data/dashboard_state.json  (session lifecycle: active/idle)
+Communication with watcher is local only:
+  - data/dashboard.sock        (session lifecycle pushed as Unix datagrams)
+  - data/dashboard_state.json  (same state; read on start-up and as fallback)
   - logs/.session-oncall-*.tmp (NDJSON event stream)
+  - logs/sessions/             (archived sessions, replayed on request — core/session_archive.py)
 
 Single port: DASHBOARD_PORT env var (default 5555) handles both HTTP and WebSocket.
 """
 
 import asyncio
 import collections
+import email.utils
+import gzip
+import hashlib
 import json
 import logging
 import os
+import re
+import socket
 import sys
+import time
+import zlib
 from pathlib import Path
 
-from websockets.asyncio.server import serve, broadcast as ws_broadcast
+try:
+    import brotli  # optional — enables br-encoded static assets
+    _BROTLI_AVAILABLE = True
+except ImportError:
+    _BROTLI_AVAILABLE = False
+from websockets.asyncio.server import serve
 from websockets.datastructures import Headers
 from websockets.http11 import Response
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from core import file_tail, ip_index, session_archive
+
 # ---------------------------------------------------------------------------
 # Paths and configuration
 # ---------------------------------------------------------------------------
 PROJECT_DIR = Path(__file__).parent.parent
 DASHBOARD_DIR = Path(__file__).parent
 STATE_FILE = PROJECT_DIR / "data" / "dashboard_state.json"
+STATE_SOCKET = PROJECT_DIR / "data" / "dashboard.sock"  # watcher pushes state here (oncall/watcher.py)
 STOP_FILE = PROJECT_DIR / "data" / "stop_session"
 INDEX_HTML = DASHBOARD_DIR / "index.html"
 
 PORT = int(os.getenv("DASHBOARD_PORT", "5555"))
-BUFFER_SIZE = 200          # ring buffer: max events replayed to late-joining clients
-TAIL_POLL_INTERVAL = 0.1   # seconds between file tail-follow reads
+# Replay buffer budget: approximate content size (reasoning text, tool input and output)
+# kept for late joiners; past it the oldest entries are dropped and init frames say so
+BUFFER_MAX_BYTES = int(os.getenv("DASHBOARD_BUFFER_MAX_BYTES", str(16 * 1024 * 1024)))
+TAIL_POLL_INTERVAL = 0.1   # seconds between file tail-follow reads when inotify is unavailable
+TAIL_STATE_CHECK = 1.0     # with inotify: max seconds between session-end checks while idle
+STATE_RESYNC_INTERVAL = 30.0  # with the push channel: seconds between state-file re-reads
+STATE_POLL_INTERVAL = 0.5     # without it: state-file polling interval
+# Frame coalescing: events are sent at most every DASHBOARD_FLUSH_MS (0 = one frame per
+# event), or as soon as DASHBOARD_FRAME_MAX_BYTES of payload is pending
+FLUSH_INTERVAL = max(0, int(os.getenv("DASHBOARD_FLUSH_MS", "30"))) / 1000
+FRAME_MAX_BYTES = int(os.getenv("DASHBOARD_FRAME_MAX_BYTES", str(64 * 1024)))
+# Per-client send queue: frames behind a slow client are merged at send time; past
+# CLIENT_QUEUE_FRAMES / CLIENT_QUEUE_BYTES they are dropped and the client is resynced
+# with an init snapshot; a client lagging more than CLIENT_MAX_LAG seconds is disconnected
+CLIENT_QUEUE_FRAMES = int(os.getenv("DASHBOARD_CLIENT_QUEUE_FRAMES", "256"))
+CLIENT_QUEUE_BYTES = int(os.getenv("DASHBOARD_CLIENT_QUEUE_BYTES", str(1024 * 1024)))
+CLIENT_MAX_LAG = float(os.getenv("DASHBOARD_CLIENT_MAX_LAG_SECONDS", "30"))
+REPLAY_TICK = 0.05  # archived-session replay: shortest pause worth sleeping for / max frame hold
 
 # ---------------------------------------------------------------------------
 # Logging
@@ -58,13 +92,20 @@ logging.getLogger("websockets.server").setLevel(logging.WARNING)
 # ---------------------------------------------------------------------------
 # Shared state (module-level — all coroutines run in one event loop)
 # ---------------------------------------------------------------------------
-CLIENTS: set = set()
-EVENT_BUFFER: collections.deque = collections.deque(maxlen=BUFFER_SIZE)
-SESSION_STATE: dict = {"state": "idle"}
+CLIENTS: dict = {}  # websocket → _Client
+CHANNELS: dict = {}  # session name → _Channel, in start order (one per live session)
+SESSION_STATE: dict = {"state": "idle"}  # newest live session — what following clients show
 
 # Pending tool inputs keyed by content-block index — accumulated input_json_delta chunks
+# (default parse state of parse_ndjson_line; each channel keeps its own)
 _tool_inputs: dict[int, dict] = {}
 
+# Frame coalescer: UI events waiting for the next flush, and send counters
+_pending: list[dict] = []
+_pending_bytes = 0
+_flush_handle: asyncio.TimerHandle | None = None
+FRAME_STATS: dict = {"events": 0, "frames": 0, "bytes": 0}
+
 
 # ---------------------------------------------------------------------------
 # Event parsing — raw stream_event NDJSON → simplified UI events
@@ -81,7 +122,17 @@ def _strip_tool_prefix(name: str) -> tuple[str, bool]:
 
 
 
-def parse_ndjson_line(raw: str) -> list[dict]:
+def _host_labels(text: str) -> dict[str, str]:
+    """{ip: "E1C GigabitEthernet2"} for addresses in a tool result.
+
+    Uses the IP index the watcher writes to data/ip_index.json (core/ip_index.py);
+    returns {} when the watcher has not written it yet.
+    """
+    index = ip_index.load_index()
+    return index.annotate(text) if index else {}
+
+
+def parse_ndjson_line(raw: str, tool_inputs: dict | None = None) -> list[dict]:
     """Parse one NDJSON line from stream-json output into zero or more UI events.
 
     Claude CLI stream-json format:
@@ -90,8 +141,13 @@ def parse_ndjson_line(raw: str) -> list[dict]:
       {"type": "assistant", ...}                                -- final message envelope
       {"type": "system", ...}                                   -- system prompt info
 
+    tool_inputs holds the partial tool-use blocks of the stream being parsed; it defaults
+    to the module's (_tool_inputs); channels and archive replays pass their own.
+
     Returns a list of UI event dicts (may be empty for events we don't surface).
     """
+    if tool_inputs is None:
+        tool_inputs = _tool_inputs
     try:
         obj = json.loads(raw)
     except (json.JSONDecodeError, ValueError):
@@ -126,9 +182,9 @@ def parse_ndjson_line(raw: str) -> list[dict]:
             # Accumulate tool input JSON chunks keyed by content-block index
             idx = ev.get("index", -1)
             partial = delta.get("partial_json", "")
-            if idx not in _tool_inputs:
-                _tool_inputs[idx] = {"json_buf": "", "id": None, "name": None}
-            _tool_inputs[idx]["json_buf"] += partial
+            if idx not in tool_inputs:
+                tool_inputs[idx] = {"json_buf": "", "id": None, "name": None}
+            tool_inputs[idx]["json_buf"] += partial
 
     # -- Tool call starts -----------------------------------------------
     elif ev_type == "content_block_start":
@@ -137,7 +193,7 @@ def parse_ndjson_line(raw: str) -> list[dict]:
             idx = ev.get("index", -1)
             tool_id = cb.get("id", "")
             name, is_mcp = _strip_tool_prefix(cb.get("name", ""))
-            _tool_inputs[idx] = {"json_buf": "", "id": tool_id, "name": name, "is_mcp": is_mcp}
+            tool_inputs[idx] = {"json_buf": "", "id": tool_id, "name": name, "is_mcp": is_mcp}
             return [{"ui_type": "tool_start", "tool": name, "id": tool_id, "is_mcp": is_mcp}]
 
         elif cb.get("type") == "tool_result":
@@ -149,13 +205,17 @@ def parse_ndjson_line(raw: str) -> list[dict]:
                 content = " ".join(
                     c.get("text", "") for c in content if isinstance(c, dict)
                 )
-            return [{"ui_type": "tool_result", "id": tool_use_id, "output": str(content)}]
+            result = {"ui_type": "tool_result", "id": tool_use_id, "output": str(content)}
+            hosts = _host_labels(result["output"])
+            if hosts:
+                result["hosts"] = hosts
+            return [result]
 
     # -- Tool call complete (emit full input) ---------------------------
     elif ev_type == "content_block_stop":
         idx = ev.get("index", -1)
-        if idx in _tool_inputs:
-            entry = _tool_inputs.pop(idx)
+        if idx in tool_inputs:
+            entry = tool_inputs.pop(idx)
             if entry.get("id"):  # was a tool_use block (not text)
                 try:
                     input_obj = json.loads(entry["json_buf"]) if entry["json_buf"] else {}
@@ -173,134 +233,401 @@ def parse_ndjson_line(raw: str) -> list[dict]:
 
 
 # ---------------------------------------------------------------------------
-# Session file tail-follower
+# Replay buffer — compacted session history for late-joining clients
 # ---------------------------------------------------------------------------
 
-async def _tail_session_file(path: Path) -> None:
-    """Async tail-follow a session NDJSON file and broadcast parsed events."""
-    log.info("Tail-following session file: %s", path)
-    # Wait for file to appear (race condition: state file written before file created)
-    for _ in range(50):  # up to 5 seconds
-        if path.exists():
-            break
-        await asyncio.sleep(0.1)
-    else:
-        log.warning("Session file never appeared: %s", path)
-        return
+_TOOL_EVENTS = ("tool_start", "tool_input_complete", "tool_result")
+
+
+class _ReplayBuffer:
+    """The session so far, compacted: one entry per reasoning paragraph and per tool call.
+
+    Consecutive reasoning deltas are merged into one paragraph; tool_start,
+    tool_input_complete and tool_result are collapsed into a single entry per tool id.
+    events() expands it back into the UI event types index.html already handles, so a
+    late joiner gets the session in its init frame. Content is bounded by
+    BUFFER_MAX_BYTES: past it the oldest entries are dropped and counted in
+    `truncated`, which the init frame reports.
+    """
+
+    def __init__(self):
+        self._entries: list[dict] = []
+        self._tools: dict[str, dict] = {}
+        self._bytes = 0
+        self.truncated = 0  # entries dropped from the front of the session
+
+    def append(self, event: dict) -> None:
+        ui_type = event.get("ui_type")
+        if ui_type == "reasoning":
+            last = self._entries[-1] if self._entries else None
+            if last is not None and last.get("ui_type") == "reasoning":
+                text = event.get("text", "")
+                last["text"] += text
+                self._bytes += len(text)
+                self._trim()
+                return
+            self._add({"ui_type": "reasoning", "text": event.get("text", "")})
+        elif ui_type in _TOOL_EVENTS and event.get("id"):
+            entry = self._tools.get(event["id"])
+            if entry is None:
+                entry = {"ui_type": "tool", "id": event["id"]}
+                self._tools[event["id"]] = entry
+                self._add(entry)
+            before = _entry_bytes(entry)
+            for key in ("tool", "is_mcp", "input", "output", "hosts"):
+                if key in event:
+                    entry[key] = event[key]
+            self._bytes += _entry_bytes(entry) - before
+            self._trim()
+        else:
+            self._add(dict(event))
+
+    def _add(self, entry: dict) -> None:
+        self._entries.append(entry)
+        self._bytes += _entry_bytes(entry)
+        self._trim()
+
+    def _trim(self) -> None:
+        """Drop the oldest entries while over budget (the newest one always stays)."""
+        while self._bytes > BUFFER_MAX_BYTES and len(self._entries) > 1:
+            dropped = self._entries.pop(0)
+            self._bytes -= _entry_bytes(dropped)
+            self.truncated += 1
+            if dropped.get("ui_type") == "tool":
+                self._tools.pop(dropped["id"], None)
+
+    def events(self) -> list[dict]:
+        """The compacted history as UI events, in session order."""
+        out = []
+        for entry in self._entries:
+            if entry.get("ui_type") != "tool":
+                out.append(dict(entry))
+                continue
+            tool = {"tool": entry.get("tool", ""), "id": entry["id"], "is_mcp": entry.get("is_mcp", False)}
+            out.append({"ui_type": "tool_start", **tool})
+            if "input" in entry:
+                out.append({"ui_type": "tool_input_complete", **tool, "input": entry["input"]})
+            if "output" in entry:
+                result = {"ui_type": "tool_result", "id": entry["id"], "output": entry["output"]}
+                if "hosts" in entry:
+                    result["hosts"] = entry["hosts"]
+                out.append(result)
+        return out
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tools.clear()
+        self._bytes = 0
+        self.truncated = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _entry_bytes(entry: dict) -> int:
+    """Approximate size of a buffer entry: string lengths, other values as JSON."""
+    return sum(len(v) if isinstance(v, str) else len(json.dumps(v, default=str)) for v in entry.values())
+
+
+# ---------------------------------------------------------------------------
+# Live session channels — one per session the watcher reports as running
+# ---------------------------------------------------------------------------
+
+class _Channel:
+    """One live session: its watcher state, subscribed clients and, while anyone is
+    subscribed, a tail of its NDJSON file.
+
+    The first subscriber starts the tail from the top of the file, so the replay buffer
+    is rebuilt from disk; when the last one leaves the tail is stopped and the buffer
+    dropped. A session nobody is watching costs nothing but its state.
+    """
+
+    def __init__(self, state: dict):
+        self.name = state["session_name"]
+        self.state = state
+        self.subscribers: set = set()  # _Client
+        self.buffer = _ReplayBuffer()
+        self.tool_inputs: dict[int, dict] = {}  # parse state of this session's stream
+        self.tail: asyncio.Task | None = None
+        self.generation = 0  # bumped when the tail stops — queued lines of older tails are dropped
+        self.ended = False  # the watcher reported the session finished
+        self.drained = asyncio.Event()  # the parse worker has handled the tail's last lines
+
+    def summary(self) -> dict:
+        return {**self.state, "subscribers": len(self.subscribers)}
 
-    _tool_inputs.clear()
-    position = 0
 
+_parser: tuple[asyncio.Queue, asyncio.Task] | None = None
+
+
+def _parse_queue() -> asyncio.Queue:
+    """Queue of (channel, generation, lines) read by the tails, parsed by one shared worker.
+
+    lines=None marks the end of a tail. The worker is started on first use.
+    """
+    global _parser
+    loop = asyncio.get_running_loop()
+    if _parser is None or _parser[1].done() or _parser[1].get_loop() is not loop:
+        queue: asyncio.Queue = asyncio.Queue()
+        _parser = (queue, loop.create_task(_parse_worker(queue)))
+    return _parser[0]
+
+
+async def _parse_worker(queue: asyncio.Queue) -> None:
+    """Parse tailed NDJSON lines of every channel, broadcast the UI events and buffer them."""
     while True:
-        # Check if session ended (state flipped to idle)
-        if SESSION_STATE.get("state") != "active":
-            # Drain any remaining lines before stopping
-            try:
-                with open(path, errors="replace") as fh:
-                    fh.seek(position)
-                    remainder = fh.read()
-                for line in remainder.splitlines():
-                    line = line.strip()
-                    if line:
-                        for ui_event in parse_ndjson_line(line):
-                            await _broadcast(ui_event)
-                            EVENT_BUFFER.append(ui_event)
-            except Exception:
-                pass
-            log.info("Session ended — stopping tail")
+        channel, generation, lines = await queue.get()
+        if generation != channel.generation:
+            continue
+        if lines is None:
+            channel.drained.set()
+            continue
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            for ui_event in parse_ndjson_line(line, channel.tool_inputs):
+                ui_event["session"] = channel.name
+                await _broadcast(ui_event)
+                channel.buffer.append(ui_event)
+
+
+async def _tail_session_file(channel: _Channel, lines_queue: asyncio.Queue) -> None:
+    """Async tail-follow a channel's session file, handing new lines to the parse worker.
+
+    Keeps one open handle (file_tail.LineReader) and sleeps until inotify reports a
+    write, so an idle session costs no reads; falls back to TAIL_POLL_INTERVAL polling
+    where inotify is unavailable. Stops after draining the file once the channel ends.
+    """
+    path = Path(channel.state["session_file"])
+    generation = channel.generation
+    log.info("Tail-following session file: %s", path)
+    loop = asyncio.get_running_loop()
+    notify_fd = None
+    try:
+        # Wait for file to appear (race condition: state written before file created)
+        for _ in range(50):  # up to 5 seconds
+            if path.exists():
+                break
+            await asyncio.sleep(0.1)
+        else:
+            log.warning("Session file never appeared: %s", path)
             return
 
-        try:
-            with open(path, errors="replace") as fh:
-                fh.seek(position)
-                new_text = fh.read()
-        except FileNotFoundError:
-            await asyncio.sleep(TAIL_POLL_INTERVAL)
-            continue
-        if new_text:
-            lines = new_text.split("\n")
-            # If text doesn't end in newline, last item is a partial line — hold it
-            if not new_text.endswith("\n"):
-                lines_to_process = lines[:-1]
-                consumed = len("\n".join(lines_to_process))
-                if lines_to_process:
-                    consumed += 1  # trailing newline of the last complete line
-            else:
-                lines_to_process = lines[:-1]  # trailing empty string after final \n
-                consumed = len(new_text)
+        modified = asyncio.Event()
+        notify_fd = file_tail.inotify_open(path)
+        if notify_fd is not None:
+            loop.add_reader(notify_fd, modified.set)
+        else:
+            log.info("inotify unavailable — polling session file every %.0f ms", TAIL_POLL_INTERVAL * 1000)
+
+        with file_tail.LineReader(path) as reader:
+            while True:
+                if channel.ended:
+                    # Drain any remaining lines (including an unterminated last one) before stopping
+                    try:
+                        lines_queue.put_nowait((channel, generation, reader.read_lines(final=True)))
+                    except OSError:
+                        pass
+                    log.info("Session %s ended — stopping tail", channel.name)
+                    return
 
-            for line in lines_to_process:
-                line = line.strip()
-                if not line:
+                lines = reader.read_lines()
+                if lines:
+                    lines_queue.put_nowait((channel, generation, lines))
+
+                if notify_fd is None:
+                    await asyncio.sleep(TAIL_POLL_INTERVAL)
                     continue
-                for ui_event in parse_ndjson_line(line):
-                    await _broadcast(ui_event)
-                    EVENT_BUFFER.append(ui_event)
+                try:
+                    await asyncio.wait_for(modified.wait(), timeout=TAIL_STATE_CHECK)
+                except asyncio.TimeoutError:
+                    pass
+                modified.clear()
+                file_tail.inotify_drain(notify_fd)
+    except OSError as e:
+        log.warning("Could not tail session file %s: %s", path, e)
+    finally:
+        lines_queue.put_nowait((channel, generation, None))
+        if notify_fd is not None:
+            loop.remove_reader(notify_fd)
+            os.close(notify_fd)
 
-            position += consumed
 
-        await asyncio.sleep(TAIL_POLL_INTERVAL)
+def _newest_channel() -> _Channel | None:
+    return next(reversed(CHANNELS.values()), None)
+
+
+def _subscribe(client: "_Client", channel: _Channel, resync: bool = True) -> None:
+    """Point a client at a channel, starting its tail if it is the first subscriber.
+
+    With resync the client is sent a fresh init snapshot of the channel.
+    """
+    if client.channel != channel.name:
+        _unsubscribe(client)
+        client.channel = channel.name
+        channel.subscribers.add(client)
+        if channel.tail is None and not channel.ended and channel.state.get("session_file"):
+            channel.tail = asyncio.get_running_loop().create_task(_tail_session_file(channel, _parse_queue()))
+    if resync:
+        client.resync = True
+        client.wakeup.set()
+
+
+def _unsubscribe(client: "_Client") -> None:
+    """Remove a client from its channel; the last one out stops the tail and drops the buffer."""
+    channel = CHANNELS.get(client.channel)
+    client.channel = None
+    if channel is None:
+        return
+    channel.subscribers.discard(client)
+    if not channel.subscribers and not channel.ended and channel.tail is not None:
+        channel.tail.cancel()
+        channel.tail = None
+        channel.generation += 1
+        channel.buffer.clear()
+        channel.tool_inputs.clear()
+        log.info("No subscribers left on %s — tail stopped", channel.name)
+
+
+async def _end_channel(channel: _Channel) -> None:
+    """Let the channel's tail drain its last lines, then tell its subscribers and drop it."""
+    channel.ended = True
+    tail = channel.tail
+    if tail is not None and not tail.done():
+        # The tail sees channel.ended within TAIL_STATE_CHECK
+        await asyncio.wait({tail}, timeout=TAIL_STATE_CHECK + 1)
+        tail.cancel()
+        try:
+            await asyncio.wait_for(channel.drained.wait(), timeout=1)
+        except asyncio.TimeoutError:
+            pass
+    await _broadcast({"ui_type": "session_idle", "session": channel.name})
+    CHANNELS.pop(channel.name, None)
 
 
 # ---------------------------------------------------------------------------
 # Session state watcher
 # ---------------------------------------------------------------------------
 
-async def watch_state_file() -> None:
-    """Poll data/dashboard_state.json and manage the session tail-follow task."""
+def _read_state_file() -> dict:
+    """Last watcher state message from data/dashboard_state.json (idle if missing or unreadable)."""
+    try:
+        return json.loads(STATE_FILE.read_text())
+    except (FileNotFoundError, json.JSONDecodeError, OSError):
+        return {"state": "idle"}
+
+
+def _live_sessions(message: dict) -> dict[str, dict]:
+    """{session_name: state} for the sessions a watcher state message reports as running.
+
+    Messages carry every live session under "sessions"; one without it (an older
+    watcher) describes a single session.
+    """
+    states = message.get("sessions")
+    if not isinstance(states, list):
+        states = [message]
+    return {
+        state["session_name"]: state for state in states
+        if isinstance(state, dict) and state.get("state") == "active" and state.get("session_name")
+    }
+
+
+async def _apply_sessions(live: dict[str, dict]) -> None:
+    """Reconcile CHANNELS with the live sessions: end, start and update channels."""
     global SESSION_STATE
-    tail_task: asyncio.Task | None = None
-    last_session_name = None
+    ended = [channel for name, channel in CHANNELS.items() if name not in live]
+    changed = bool(ended)
+    if ended:
+        await asyncio.gather(*(_end_channel(channel) for channel in ended))
+        log.info(
+            "Frames sent so far: %d events in %d frames (%d bytes)",
+            FRAME_STATS["events"], FRAME_STATS["frames"], FRAME_STATS["bytes"],
+        )
+
+    for name, state in live.items():
+        channel = CHANNELS.get(name)
+        if channel is None:
+            # New session — following clients move to it before its first event
+            channel = CHANNELS[name] = _Channel(state)
+            for client in list(CLIENTS.values()):
+                if client.follow:
+                    _subscribe(client, channel, resync=False)
+            await _broadcast({"ui_type": "session_start", **state, "session": name})
+            changed = True
+        elif state != channel.state:
+            # Same session, new metadata (e.g. Jira key arriving after agent launch)
+            channel.state = state
+            await _broadcast({"ui_type": "session_update", **state, "session": name})
+            changed = True
+
+    newest = _newest_channel()
+    SESSION_STATE = newest.state if newest else {"state": "idle"}
+    if changed:
+        await _broadcast({"ui_type": "sessions", "sessions": [c.summary() for c in CHANNELS.values()]})
+
+
+def _open_state_socket() -> socket.socket | None:
+    """Bind the Unix datagram socket the watcher pushes state to. None if it cannot be bound."""
+    try:
+        STATE_SOCKET.parent.mkdir(exist_ok=True)
+        STATE_SOCKET.unlink(missing_ok=True)  # stale socket from a previous run
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(STATE_SOCKET))
+        sock.setblocking(False)
+        return sock
+    except OSError as e:
+        log.warning("State push channel unavailable (%s) — polling %s", e, STATE_FILE)
+        return None
+
 
-    log.info("Watching state file: %s", STATE_FILE)
+def _receive_states(sock: socket.socket, updates: asyncio.Queue) -> None:
+    """Reader callback: queue every state datagram waiting on the socket."""
     while True:
         try:
-            raw = STATE_FILE.read_text()
-            state = json.loads(raw)
-        except FileNotFoundError:
-            state = {"state": "idle"}
-        except (json.JSONDecodeError, OSError):
-            state = {"state": "idle"}
-
-        state_changed = state != SESSION_STATE
-        SESSION_STATE = state
-
-        if state.get("state") == "active":
-            session_name = state.get("session_name")
-            if session_name != last_session_name:
-                # New session started — cancel any previous tail task
-                if tail_task and not tail_task.done():
-                    tail_task.cancel()
-                    try:
-                        await tail_task
-                    except asyncio.CancelledError:
-                        pass
+            data = sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        try:
+            state = json.loads(data)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+        if isinstance(state, dict):
+            updates.put_nowait(state)
 
-                last_session_name = session_name
-                EVENT_BUFFER.clear()
-                _tool_inputs.clear()
 
-                # Notify clients of new session
-                await _broadcast({"ui_type": "session_start", **state})
+async def watch_state_file() -> None:
+    """Follow the watcher's session state and keep one channel per live session.
 
-                session_file = state.get("session_file")
-                if session_file:
-                    tail_task = asyncio.create_task(
-                        _tail_session_file(Path(session_file))
-                    )
+    State is pushed by the watcher over STATE_SOCKET; the state file is read on start-up
+    (sessions may already be running) and re-read every STATE_RESYNC_INTERVAL seconds
+    as a fallback. If the socket cannot be bound the file is polled every
+    STATE_POLL_INTERVAL seconds instead.
+    """
+    loop = asyncio.get_running_loop()
+    updates: asyncio.Queue = asyncio.Queue()
+    sock = _open_state_socket()
+    if sock is not None:
+        loop.add_reader(sock.fileno(), _receive_states, sock, updates)
+        log.info("Receiving session state on %s (fallback: %s)", STATE_SOCKET, STATE_FILE)
+    else:
+        log.info("Watching state file: %s", STATE_FILE)
+    wait = STATE_RESYNC_INTERVAL if sock is not None else STATE_POLL_INTERVAL
 
-        elif state_changed and state.get("state") == "idle":
-            # Session ended — notify clients
-            last_session_name = None
-            if tail_task and not tail_task.done():
-                tail_task.cancel()
-                try:
-                    await tail_task
-                except asyncio.CancelledError:
-                    pass
-            await _broadcast({"ui_type": "session_idle"})
+    state = _read_state_file()
+    try:
+        while True:
+            await _apply_sessions(_live_sessions(state))
 
-        await asyncio.sleep(0.5)  # poll state file every 500ms
+            try:
+                state = await asyncio.wait_for(updates.get(), timeout=wait)
+            except asyncio.TimeoutError:
+                state = _read_state_file()
+    finally:
+        if sock is not None:
+            loop.remove_reader(sock.fileno())
+            sock.close()
+            STATE_SOCKET.unlink(missing_ok=True)
 
 
 # ---------------------------------------------------------------------------
@@ -317,12 +644,405 @@ def _write_stop_sentinel() -> None:
         log.warning("Could not write stop sentinel: %s", e)
 
 
+class _Client:
+    """Bounded send queue and lag counters for one WebSocket client.
+
+    Frames are shared strings (encoded once in _flush_frames), so a client costs at
+    most CLIENT_QUEUE_FRAMES references / CLIENT_QUEUE_BYTES regardless of stream rate.
+    """
+
+    def __init__(self, websocket):
+        self.ws = websocket
+        remote = websocket.remote_address
+        self.remote = ":".join(map(str, remote[:2])) if isinstance(remote, tuple) else str(remote)
+        self.queue: collections.deque = collections.deque()  # (enqueued_at, frame)
+        self.queued_bytes = 0
+        self.resync = True  # first send is the init snapshot
+        self.busy_since: float | None = None  # start of the send in progress
+        self.wakeup = asyncio.Event()
+        self.closing = False
+        self.channel: str | None = None  # live session subscribed to
+        self.follow = True  # move to each new session as it starts
+        self.replay: asyncio.Task | None = None  # archived-session replay; live frames withheld while set
+        self.replay_speed = 1.0
+        self.stats = {"frames": 0, "bytes": 0, "dropped_frames": 0, "resyncs": 0, "max_lag_ms": 0}
+
+    def lag(self, now: float | None = None) -> float:
+        """Seconds the oldest undelivered frame (or the send in progress) has been waiting."""
+        now = time.monotonic() if now is None else now
+        oldest = [t for t in (self.busy_since, self.queue[0][0] if self.queue else None) if t is not None]
+        return now - min(oldest) if oldest else 0.0
+
+    def enqueue(self, frame: str) -> None:
+        if self.closing:
+            return
+        now = time.monotonic()
+        if self.lag(now) > CLIENT_MAX_LAG:
+            log.warning("Dashboard client %s lagging %.1fs — disconnecting", self.remote, self.lag(now))
+            self.closing = True
+            asyncio.get_running_loop().create_task(self.ws.close(1013, "client too slow"))
+            return
+        self.queue.append((now, frame))
+        self.queued_bytes += len(frame)
+        if len(self.queue) > CLIENT_QUEUE_FRAMES or self.queued_bytes > CLIENT_QUEUE_BYTES:
+            # Too far behind: drop what is queued and send a fresh snapshot instead
+            self.stats["dropped_frames"] += len(self.queue)
+            self.queue.clear()
+            self.queued_bytes = 0
+            self.resync = True
+        self.wakeup.set()
+
+    def take_frame(self) -> str:
+        """Pop every queued frame as one message (nested frames are unpacked by index.html)."""
+        frames = [frame for _, frame in self.queue]
+        self.queue.clear()
+        self.queued_bytes = 0
+        if len(frames) == 1:
+            return frames[0]
+        return '{"ui_type": "batch", "events": [' + ", ".join(frames) + "]}"
+
+    def snapshot(self) -> dict:
+        return {
+            "remote": self.remote,
+            "queued_frames": len(self.queue),
+            "queued_bytes": self.queued_bytes,
+            "lag_ms": round(self.lag() * 1000),
+            "channel": self.channel,
+            "follow": self.follow,
+            "replaying": self.replay is not None,
+            **self.stats,
+        }
+
+
+def _init_message(client: _Client) -> str:
+    """The client's session state + buffered events (late joiners, resyncs, channel switches)."""
+    channel = CHANNELS.get(client.channel)
+    return json.dumps({
+        "ui_type": "init",
+        "session": client.channel,
+        "state": channel.state if channel else {"state": "idle"},
+        "buffer": channel.buffer.events() if channel else [],
+        "truncated": channel.buffer.truncated if channel else 0,
+        "sessions": [c.summary() for c in CHANNELS.values()],
+    })
+
+
+async def _client_sender(client: _Client) -> None:
+    """Deliver a client's queued frames one send at a time (merging whatever piled up)."""
+    while True:
+        await client.wakeup.wait()
+        client.wakeup.clear()
+        while client.queue or client.resync:
+            if client.resync:
+                # The snapshot covers everything queued and everything still pending
+                client.resync = False
+                _flush_frames()
+                client.queue.clear()
+                client.queued_bytes = 0
+                client.stats["resyncs"] += 1
+                msg = _init_message(client)
+            else:
+                client.stats["max_lag_ms"] = max(client.stats["max_lag_ms"], round(client.lag() * 1000))
+                msg = client.take_frame()
+            client.busy_since = time.monotonic()
+            try:
+                await client.ws.send(msg)
+            finally:
+                client.busy_since = None
+            client.stats["frames"] += 1
+            client.stats["bytes"] += len(msg)
+
+
 async def _broadcast(event: dict) -> None:
-    """Send a UI event to all connected WebSocket clients."""
+    """Queue a UI event for the connected WebSocket clients.
+
+    An event tagged with "session" goes to that session's subscribers only; untagged
+    events (the session list) go to every client.
+
+    Events are coalesced into one frame per FLUSH_INTERVAL: consecutive reasoning
+    deltas are merged into a single reasoning event, and several events go out as
+    {"ui_type": "batch", "events": [...]}. The frame is flushed early once
+    FRAME_MAX_BYTES of payload is pending.
+    """
+    global _pending_bytes, _flush_handle
     if not CLIENTS:
         return
-    msg = json.dumps(event)
-    ws_broadcast(CLIENTS, msg)
+    FRAME_STATS["events"] += 1
+    last = _pending[-1] if _pending else None
+    if (event.get("ui_type") == "reasoning" and last and last.get("ui_type") == "reasoning"
+            and last.get("session") == event.get("session")):
+        # New dict — the caller keeps its reference to the previous event
+        _pending[-1] = {**last, "text": last["text"] + event["text"]}
+        _pending_bytes += len(event["text"])
+    else:
+        _pending.append(event)
+        _pending_bytes += len(event["text"]) if event.get("ui_type") == "reasoning" else len(json.dumps(event))
+
+    if FLUSH_INTERVAL <= 0 or _pending_bytes >= FRAME_MAX_BYTES:
+        _flush_frames()
+    elif _flush_handle is None:
+        _flush_handle = asyncio.get_running_loop().call_later(FLUSH_INTERVAL, _flush_frames)
+
+
+def _flush_frames() -> None:
+    """Send the pending events as one WebSocket frame per channel (encoded once each)."""
+    global _pending_bytes, _flush_handle
+    if _flush_handle is not None:
+        _flush_handle.cancel()
+        _flush_handle = None
+    if not _pending:
+        return
+    pending = list(_pending)
+    _pending.clear()
+    _pending_bytes = 0
+    frames: dict = {}  # channel → encoded frame (None: nothing for it)
+    for client in list(CLIENTS.values()):
+        if client.replay is not None:
+            continue
+        if client.channel not in frames:
+            events = [e for e in pending if e.get("session") in (None, client.channel)]
+            msg = None
+            if events:
+                msg = json.dumps(events[0] if len(events) == 1 else {"ui_type": "batch", "events": events})
+                FRAME_STATS["frames"] += 1
+                FRAME_STATS["bytes"] += len(msg)
+            frames[client.channel] = msg
+        if frames[client.channel] is not None:
+            client.enqueue(frames[client.channel])
+
+
+# ---------------------------------------------------------------------------
+# Archived session replay — history browser (logs/sessions, core/session_archive.py)
+# ---------------------------------------------------------------------------
+
+_SESSION_NAME_RE = re.compile(r"[\w.-]+")
+
+
+def _list_archived_sessions() -> list[dict]:
+    """Archived session indexes for the history browser, newest first."""
+    sessions = session_archive.list_sessions()
+    for index in sessions:
+        index["tool_calls"] = [
+            {"name": _strip_tool_prefix(call.get("name", ""))[0], "line": call.get("line", 0)}
+            for call in index.get("tool_calls", [])
+        ]
+    return sessions
+
+
+def _replay_start_line(index: dict, request: dict) -> int:
+    """First line to replay: the request's tool_index-th tool call, else its line (default 0)."""
+    if request.get("tool_index") is not None:
+        calls = index.get("tool_calls", [])
+        n = int(request["tool_index"])
+        if not 0 <= n < len(calls):
+            raise ValueError(f"tool call {n} out of range ({len(calls)} in session)")
+        return calls[n]["line"]
+    line = int(request.get("line") or 0)
+    if not 0 <= line < max(1, index.get("line_count", 0)):
+        raise ValueError(f"line {line} out of range ({index.get('line_count', 0)} in session)")
+    return line
+
+
+async def _replay_session(client: "_Client", index: dict, start: int) -> None:
+    """Stream an archived session to one client from line start, paced by client.replay_speed.
+
+    stream-json lines carry no timestamps, so lines are spread evenly over the recorded
+    duration_s: speed 1 takes as long as the original session, 0 sends as fast as the
+    client drains. Only one archive frame is inflated at a time; events are parsed with
+    their own tool-input state and sent as {"ui_type": "replay_batch"} frames.
+    """
+    name = index["session_name"]
+    total = index.get("line_count", 0)
+    interval = index["duration_s"] / total if index.get("duration_s") and total else 0.0
+    loop = asyncio.get_running_loop()
+    tool_inputs: dict = {}
+    events: list[dict] = []
+    size = 0
+    line_no = start
+    speed = None
+    anchor_time = last_send = loop.time()
+    anchor_line = start
+
+    async def _send() -> None:
+        nonlocal events, size, last_send
+        client.enqueue(json.dumps({"ui_type": "replay_batch", "session": name, "line": line_no, "events": events}))
+        events, size, last_send = [], 0, loop.time()
+        # Stay well inside the client's queue limits rather than trigger a resync
+        while len(client.queue) >= CLIENT_QUEUE_FRAMES // 2 or client.queued_bytes >= CLIENT_QUEUE_BYTES // 2:
+            await asyncio.sleep(REPLAY_TICK)
+        await asyncio.sleep(0)
+
+    meta = {k: v for k, v in index.items() if k not in ("frames", "tool_calls")}
+    client.enqueue(json.dumps({"ui_type": "replay_start", "session": name, "line": start, "meta": meta}))
+    try:
+        for line in session_archive.iter_session_lines(name, start, index):
+            if client.replay_speed != speed:
+                # (Re-)anchor the pacing clock so a speed change applies from here on
+                speed, anchor_time, anchor_line = client.replay_speed, loop.time(), line_no
+            for event in parse_ndjson_line(line, tool_inputs):
+                if event.get("ui_type") == "reasoning" and events and events[-1].get("ui_type") == "reasoning":
+                    events[-1] = {"ui_type": "reasoning", "text": events[-1]["text"] + event["text"]}
+                    size += len(event["text"])
+                else:
+                    events.append(event)
+                    size += len(json.dumps(event))
+            line_no += 1
+
+            now = loop.time()
+            delay = anchor_time + (line_no - anchor_line) * interval / speed - now if speed and interval else 0.0
+            if events and (delay >= REPLAY_TICK or size >= FRAME_MAX_BYTES or now - last_send >= REPLAY_TICK):
+                await _send()
+            if delay >= REPLAY_TICK:
+                await asyncio.sleep(delay)
+        if events:
+            await _send()
+    except (OSError, EOFError, ValueError, zlib.error) as e:  # missing or corrupt archive
+        log.warning("Replay of %s failed at line %d: %s", name, line_no, e)
+        client.enqueue(json.dumps({"ui_type": "replay_error", "session": name, "error": str(e)}))
+        return
+    client.enqueue(json.dumps({"ui_type": "replay_end", "session": name, "line": line_no}))
+
+
+def _start_replay(client: "_Client", request: dict) -> None:
+    """Handle {"action": "replay", "session", "line" | "tool_index", "speed"} from a client."""
+    name = str(request.get("session", ""))
+    index = session_archive.load_index(name) if _SESSION_NAME_RE.fullmatch(name) else None
+    try:
+        if index is None:
+            raise ValueError("unknown session")
+        start = _replay_start_line(index, request)
+        speed = max(0.0, float(request.get("speed", 1)))
+    except (TypeError, ValueError) as e:
+        client.enqueue(json.dumps({"ui_type": "replay_error", "session": name, "error": str(e)}))
+        return
+    if client.replay is not None:
+        client.replay.cancel()
+    # Live frames not yet sent are superseded by the replay (and by the resync after it)
+    client.queue.clear()
+    client.queued_bytes = 0
+    client.replay_speed = speed
+    client.replay = asyncio.get_running_loop().create_task(_replay_session(client, index, start))
+    log.info("Client %s replaying %s from line %d at %sx", client.remote, name, start, speed or "max")
+
+
+def _stop_replay(client: "_Client") -> None:
+    """Return a client to the live session: cancel its replay and resend the init snapshot."""
+    if client.replay is None:
+        return
+    client.replay.cancel()
+    client.replay = None
+    client.resync = True
+    client.wakeup.set()
+
+
+# ---------------------------------------------------------------------------
+# Static assets — held in memory pre-compressed, revalidated with ETag /
+# Last-Modified so refreshing NOC screens mostly get a 304
+# ---------------------------------------------------------------------------
+
+class _StaticAsset:
+    """A dashboard file cached with its gzip (and br, if brotli is installed) encodings.
+
+    The file is re-read only when its mtime or size changes (one stat per request).
+    """
+
+    def __init__(self, path: Path, content_type: str):
+        self.path = path
+        self.content_type = content_type
+        self._stat: tuple[float, int] | None = None
+        self.bodies: dict[str, bytes] = {}  # content-coding → body
+        self.etag = ""
+        self.last_modified = ""
+        self.mtime = 0.0
+
+    def load(self) -> None:
+        """Refresh the cached encodings if the file changed. Raises OSError if it is unreadable."""
+        st = self.path.stat()
+        if self._stat == (st.st_mtime, st.st_size):
+            return
+        body = self.path.read_bytes()
+        bodies = {"identity": body}
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            bodies["gzip"] = compressed
+        if _BROTLI_AVAILABLE:
+            compressed = brotli.compress(body)
+            if len(compressed) < len(body):
+                bodies["br"] = compressed
+        self.bodies = bodies
+        self.etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+        self.mtime = int(st.st_mtime)
+        self.last_modified = email.utils.formatdate(self.mtime, usegmt=True)
+        self._stat = (st.st_mtime, st.st_size)
+        log.info("Loaded %s (%s)", self.path.name, ", ".join(f"{k} {len(v)} B" for k, v in bodies.items()))
+
+    def etag_for(self, coding: str) -> str:
+        """Strong ETag per representation — the encodings are different byte streams."""
+        return f'"{self.etag}"' if coding == "identity" else f'"{self.etag}-{coding}"'
+
+    def not_modified(self, headers) -> bool:
+        """True if the request's If-None-Match / If-Modified-Since match the cached file."""
+        if_none_match = headers.get("If-None-Match")
+        if if_none_match is not None:
+            # Any representation of the same content counts (a proxy may have re-encoded)
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or any(self.etag_for(coding) in tags for coding in self.bodies)
+        if_modified_since = headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return email.utils.parsedate_to_datetime(if_modified_since).timestamp() >= self.mtime
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+def _accepted_coding(accept_encoding: str | None, available) -> str:
+    """Pick br, then gzip, from an Accept-Encoding header (q=0 excludes), else identity."""
+    if not accept_encoding:
+        return "identity"
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+    for coding in ("br", "gzip"):
+        if coding in available and accepted.get(coding, accepted.get("*", 0)) > 0:
+            return coding
+    return "identity"
+
+
+def _serve_asset(asset: _StaticAsset, request) -> Response:
+    """200 with the negotiated encoding, or 304 if the client's copy is current."""
+    try:
+        asset.load()
+    except OSError:
+        headers = Headers({"Content-Type": "text/plain"})
+        return Response(404, "Not Found", headers, b"Dashboard not found")
+
+    coding = _accepted_coding(request.headers.get("Accept-Encoding"), asset.bodies)
+    headers = Headers({
+        "ETag": asset.etag_for(coding),
+        "Last-Modified": asset.last_modified,
+        "Cache-Control": "no-cache",  # always revalidate — a changed dashboard shows up on refresh
+        "Vary": "Accept-Encoding",
+    })
+    if asset.not_modified(request.headers):
+        return Response(304, "Not Modified", headers, b"")
+    body = asset.bodies[coding]
+    headers["Content-Type"] = asset.content_type
+    headers["Content-Length"] = str(len(body))
+    if coding != "identity":
+        headers["Content-Encoding"] = coding
+    return Response(200, "OK", headers, body)
+
+
+_INDEX_ASSET = _StaticAsset(INDEX_HTML, "text/html; charset=utf-8")
+STATIC_ASSETS = {"/": _INDEX_ASSET, "/index.html": _INDEX_ASSET}
 
 
 # ---------------------------------------------------------------------------
@@ -344,15 +1064,28 @@ def _http_handler(connection, request):
     if request.headers.get("Upgrade", "").lower() == "websocket":
         return None
 
-    # Plain HTTP: serve the dashboard page
-    if request.path in ("/", "/index.html"):
-        try:
-            body = INDEX_HTML.read_bytes()
-            headers = Headers({"Content-Type": "text/html; charset=utf-8"})
-            return Response(200, "OK", headers, body)
-        except FileNotFoundError:
-            headers = Headers({"Content-Type": "text/plain"})
-            return Response(404, "Not Found", headers, b"Dashboard not found")
+    # Plain HTTP: serve the dashboard page (cached, pre-compressed)
+    asset = STATIC_ASSETS.get(request.path)
+    if asset is not None:
+        return _serve_asset(asset, request)
+
+    # Fan-out counters and per-client queue/lag stats
+    if request.path == "/stats":
+        body = json.dumps({
+            **FRAME_STATS,
+            "channels": {
+                name: {"subscribers": len(c.subscribers), "tailing": c.tail is not None and not c.tail.done(),
+                       "buffered": len(c.buffer)}
+                for name, c in CHANNELS.items()
+            },
+            "clients": [client.snapshot() for client in CLIENTS.values()],
+        }).encode()
+        return Response(200, "OK", Headers({"Content-Type": "application/json"}), body)
+
+    # Archived sessions for the history browser (replayed over the WebSocket)
+    if request.path == "/sessions":
+        body = json.dumps(_list_archived_sessions()).encode()
+        return Response(200, "OK", Headers({"Content-Type": "application/json"}), body)
 
     # Silently swallow favicon requests
     if request.path == "/favicon.ico":
@@ -371,30 +1104,50 @@ async def ws_handler(websocket) -> None:
     """Handle a WebSocket client connection."""
     remote = websocket.remote_address
     log.info("WebSocket client connected: %s", remote)
-    CLIENTS.add(websocket)
+    # Pending events are already in the channel buffers — send them to existing clients only
+    _flush_frames()
+    client = _Client(websocket)
+    CLIENTS[websocket] = client
+    newest = _newest_channel()
+    if newest is not None:
+        _subscribe(client, newest)
+    # The sender's first message is the init snapshot (state + buffered events)
+    client.wakeup.set()
+    sender = asyncio.create_task(_client_sender(client))
     try:
-        # Send current state + buffered events on connect (replay for late joiners)
-        init_msg = {
-            "ui_type": "init",
-            "state": SESSION_STATE,
-            "buffer": list(EVENT_BUFFER),
-        }
-        await websocket.send(json.dumps(init_msg))
-
-        # Handle stop commands from the dashboard; ignore all other messages
+        # Handle stop, replay and subscription commands from the dashboard; ignore all other messages
         async for msg in websocket:
             try:
                 data = json.loads(msg)
-                if data.get("action") == "stop":
+                action = data.get("action")
+                if action == "stop":
                     log.info("Stop requested by dashboard client %s", remote)
                     _write_stop_sentinel()
-            except (json.JSONDecodeError, ValueError):
+                elif action == "replay":
+                    _start_replay(client, data)
+                elif action == "replay_speed":
+                    client.replay_speed = max(0.0, float(data.get("speed", 1)))
+                elif action == "replay_stop":
+                    _stop_replay(client)
+                elif action == "subscribe" and data.get("session") in CHANNELS:
+                    client.follow = False
+                    _subscribe(client, CHANNELS[data["session"]])
+                elif action == "follow":
+                    client.follow = True
+                    newest = _newest_channel()
+                    if newest is not None:
+                        _subscribe(client, newest)
+            except (json.JSONDecodeError, ValueError, TypeError, AttributeError):
                 pass
     except Exception:
         pass
     finally:
-        CLIENTS.discard(websocket)
-        log.info("WebSocket client disconnected: %s", remote)
+        CLIENTS.pop(websocket, None)
+        sender.cancel()
+        _unsubscribe(client)
+        if client.replay is not None:
+            client.replay.cancel()
+        log.info("WebSocket client disconnected: %s (%s)", remote, client.snapshot())
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,352 @@
+# aiNOC - AI Network Troubleshooting Framework
+# Copyright (c) 2026 Mihai Catalin Teodosiu
+# Licensed under the Business Source License 1.1
+
+#!/usr/bin/env python3
+"""
+aiNOC watcher replay / benchmark.
+
+Feeds a recorded network.json through the watcher's own pipeline (_process_lines:
+pre-filter, SLA classification, lock/cooldown gating, storm correlation hold,
+post-session deferred/recovery scans) at N× speed, with the agent launch and the
+device-state prefetch stubbed out. No devices, tmux, Jira or Discord are touched.
+
+Time is compressed uniformly: event timestamps are rewritten onto the replay clock
+and the correlation hold and simulated session length are divided by --speed, so
+correlation grouping behaves as it would have in real time.
+
+Reports events/sec, queue lag, detection latency (line written → Down event acted
+on) and dispatch latency (line written → agent launch, includes the hold) as
+percentiles, plus CPU and peak memory.
+
+Usage:
+    python3 oncall/replay.py /var/log/network.json --speed 20
+    python3 oncall/replay.py --generate /tmp/storm.json --duration 120 --rate 200 --flaps 3
+    python3 oncall/replay.py /tmp/storm.json --speed 50 --json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core import ip_index
+from oncall import watcher
+
+SLA_DOWN_MSG = "%TRACK-6-STATE: 1 ip sla 1 reachability Up -> Down"
+SLA_UP_MSG = "%TRACK-6-STATE: 1 ip sla 1 reachability Down -> Up"
+# Background chatter seen on the lab devices — never matches the SLA patterns
+NOISE_MSGS = (
+    ("notice", "%LINEPROTO-5-UPDOWN: Line protocol on Interface GigabitEthernet{n}, changed state to up"),
+    ("notice", "%SYS-5-CONFIG_I: Configured from console by admin on vty0 (172.20.20.1)"),
+    ("notice", "%OSPF-5-ADJCHG: Process 1, Nbr {n}.{n}.{n}.{n} on GigabitEthernet{n} from LOADING to FULL, Loading Done"),
+    ("notice", "%BGP-5-ADJCHANGE: neighbor 200.50.50.{n} Up"),
+    ("notice", "%SEC_LOGIN-5-LOGIN_SUCCESS: Login Success [user: admin] [Source: 172.20.20.1] [localport: 22]"),
+    ("info", "%SYS-6-LOGGINGHOST_STARTSTOP: Logging to host 172.20.20.1 port 514 started - CLI initiated"),
+)
+
+
+def _format_ts(ts: datetime) -> str:
+    return ts.isoformat().replace("+00:00", "Z")
+
+
+def generate_storm(
+    noise_ips: list[str],
+    storm_ips: list[str],
+    *,
+    duration: float = 60.0,
+    rate: float = 50.0,
+    storm_at: float | None = None,
+    storm_spread: float = 2.0,
+    flaps: int = 0,
+    flap_interval: float = 5.0,
+    start: datetime | None = None,
+    seed: int | None = None,
+) -> list[dict]:
+    """Build a synthetic network.json event list, sorted by ts.
+
+    Background noise from noise_ips at `rate` events/sec for `duration` seconds; at
+    storm_at (default duration/3) every storm_ips device reports SLA Down within
+    storm_spread seconds, then flaps Up/Down `flaps` times every flap_interval seconds.
+    """
+    rng = random.Random(seed)
+    start = start or datetime.now(timezone.utc)
+    storm_at = duration / 3 if storm_at is None else storm_at
+    timed: list[tuple[float, dict]] = []
+
+    for _ in range(int(duration * rate)):
+        severity, template = rng.choice(NOISE_MSGS)
+        timed.append((rng.uniform(0, duration), {
+            "device": rng.choice(noise_ips), "severity": severity, "facility": "local7",
+            "msg": template.format(n=rng.randint(1, 9)),
+        }))
+
+    for ip in storm_ips:
+        at = storm_at + rng.uniform(0, storm_spread)
+        timed.append((at, {"device": ip, "severity": "info", "facility": "local7", "msg": SLA_DOWN_MSG}))
+        for flap in range(flaps):
+            up_at = at + (flap + 0.5) * flap_interval
+            timed.append((up_at, {"device": ip, "severity": "info", "facility": "local7", "msg": SLA_UP_MSG}))
+            timed.append((up_at + flap_interval / 2,
+                          {"device": ip, "severity": "info", "facility": "local7", "msg": SLA_DOWN_MSG}))
+
+    timed.sort(key=lambda item: item[0])
+    return [{"ts": _format_ts(start + timedelta(seconds=offset)), **event} for offset, event in timed]
+
+
+def _percentiles(values: list[float]) -> dict:
+    """Nearest-rank p50/p90/p99/max in milliseconds ({} when there are no samples)."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+    return {
+        "p50": round(rank(50) * 1000, 2),
+        "p90": round(rank(90) * 1000, 2),
+        "p99": round(rank(99) * 1000, 2),
+        "max": round(ordered[-1] * 1000, 2),
+    }
+
+
+def _event_key(event: dict) -> tuple:
+    return event.get("ts"), event.get("device"), event.get("msg")
+
+
+class _TimedQueue(asyncio.Queue):
+    """asyncio.Queue that records enqueue→dequeue lag for every line _process_lines takes.
+
+    Items are (enqueue time, line) pairs; get() unwraps them, so _process_lines sees lines.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.lag: list[float] = []
+        self.consumed = 0
+
+    def put_line(self, line: str) -> None:
+        self.put_nowait((time.monotonic(), line))
+
+    async def get(self):
+        queued, line = await super().get()
+        self.consumed += 1
+        self.lag.append(time.monotonic() - queued)
+        return line
+
+
+def _retime(lines: list[str], speed: float, anchor: datetime) -> list[tuple[float, str]]:
+    """Map each line to (replay offset in seconds, line with ts moved onto the replay clock).
+
+    Offsets come from the recorded ts relative to the first timestamped event, divided by
+    speed; lines without a usable ts (or not JSON) replay right after the previous line.
+    """
+    schedule, first_ts, last_offset = [], None, 0.0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            event = json.loads(line)
+            ts = watcher.parse_event_ts(event) if isinstance(event, dict) else None
+        except json.JSONDecodeError:
+            ts = None
+        if ts is None:
+            schedule.append((last_offset, line))
+            continue
+        if first_ts is None:
+            first_ts = ts
+        offset = (ts - first_ts).total_seconds() / speed
+        event["ts"] = _format_ts(anchor + timedelta(seconds=offset))
+        last_offset = max(last_offset, offset)
+        schedule.append((last_offset, json.dumps(event)))
+    return schedule
+
+
+async def replay(
+    lines: list[str],
+    device_map: dict,
+    *,
+    speed: float = 10.0,
+    hold_seconds: float = 10.0,
+    session_seconds: float = 60.0,
+    workdir: Path | None = None,
+) -> dict:
+    """Replay network.json lines through watcher._process_lines and return the metrics dict.
+
+    The pipeline's log and lock files live in workdir (a temporary directory by default);
+    each line is appended to the log before it is queued, as Vector + the tail reader would.
+    """
+    if speed <= 0:
+        raise ValueError("speed must be > 0")
+    if workdir is not None:
+        return await _run(lines, device_map, speed, hold_seconds, session_seconds, Path(workdir))
+    with tempfile.TemporaryDirectory(prefix="ainoc-replay-") as tmp:
+        return await _run(lines, device_map, speed, hold_seconds, session_seconds, Path(tmp))
+
+
+async def _run(lines, device_map, speed, hold_seconds, session_seconds, workdir) -> dict:
+    log_file = workdir / "network.json"
+    log_file.write_text("")
+    queue = _TimedQueue()
+    event_queued_at: dict[tuple, float] = {}
+    detection, dispatch = [], []
+    stats = {"sessions": 0, "correlated": 0, "deferred": 0}
+    in_flight = [0]
+
+    def _detected(event, device_map):
+        """Stands in for _start_state_prefetch — called once a Down event passed all gates."""
+        queued = event_queued_at.get(_event_key(event))
+        if queued is not None:
+            detection.append(time.monotonic() - queued)
+        in_flight[0] += 1
+        return None
+
+    async def _session(event, device_map, correlated_events=None, prefetch=None):
+        """Stands in for invoke_claude: no agent, same post-session scans."""
+        try:
+            queued = event_queued_at.get(_event_key(event))
+            if queued is not None:
+                dispatch.append(time.monotonic() - queued)
+            stats["sessions"] += 1
+            stats["correlated"] += len(correlated_events or [])
+            session_start = watcher.parse_event_ts(event) or datetime.now(timezone.utc)
+            await asyncio.sleep(session_seconds / speed)
+            session_end = datetime.now(timezone.utc)
+            deferred = await asyncio.to_thread(
+                watcher.scan_for_deferred_events, event, session_start, session_end, device_map,
+                exclude_events=correlated_events, log_file=str(log_file),
+            )
+            stats["deferred"] += len(deferred)
+            await asyncio.to_thread(
+                watcher.scan_for_recovery_events, event, session_start, session_end, device_map,
+                log_file=str(log_file),
+            )
+        finally:
+            in_flight[0] -= 1
+
+    schedule = _retime(lines, speed, datetime.now(timezone.utc))
+    usage_start = resource.getrusage(resource.RUSAGE_SELF)
+    consumer = asyncio.create_task(watcher._process_lines(
+        queue, watcher.TailControl(), device_map,
+        log_file=str(log_file), lock_file=workdir / "oncall.lock", hold_seconds=hold_seconds / speed,
+        launch=_session, on_detected=_detected,
+    ))
+    start = time.monotonic()
+    try:
+        with open(log_file, "a") as log:
+            for offset, line in schedule:
+                await asyncio.sleep(max(0.0, start + offset - time.monotonic()))
+                log.write(line + "\n")
+                log.flush()
+                try:
+                    event_queued_at.setdefault(_event_key(json.loads(line)), time.monotonic())
+                except (json.JSONDecodeError, AttributeError):
+                    pass
+                queue.put_line(line)
+        while not (queue.empty() and in_flight[0] == 0):
+            if consumer.done():
+                consumer.result()  # surface pipeline errors
+            await asyncio.sleep(0.01)
+    finally:
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+    elapsed = time.monotonic() - start
+    usage_end = resource.getrusage(resource.RUSAGE_SELF)
+
+    cpu = (usage_end.ru_utime - usage_start.ru_utime) + (usage_end.ru_stime - usage_start.ru_stime)
+    return {
+        "events": len(schedule),
+        "processed": queue.consumed,
+        "dropped_after_session": len(schedule) - queue.consumed,
+        "elapsed_s": round(elapsed, 3),
+        "events_per_sec": round(queue.consumed / elapsed, 1) if elapsed > 0 else None,
+        "speed": speed,
+        "sessions": stats["sessions"],
+        "correlated": stats["correlated"],
+        "deferred": stats["deferred"],
+        "queue_lag_ms": _percentiles(queue.lag),
+        "detection_ms": _percentiles(detection),
+        "dispatch_ms": _percentiles(dispatch),
+        "cpu_percent": round(100 * cpu / elapsed, 1) if elapsed > 0 else None,
+        "max_rss_mb": round(usage_end.ru_maxrss / 1024, 1),  # Linux reports KiB
+    }
+
+
+def _print_report(report: dict) -> None:
+    print(f"Replayed {report['events']} events at {report['speed']}x in {report['elapsed_s']} s "
+          f"({report['events_per_sec']} events/s processed, {report['dropped_after_session']} drained after sessions)")
+    print(f"Sessions: {report['sessions']}  correlated: {report['correlated']}  deferred: {report['deferred']}")
+    for key, title in (("queue_lag_ms", "Queue lag"), ("detection_ms", "Detection latency"),
+                       ("dispatch_ms", "Dispatch latency")):
+        pct = report[key]
+        if pct:
+            print(f"{title:<18} p50 {pct['p50']} ms  p90 {pct['p90']} ms  p99 {pct['p99']} ms  max {pct['max']} ms")
+        else:
+            print(f"{title:<18} no samples")
+    print(f"CPU: {report['cpu_percent']}%  peak RSS: {report['max_rss_mb']} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay a network.json through the On-Call watcher pipeline (agent stubbed) and report throughput."
+    )
+    parser.add_argument("file", nargs="?", type=Path, help="network.json to replay")
+    parser.add_argument("--speed", type=float, default=10.0, help="Replay speed multiplier (default: 10)")
+    parser.add_argument("--hold", type=float, default=float(os.getenv("CORRELATION_HOLD_SECONDS", "10")),
+                        help="Storm correlation hold in real-time seconds (default: CORRELATION_HOLD_SECONDS or 10)")
+    parser.add_argument("--session-seconds", type=float, default=60.0,
+                        help="Simulated agent session length in real-time seconds (default: 60)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show watcher INFO logs")
+    gen = parser.add_argument_group("synthetic storm generator")
+    gen.add_argument("--generate", type=Path, metavar="OUT", help="Write a synthetic storm to OUT and exit")
+    gen.add_argument("--duration", type=float, default=60.0, help="Storm file length in seconds (default: 60)")
+    gen.add_argument("--rate", type=float, default=50.0, help="Background events/sec (default: 50)")
+    gen.add_argument("--flaps", type=int, default=0, help="Up/Down flaps per SLA source after the storm")
+    gen.add_argument("--seed", type=int, help="Random seed for a reproducible file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.generate:
+        from core.inventory import devices
+        hosts = {name: info["host"] for name, info in devices.items() if info.get("host")}
+        storm_ips = [hosts[p["source_device"]] for p in watcher.load_sla_paths() if p.get("source_device") in hosts]
+        if not hosts or not storm_ips:
+            print("ERROR: no inventory hosts / SLA path sources to generate events for.", file=sys.stderr)
+            sys.exit(1)
+        events = generate_storm(list(hosts.values()), storm_ips, duration=args.duration, rate=args.rate,
+                                flaps=args.flaps, seed=args.seed)
+        args.generate.write_text("".join(json.dumps(e) + "\n" for e in events))
+        print(f"Wrote {len(events)} events ({len(storm_ips)} SLA sources) to {args.generate}")
+        return
+
+    if args.file is None or not args.file.exists():
+        parser.error("a network.json file to replay is required (or --generate OUT)")
+
+    lines = args.file.read_text().splitlines()
+    # Same map as load_device_map(), without rewriting data/ip_index.json
+    device_map = ip_index.get_index().device_map()
+    report = asyncio.run(replay(lines, device_map, speed=args.speed,
+                                hold_seconds=args.hold, session_seconds=args.session_seconds))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from core import tracing
+
 PLATFORM_MAP = {
     # ── Cisco IOS (asyncssh — CLI strings, Genie-parsed) ──────────────────────
     # Used by IOL devices: A1C, A2C, IAN, IBN (SSH-only, no NETCONF/RESTCONF).
@@ -103,6 +105,7 @@ def _apply_vrf(action, vrf_name: str | None):
     return action
 
 
+@tracing.traced
 def get_action(device: dict, category: str, query: str, vrf: str | None = None):
     """Look up command/action from PLATFORM_MAP.
 
@@ -85,6 +85,21 @@ case "${MODE}" in
         run_pytest "UT-026 WS Bridge"            "${TEST_PREFIX}/unit/test_ws_bridge.py"
         run_pytest "UT-027 Settings"             "${TEST_PREFIX}/unit/test_settings.py"
         run_pytest "UT-028 MCP Registration"     "${TEST_PREFIX}/unit/test_mcp_registration.py"
+        run_pytest "UT-029 Storm Correlation"    "${TEST_PREFIX}/unit/test_storm_correlation.py"
+        run_pytest "UT-030 Watcher Pre-launch"  "${TEST_PREFIX}/unit/test_watcher_prelaunch.py"
+        run_pytest "UT-031 Watcher Exit Wait"   "${TEST_PREFIX}/unit/test_watcher_exit_wait.py"
+        run_pytest "UT-032 File Tail Reader"    "${TEST_PREFIX}/unit/test_file_tail.py"
+        run_pytest "UT-033 Session Archive"     "${TEST_PREFIX}/unit/test_session_archive.py"
+        run_pytest "UT-034 State Cache"         "${TEST_PREFIX}/unit/test_state_cache.py"
+        run_pytest "UT-035 Incident Digest"     "${TEST_PREFIX}/unit/test_incident_digest.py"
+        run_pytest "UT-036 IP Index"            "${TEST_PREFIX}/unit/test_ip_index.py"
+        run_pytest "UT-037 Syslog Receiver"     "${TEST_PREFIX}/unit/test_syslog_receiver.py"
+        run_pytest "UT-038 Watcher Replay"      "${TEST_PREFIX}/unit/test_replay.py"
+        run_pytest "UT-039 Discord Gateway"     "${TEST_PREFIX}/unit/test_discord_gateway.py"
+        run_pytest "UT-040 Discord Rate Limits" "${TEST_PREFIX}/unit/test_discord_ratelimit.py"
+        run_pytest "UT-041 Notification Outbox" "${TEST_PREFIX}/unit/test_outbox.py"
+        run_pytest "UT-042 Jira Retry and Batching" "${TEST_PREFIX}/unit/test_jira_retry.py"
+        run_pytest "UT-043 Tool-Call Tracing" "${TEST_PREFIX}/unit/test_tracing.py"
         ;;
 
     integration)
@@ -121,6 +136,21 @@ case "${MODE}" in
         run_pytest "UT-026 WS Bridge"            "${TEST_PREFIX}/unit/test_ws_bridge.py"
         run_pytest "UT-027 Settings"             "${TEST_PREFIX}/unit/test_settings.py"
         run_pytest "UT-028 MCP Registration"     "${TEST_PREFIX}/unit/test_mcp_registration.py"
+        run_pytest "UT-029 Storm Correlation"    "${TEST_PREFIX}/unit/test_storm_correlation.py"
+        run_pytest "UT-030 Watcher Pre-launch"  "${TEST_PREFIX}/unit/test_watcher_prelaunch.py"
+        run_pytest "UT-031 Watcher Exit Wait"   "${TEST_PREFIX}/unit/test_watcher_exit_wait.py"
+        run_pytest "UT-032 File Tail Reader"    "${TEST_PREFIX}/unit/test_file_tail.py"
+        run_pytest "UT-033 Session Archive"     "${TEST_PREFIX}/unit/test_session_archive.py"
+        run_pytest "UT-034 State Cache"         "${TEST_PREFIX}/unit/test_state_cache.py"
+        run_pytest "UT-035 Incident Digest"     "${TEST_PREFIX}/unit/test_incident_digest.py"
+        run_pytest "UT-036 IP Index"            "${TEST_PREFIX}/unit/test_ip_index.py"
+        run_pytest "UT-037 Syslog Receiver"     "${TEST_PREFIX}/unit/test_syslog_receiver.py"
+        run_pytest "UT-038 Watcher Replay"      "${TEST_PREFIX}/unit/test_replay.py"
+        run_pytest "UT-039 Discord Gateway"     "${TEST_PREFIX}/unit/test_discord_gateway.py"
+        run_pytest "UT-040 Discord Rate Limits" "${TEST_PREFIX}/unit/test_discord_ratelimit.py"
+        run_pytest "UT-041 Notification Outbox" "${TEST_PREFIX}/unit/test_outbox.py"
+        run_pytest "UT-042 Jira Retry and Batching" "${TEST_PREFIX}/unit/test_jira_retry.py"
+        run_pytest "UT-043 Tool-Call Tracing" "${TEST_PREFIX}/unit/test_tracing.py"
         run_pytest "IT-001 MCP Connectivity"    "${TEST_PREFIX}/integration/test_mcp_connectivity.py"
         run_pytest "IT-002 Watcher Events"      "${TEST_PREFIX}/integration/test_watcher_events.py"
         run_pytest "IT-003 MCP Tools"           "${TEST_PREFIX}/integration/test_mcp_tools.py"
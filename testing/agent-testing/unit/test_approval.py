@@ -62,6 +62,12 @@ def run(coro):
     return asyncio.run(coro)
 
 
+@pytest.fixture(autouse=True)
+def _rest_polling(monkeypatch):
+    """These tests cover the REST polling path; the Gateway path is UT-039."""
+    monkeypatch.setenv("DISCORD_GATEWAY", "0")
+
+
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 def _make_mock_response(status: int, json_data=None, text_data=""):
@@ -318,28 +324,17 @@ def test_poll_removes_reactions_on_expiry(monkeypatch):
 
     delete_calls = []
 
-    class PollSession:
-        """Used during the poll loop (GET reactions only)."""
+    class MockSession:
+        """Pooled session: GET reactions during the poll loop, DELETE on cleanup."""
         async def __aenter__(self): return self
         async def __aexit__(self, *a): pass
         def get(self, url, **kwargs):
             return empty_reactions
-
-    class CleanupSession:
-        """Used for the cleanup DELETE calls after expiry."""
-        async def __aenter__(self): return self
-        async def __aexit__(self, *a): pass
         def delete(self, url, **kwargs):
             delete_calls.append(url)
             return delete_resp
 
-    sessions = [PollSession(), CleanupSession()]
-    session_iter = iter(sessions)
-
-    def session_factory():
-        return next(session_iter)
-
-    with patch("core.discord_approval.aiohttp.ClientSession", side_effect=session_factory):
+    with patch("core.discord_approval.aiohttp.ClientSession", return_value=MockSession()):
         with patch("core.discord_approval.asyncio.sleep", new=AsyncMock()):
             result = run(poll_for_reaction("msgClean", timeout_minutes=0))
 
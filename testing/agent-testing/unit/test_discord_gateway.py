@@ -0,0 +1,268 @@
+"""UT-039 — Discord Gateway approval listener.
+
+Tests for core/discord_gateway.py and the Gateway path of
+core/discord_approval.poll_for_reaction().
+
+A local aiohttp server plays both the Discord Gateway (WebSocket) and the REST
+reaction/message endpoints; DISCORD_GATEWAY_URL and DISCORD_API point at it.
+No Discord account or network access required.
+
+Validates:
+- IDENTIFY carries the bot token and the GUILD_MESSAGE_REACTIONS intent
+- A human ✅/❌ MESSAGE_REACTION_ADD resolves the approval without polling
+- Reactions on other messages, other emojis, bots and the bot itself are ignored
+- A reaction added before the Gateway was READY is caught by one REST check
+- A Gateway that closes or is unreachable falls back to REST polling
+- Expiry while waiting on the Gateway removes the bot's reactions without polling
+- Heartbeats carry the last sequence number; a missing ACK drops the connection
+- A heartbeat that cannot be sent raises GatewayError, leaving no unretrieved task exception
+- DISCORD_GATEWAY=0 never opens a Gateway connection
+"""
+import asyncio
+import gc
+import json
+import sys
+import urllib.parse
+from pathlib import Path
+from types import SimpleNamespace
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core import discord_approval, discord_gateway
+from core.discord_gateway import GatewayError
+
+HUMAN = {"id": "u1", "username": "ops_engineer"}
+BOT = {"id": "b1", "username": "aiNOC", "bot": True}
+
+
+def _reaction(message_id, emoji, user, member=True):
+    data = {"user_id": user["id"], "channel_id": "chan123", "message_id": message_id,
+            "emoji": {"id": None, "name": emoji}}
+    if member:
+        data["member"] = {"user": user}
+    return data
+
+
+class FakeDiscord:
+    """Local stand-in for the Discord Gateway and the REST endpoints poll_for_reaction uses."""
+
+    def __init__(self, dispatches=(), reactions=None, heartbeat_interval=45000, ack=True,
+                 close_on_identify=False):
+        self.dispatches = list(dispatches)
+        self.reactions = reactions or {}
+        self.heartbeat_interval = heartbeat_interval
+        self.ack = ack
+        self.close_on_identify = close_on_identify
+        self.connections = 0
+        self.identify = None
+        self.heartbeats = []
+        self.rest_gets = []
+        self.posts = []
+        self.deletes = []
+
+    async def gateway(self, request):
+        self.connections += 1
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_json({"op": 10, "d": {"heartbeat_interval": self.heartbeat_interval}})
+        seq = 0
+        async for msg in ws:
+            payload = json.loads(msg.data)
+            if payload["op"] == 1:
+                self.heartbeats.append(payload["d"])
+                if self.ack:
+                    await ws.send_json({"op": 11})
+            elif payload["op"] == 2:
+                self.identify = payload["d"]
+                if self.close_on_identify:
+                    await ws.close(code=4004)
+                    break
+                seq += 1
+                await ws.send_json({"op": 0, "t": "READY", "s": seq, "d": {"user": BOT}})
+                for data in self.dispatches:
+                    seq += 1
+                    await ws.send_json({"op": 0, "t": "MESSAGE_REACTION_ADD", "s": seq, "d": data})
+        return ws
+
+    async def get_reactions(self, request):
+        emoji = urllib.parse.unquote(request.match_info["emoji"])
+        self.rest_gets.append(emoji)
+        return web.json_response(self.reactions.get(emoji, [BOT]))
+
+    async def post_message(self, request):
+        self.posts.append(await request.json())
+        return web.json_response({"id": "ack1"})
+
+    async def delete_reaction(self, request):
+        self.deletes.append(urllib.parse.unquote(request.match_info["emoji"]))
+        return web.Response(status=204)
+
+    def app(self):
+        app = web.Application()
+        base = "/api/channels/{channel}/messages"
+        app.router.add_get("/gateway", self.gateway)
+        app.router.add_get(base + "/{message}/reactions/{emoji}", self.get_reactions)
+        app.router.add_delete(base + "/{message}/reactions/{emoji}/@me", self.delete_reaction)
+        app.router.add_post(base, self.post_message)
+        return app
+
+
+@pytest.fixture(autouse=True)
+def _discord_env(monkeypatch):
+    monkeypatch.setenv("DISCORD_BOT_TOKEN", "tok")
+    monkeypatch.setenv("DISCORD_CHANNEL_ID", "chan123")
+    monkeypatch.delenv("DISCORD_GATEWAY", raising=False)
+    monkeypatch.setattr(discord_approval, "POLL_INTERVAL", 0.01)
+
+
+def _run(fake, coro_fn, monkeypatch, gateway_url=None):
+    """Start the fake server, point the Discord URLs at it and run coro_fn()."""
+
+    async def _main():
+        server = TestServer(fake.app())
+        await server.start_server()
+        monkeypatch.setattr(discord_approval, "DISCORD_API", str(server.make_url("/api")))
+        monkeypatch.setenv("DISCORD_GATEWAY_URL", gateway_url or str(server.make_url("/gateway")))
+        try:
+            return await asyncio.wait_for(coro_fn(), timeout=10)
+        finally:
+            await discord_approval.close()
+            await server.close()
+
+    return asyncio.run(_main())
+
+
+class TestGatewayApproval:
+    def test_human_approval_resolves_immediately(self, monkeypatch):
+        fake = FakeDiscord(dispatches=[_reaction("msg1", "✅", HUMAN)])
+        result = _run(fake, lambda: discord_approval.poll_for_reaction("msg1", timeout_minutes=1), monkeypatch)
+
+        assert result == {"decision": "approved", "approved_by": "ops_engineer"}
+        assert fake.identify["token"] == "tok"
+        assert fake.identify["intents"] == discord_gateway.INTENT_GUILD_MESSAGE_REACTIONS
+        assert fake.rest_gets == ["✅", "❌"]  # the single catch-up check at READY
+        assert "Approval received from @ops_engineer" in fake.posts[0]["content"]
+        assert fake.posts[0]["message_reference"] == {"message_id": "msg1"}
+
+    def test_ignored_reactions_then_rejection(self, monkeypatch):
+        fake = FakeDiscord(dispatches=[
+            _reaction("other", "✅", HUMAN),
+            _reaction("msg1", "👍", HUMAN),
+            _reaction("msg1", "✅", BOT),
+            _reaction("msg1", "✅", BOT, member=False),  # the bot itself, identified by READY user id
+            _reaction("msg1", "❌", HUMAN),
+        ])
+        result = _run(fake, lambda: discord_approval.poll_for_reaction("msg1", timeout_minutes=1), monkeypatch)
+
+        assert result == {"decision": "rejected", "rejected_by": "ops_engineer"}
+        assert "Rejection received" in fake.posts[0]["content"]
+
+    def test_reaction_before_ready_caught_by_rest_check(self, monkeypatch):
+        fake = FakeDiscord(reactions={"✅": [BOT, HUMAN]})
+        result = _run(fake, lambda: discord_approval.poll_for_reaction("msg1", timeout_minutes=1), monkeypatch)
+
+        assert result == {"decision": "approved", "approved_by": "ops_engineer"}
+        assert fake.connections == 1
+
+    def test_expiry_on_gateway_skips_polling(self, monkeypatch):
+        fake = FakeDiscord()
+        result = _run(fake, lambda: discord_approval.poll_for_reaction("msg1", timeout_minutes=0.005), monkeypatch)
+
+        assert result == {"decision": "expired"}
+        assert fake.rest_gets == ["✅", "❌"]
+        assert fake.deletes == ["✅", "❌"]
+
+
+class TestFallback:
+    def test_gateway_closed_falls_back_to_polling(self, monkeypatch):
+        fake = FakeDiscord(reactions={"❌": [HUMAN]}, close_on_identify=True)
+        result = _run(fake, lambda: discord_approval.poll_for_reaction("msg1", timeout_minutes=1), monkeypatch)
+
+        assert result == {"decision": "rejected", "rejected_by": "ops_engineer"}
+        assert fake.connections == 1 and fake.identify is not None
+
+    def test_unreachable_gateway_falls_back_to_polling(self, monkeypatch):
+        fake = FakeDiscord(reactions={"✅": [HUMAN]})
+        result = _run(fake, lambda: discord_approval.poll_for_reaction("msg1", timeout_minutes=1), monkeypatch,
+                      gateway_url="ws://127.0.0.1:1/gateway")
+
+        assert result == {"decision": "approved", "approved_by": "ops_engineer"}
+        assert fake.connections == 0
+
+    def test_disabled_gateway_never_connects(self, monkeypatch):
+        monkeypatch.setenv("DISCORD_GATEWAY", "0")
+        fake = FakeDiscord(reactions={"✅": [HUMAN]})
+        result = _run(fake, lambda: discord_approval.poll_for_reaction("msg1", timeout_minutes=1), monkeypatch)
+
+        assert result["decision"] == "approved"
+        assert fake.connections == 0
+
+
+class TestHeartbeat:
+    def _wait(self):
+        async def _go():
+            async with aiohttp.ClientSession() as session:
+                return await discord_gateway.wait_for_reaction(session, "tok", "msg1", ("✅",))
+        return _go
+
+    def test_heartbeats_carry_sequence(self, monkeypatch):
+        fake = FakeDiscord(heartbeat_interval=20)
+
+        async def _go():
+            async with aiohttp.ClientSession() as session:
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(
+                        discord_gateway.wait_for_reaction(session, "tok", "msg1", ("✅",)), 0.3)
+
+        _run(fake, _go, monkeypatch)
+        assert len(fake.heartbeats) >= 3
+        assert fake.heartbeats[-1] == 1  # sequence number of READY
+
+    def test_missing_ack_drops_connection(self, monkeypatch):
+        fake = FakeDiscord(heartbeat_interval=20, ack=False)
+        with pytest.raises(GatewayError):
+            _run(fake, self._wait(), monkeypatch)
+
+    def test_failed_heartbeat_send_raises(self):
+        class BrokenWs:
+            close_code = 1006
+            hello = False
+
+            async def receive(self):
+                if not self.hello:
+                    self.hello = True
+                    data = json.dumps({"op": 10, "d": {"heartbeat_interval": 10}})
+                    return SimpleNamespace(type=aiohttp.WSMsgType.TEXT, data=data)
+                await asyncio.sleep(3600)
+
+            async def send_json(self, payload):
+                if payload["op"] == 1:
+                    raise ConnectionResetError("Cannot write to closing transport")
+
+            async def close(self, code=None):
+                pass
+
+        async def _connect(url):
+            return BrokenWs()
+
+        unhandled = []
+
+        async def _go():
+            asyncio.get_running_loop().set_exception_handler(lambda loop, ctx: unhandled.append(ctx))
+            events = discord_gateway.reaction_events(SimpleNamespace(ws_connect=_connect), "tok")
+            try:
+                with pytest.raises(GatewayError, match="heartbeat failed"):
+                    await asyncio.wait_for(events.__anext__(), 2)
+            finally:
+                await events.aclose()
+            gc.collect()
+            await asyncio.sleep(0)
+
+        asyncio.run(_go())
+        assert unhandled == []
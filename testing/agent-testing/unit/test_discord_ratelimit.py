@@ -0,0 +1,258 @@
+"""UT-040 — Discord REST rate limiting.
+
+Tests for core/discord_ratelimit.py and the request queue in
+core/discord_approval.py (_request, reaction adds, progress coalescing).
+
+A local aiohttp server enforces fixed-window limits per route and answers with
+Discord's X-RateLimit-* headers, or 429 + Retry-After when a limit is exceeded.
+DISCORD_API points at it; no Discord account or network access required.
+
+Validates:
+- Message and reaction ids are templated out of the route; the channel is the major parameter
+- A burst larger than a bucket's limit completes without a single 429
+- Requests are pipelined once the bucket's limit is known
+- A 429 is retried after Retry-After; a global 429 parks every bucket
+- Routes reporting the same X-RateLimit-Bucket share one queue
+- Approval reactions go out back to back as the headers allow, ✅ before ❌
+- Progress updates queued back to back in the outbox go out as one message, in order
+- A failed progress post is reported, and the outbox retries it; after a 502/504 the
+  post may exist, so it raises DeliveryUncertain and is not resent
+"""
+import asyncio
+import sys
+import time
+import urllib.parse
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core import discord_approval, outbox
+from core.delivery import DeliveryUncertain
+from core.discord_ratelimit import RateLimiter
+
+
+class FakeDiscordAPI:
+    """Fixed-window rate limits per route, reported in Discord's headers."""
+
+    def __init__(self, limit=2, window=0.2, bucket_ids=None, force_429=0, global_429=False, delay=0.0,
+                 errors=()):
+        self.limit = limit
+        self.window = window
+        self.bucket_ids = bucket_ids or {}
+        self.force_429 = force_429
+        self.global_429 = global_429
+        self.delay = delay
+        self.errors = list(errors)  # statuses answered first, before any rate limiting
+        self.windows: dict[str, tuple[float, int]] = {}
+        self.requests = []  # (time, method, path, json)
+        self.statuses = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _bucket(self, request):
+        route = RateLimiter.route(request.method, request.path.removeprefix("/api"))[0]
+        return self.bucket_ids.get(route, route)
+
+    async def handle(self, request):
+        body = await request.json() if request.can_read_body else None
+        now = time.monotonic()
+        self.requests.append((now, request.method, urllib.parse.unquote(request.path), body))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.force_429:
+                self.force_429 -= 1
+                return self._reply(429, {"retry_after": 0.05, "global": self.global_429},
+                                   {"Retry-After": "0.05"})
+            if self.errors:
+                return self._reply(self.errors.pop(0), {"message": "scripted"}, {})
+            bucket = self._bucket(request)
+            start, count = self.windows.get(bucket, (now, 0))
+            if now - start >= self.window:
+                start, count = now, 0
+            if count >= self.limit:
+                retry = self.window - (now - start)
+                return self._reply(429, {"retry_after": retry, "global": False}, {"Retry-After": f"{retry:.3f}"})
+            count += 1
+            self.windows[bucket] = (start, count)
+            headers = {
+                "X-RateLimit-Bucket": bucket,
+                "X-RateLimit-Limit": str(self.limit),
+                "X-RateLimit-Remaining": str(self.limit - count),
+                "X-RateLimit-Reset-After": f"{self.window - (now - start):.3f}",
+            }
+            return self._reply(200, {"id": f"m{len(self.requests)}"}, headers)
+        finally:
+            self.in_flight -= 1
+
+    def _reply(self, status, data, headers):
+        self.statuses.append(status)
+        return web.json_response(data, status=status, headers=headers)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_route("*", "/api/{tail:.*}", self.handle)
+        return app
+
+
+@pytest.fixture(autouse=True)
+def _discord_env(monkeypatch):
+    monkeypatch.setenv("DISCORD_BOT_TOKEN", "tok")
+    monkeypatch.setenv("DISCORD_CHANNEL_ID", "chan123")
+
+
+def _run(fake, coro_fn, monkeypatch):
+    async def _main():
+        server = TestServer(fake.app())
+        await server.start_server()
+        monkeypatch.setattr(discord_approval, "DISCORD_API", str(server.make_url("/api")))
+        try:
+            return await asyncio.wait_for(coro_fn(), timeout=10)
+        finally:
+            await discord_approval.close()
+            await server.close()
+
+    return asyncio.run(_main())
+
+
+async def _post(path="/channels/chan123/messages"):
+    async with discord_approval._request("POST", path, json={"content": "x"}) as resp:
+        return resp.status
+
+
+class TestRoutes:
+    def test_route_templates(self):
+        assert RateLimiter.route("put", "/channels/c1/messages/m9/reactions/%E2%9C%85/@me") == (
+            "PUT /channels/c1/messages/:id/reactions/:id/@me", "c1")
+        assert RateLimiter.route("GET", "/gateway/bot") == ("GET /gateway/bot", "")
+
+
+class TestLimiter:
+    def test_burst_without_429(self, monkeypatch):
+        fake = FakeDiscordAPI(limit=2, window=0.2)
+
+        async def _go():
+            return await asyncio.gather(*(_post() for _ in range(5)))
+
+        assert _run(fake, _go, monkeypatch) == [200] * 5
+        assert 429 not in fake.statuses
+        times = [t for t, *_ in fake.requests]
+        assert times[4] - times[0] >= 0.35  # three windows for five requests
+
+    def test_pipelined_once_limit_known(self, monkeypatch):
+        fake = FakeDiscordAPI(limit=10, window=5, delay=0.05)
+
+        async def _go():
+            await _post()  # learn the bucket
+            return await asyncio.gather(*(_post() for _ in range(4)))
+
+        assert _run(fake, _go, monkeypatch) == [200] * 4
+        assert fake.max_in_flight > 1
+
+    def test_429_retried(self, monkeypatch):
+        fake = FakeDiscordAPI(force_429=1)
+
+        async def _go():
+            status = await _post()
+            return status, discord_approval._limiter.stats["retries"]
+
+        assert _run(fake, _go, monkeypatch) == (200, 1)
+        assert fake.statuses == [429, 200]
+
+    def test_global_429_parks_other_buckets(self, monkeypatch):
+        fake = FakeDiscordAPI(force_429=1, global_429=True, delay=0.01)
+
+        async def _go():
+            first = asyncio.create_task(_post("/channels/a/messages"))
+            await asyncio.sleep(0.02)  # the 429 has been received
+            await _post("/channels/b/messages")
+            return await first
+
+        assert _run(fake, _go, monkeypatch) == 200
+        times = [t for t, *_ in fake.requests]
+        assert times[-1] - times[0] >= 0.05
+
+    def test_shared_bucket_id(self, monkeypatch):
+        shared = {"POST /channels/chan123/messages": "msgs", "PATCH /channels/chan123/messages/:id": "msgs"}
+        fake = FakeDiscordAPI(limit=5, window=5, bucket_ids=shared)
+
+        async def _go():
+            await _post()
+            async with discord_approval._request("PATCH", "/channels/chan123/messages/m1", json={}):
+                pass
+            limiter = discord_approval._limiter
+            return (limiter._bucket("POST /channels/chan123/messages", "chan123")
+                    is limiter._bucket("PATCH /channels/chan123/messages/:id", "chan123"))
+
+        assert _run(fake, _go, monkeypatch) is True
+
+
+class TestApprovalTraffic:
+    def test_reactions_back_to_back(self, monkeypatch):
+        fake = FakeDiscordAPI(limit=1, window=0.1)
+
+        async def _go():
+            return await discord_approval.post_approval_request(
+                summary="s", findings="f", commands=["c"], devices=["C1C"], risk_level="low", issue_key=None)
+
+        start = time.monotonic()
+        assert _run(fake, _go, monkeypatch) == "m1"
+        puts = [path for _, method, path, _ in fake.requests if method == "PUT"]
+        assert [p.split("/")[-2] for p in puts] == ["✅", "❌"]
+        assert 429 not in fake.statuses
+        assert time.monotonic() - start < 1.0
+
+    @staticmethod
+    async def _deliver_progress(tmp_path, messages):
+        box = outbox.Outbox(tmp_path / "outbox.db")
+        for message in messages:
+            box.enqueue("discord_approval.post_progress_update", "discord", {"message": message})
+        runner = asyncio.create_task(box.run())
+        while box.pending():
+            await asyncio.sleep(0.01)
+        runner.cancel()
+        await box.close()
+
+    def test_progress_updates_coalesced(self, monkeypatch, tmp_path):
+        fake = FakeDiscordAPI()
+        _run(fake, lambda: self._deliver_progress(tmp_path, [f"step {i}" for i in range(6)]), monkeypatch)
+        posts = [body["content"] for _, method, _, body in fake.requests if method == "POST"]
+        assert posts == ["\n".join(f"step {i}" for i in range(6))]
+
+    def test_progress_batch_within_message_limit(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(discord_approval, "MESSAGE_MAX_CHARS", 12)
+        fake = FakeDiscordAPI(limit=10)
+        _run(fake, lambda: self._deliver_progress(tmp_path, ["aaaa", "bbbb", "cccc"]), monkeypatch)
+        posts = [body["content"] for _, method, _, body in fake.requests if method == "POST"]
+        assert posts == ["aaaa\nbbbb", "cccc"]
+
+    def test_failed_progress_post_reported(self, monkeypatch):
+        fake = FakeDiscordAPI(errors=[503])
+
+        async def _go():
+            return [await discord_approval.post_progress_update(f"step {i}") for i in range(2)]
+
+        assert _run(fake, _go, monkeypatch) == [False, True]
+
+    def test_gateway_error_is_uncertain(self, monkeypatch, tmp_path):
+        fake = FakeDiscordAPI(errors=[504])
+        with pytest.raises(DeliveryUncertain, match="504"):
+            _run(fake, lambda: discord_approval.post_progress_update("step"), monkeypatch)
+
+        fake = FakeDiscordAPI(errors=[502])
+        _run(fake, lambda: self._deliver_progress(tmp_path, ["once"]), monkeypatch)
+        assert fake.statuses == [502]  # parked, not reposted
+
+    def test_outbox_retries_failed_progress_update(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(outbox, "RETRY_BASE_SECONDS", 0.01)
+        fake = FakeDiscordAPI(errors=[503])
+        _run(fake, lambda: self._deliver_progress(tmp_path, ["still here"]), monkeypatch)
+        posts = [body["content"] for _, method, _, body in fake.requests if method == "POST"]
+        assert posts == ["still here", "still here"]
+        assert fake.statuses == [503, 200]
@@ -1,13 +1,19 @@
 """
 UT-003 — Tail Follow Drain Mechanism
 
-Verifies tail_follow(filepath, drain):
+Verifies tail_follow(filepath, control):
 1. Normal lines are yielded as written.
-2. Setting drain[0] = True causes subsequent buffered lines to be skipped.
-3. After the drain seek, drain[0] is reset to False.
-4. New lines written after drain are yielded again.
+2. Lines logged while the TailControl is paused are skipped.
+3. After resume() the reader seeks to EOF and its generation catches up.
+4. New lines written after resume() are yielded again.
+5. The tail reader thread hands lines to the watcher's event loop via an asyncio.Queue,
+   and _drain_queue discards lines queued while a session was running.
+6. While its TailControl is paused the reader reads nothing; after resume() it skips
+   what was logged meanwhile and delivers only new lines.
+7. A line read before resume() but handed over after it (stale generation) is dropped.
 """
 
+import asyncio
 import sys
 import tempfile
 import threading
@@ -17,7 +23,7 @@ from pathlib import Path
 import pytest
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
-from oncall.watcher import tail_follow
+from oncall.watcher import TailControl, tail_follow, _start_tail_reader, _drain_queue
 
 
 def _collect(gen, count: int, timeout: float = 5.0) -> list:
@@ -42,13 +48,12 @@ def _collect(gen, count: int, timeout: float = 5.0) -> list:
 
 def test_normal_lines_yielded(tmp_path):
     """Lines written to the log file must be yielded by tail_follow in order.
-    Confirms the baseline tail behaviour before any drain signalling.
+    Confirms the baseline tail behaviour without a TailControl.
     """
     log = tmp_path / "net.json"
     log.write_text("")
-    drain = [False]
 
-    gen = tail_follow(str(log), drain)
+    gen = tail_follow(str(log))
 
     collected = []
     done = threading.Event()
@@ -74,81 +79,127 @@ def test_normal_lines_yielded(tmp_path):
     assert '{"ts":"1","msg":"line1"}' in collected
 
 
-def test_drain_skips_buffered_lines(tmp_path):
-    """After drain[0]=True is set, buffered lines written before the seek are skipped."""
+def test_resume_skips_lines_logged_while_paused(tmp_path):
+    """Lines written while paused are skipped; lines written after resume() are yielded."""
     log = tmp_path / "net.json"
     log.write_text("")
-    drain = [False]
+    control = TailControl()
 
     collected = []
-    post_drain = []
-    phase_lock = threading.Lock()
-    drained = threading.Event()
     done = threading.Event()
 
     def reader():
-        for line in tail_follow(str(log), drain):
-            with phase_lock:
-                if drain[0] is False and drained.is_set():
-                    post_drain.append(line)
-                else:
-                    collected.append(line)
-            if len(post_drain) >= 1:
+        for line in tail_follow(str(log), control):
+            collected.append(line)
+            if "after_resume" in line:
                 done.set()
                 return
 
     t = threading.Thread(target=reader, daemon=True)
     t.start()
 
-    # Write one line before drain
     time.sleep(0.6)
     with open(log, "a") as f:
-        f.write('{"ts":"pre","msg":"before_drain"}\n')
-    time.sleep(0.5)
+        f.write('{"ts":"pre","msg":"before_pause"}\n')
+    time.sleep(0.6)
 
-    # Trigger drain while writing more lines
-    drain[0] = True
+    control.pause()
     with open(log, "a") as f:
         f.write('{"ts":"skipped","msg":"should_be_skipped"}\n')
     time.sleep(0.5)
-    drained.set()
+    control.resume()
 
-    # Write a line after drain completes — this should be yielded
-    time.sleep(1.0)
+    time.sleep(0.6)
     with open(log, "a") as f:
-        f.write('{"ts":"after","msg":"after_drain"}\n')
+        f.write('{"ts":"after","msg":"after_resume"}\n')
 
     done.wait(timeout=8)
-    assert any("before_drain" in c for c in collected)
-    assert not any("should_be_skipped" in c for c in post_drain)
-    assert any("after_drain" in c for c in post_drain)
+    assert [c for c in collected if "msg" in c] == [
+        '{"ts":"pre","msg":"before_pause"}', '{"ts":"after","msg":"after_resume"}',
+    ]
 
 
-def test_drain_resets_to_false(tmp_path):
-    """After tail_follow processes drain[0]=True, it resets drain[0] to False."""
+def test_resume_catches_generation_up(tmp_path):
+    """After resume(), tail_follow seeks to EOF and brings its generation up to wanted."""
     log = tmp_path / "net.json"
     log.write_text("")
-    drain = [False]
-
-    reset_seen = threading.Event()
+    control = TailControl()
 
-    def reader():
-        for _ in tail_follow(str(log), drain):
-            if drain[0] is False and reset_seen.is_set() is False:
-                # Check if it was True before and is now False (reset happened)
-                pass
-
-    t = threading.Thread(target=reader, daemon=True)
+    t = threading.Thread(target=lambda: next(tail_follow(str(log), control), None), daemon=True)
     t.start()
 
     time.sleep(0.2)
-    drain[0] = True
-    # Give tail_follow time to process the drain flag
+    control.pause()
+    control.resume()
     deadline = time.time() + 3
-    while time.time() < deadline:
-        if drain[0] is False:
-            reset_seen.set()
-            break
+    while time.time() < deadline and control.generation < control.wanted:
         time.sleep(0.05)
 
-    assert reset_seen.is_set(), "drain[0] was not reset to False after drain seek"
+    assert control.generation == control.wanted == 1, "generation did not catch up after resume"
+
+
+def test_tail_reader_feeds_event_loop_queue(tmp_path, monkeypatch):
+    """_start_tail_reader delivers appended lines to the asyncio.Queue on the watcher loop."""
+    log = tmp_path / "net.json"
+    log.write_text("")
+    monkeypatch.setattr("oncall.watcher.LOG_FILE", str(log))
+
+    async def _run():
+        queue: asyncio.Queue = asyncio.Queue()
+        _start_tail_reader(asyncio.get_running_loop(), queue, TailControl())
+        await asyncio.sleep(0.3)
+        with open(log, "a") as f:
+            f.write('{"msg": "line1"}\n')
+        return await asyncio.wait_for(queue.get(), timeout=5)
+
+    assert asyncio.run(_run()) == '{"msg": "line1"}'
+
+
+def test_drain_queue_discards_buffered_lines():
+    """_drain_queue empties the queue and reports how many lines were dropped."""
+    async def _run():
+        queue: asyncio.Queue = asyncio.Queue()
+        for i in range(3):
+            queue.put_nowait(f"line{i}")
+        return _drain_queue(queue), queue.empty()
+
+    assert asyncio.run(_run()) == (3, True)
+
+
+def test_paused_reader_skips_session_lines(tmp_path, monkeypatch):
+    """Nothing is queued while paused; after resume only lines written later arrive."""
+    log = tmp_path / "net.json"
+    log.write_text("")
+    monkeypatch.setattr("oncall.watcher.LOG_FILE", str(log))
+
+    async def _run():
+        queue: asyncio.Queue = asyncio.Queue()
+        control = TailControl()
+        _start_tail_reader(asyncio.get_running_loop(), queue, control)
+        await asyncio.sleep(0.3)
+        control.pause()
+        with open(log, "a") as f:
+            for i in range(50):
+                f.write(f'{{"msg": "during{i}"}}\n')
+        await asyncio.sleep(0.6)
+        queued_while_paused = queue.qsize()
+        control.resume()
+        await asyncio.sleep(0.6)  # the reader skips to EOF
+        with open(log, "a") as f:
+            f.write('{"msg": "after"}\n')
+        return queued_while_paused, await asyncio.wait_for(queue.get(), timeout=5), queue.qsize()
+
+    assert asyncio.run(_run()) == (0, '{"msg": "after"}', 0)
+
+
+def test_stale_generation_rejected():
+    """Lines read before a resume are rejected even if they reach the loop after it."""
+    control = TailControl()
+    stale = control.generation
+    assert control.is_current(stale)
+    control.pause()
+    assert not control.is_current(stale)
+    control.resume()
+    assert not control.is_current(stale)  # the reader has not skipped to EOF yet
+    control.generation = control.wanted   # as the reader does after its seek
+    assert control.is_current(control.generation)
@@ -0,0 +1,141 @@
+"""UT-032 — Block tail readers.
+
+Tests for core/file_tail.py (iter_lines_reversed, read_tail_lines, LineReader,
+inotify_open) and the watcher helpers built on it (_parse_session_cost, _read_log_tail).
+
+Validates:
+- Lines are yielded last-to-first, with lines spanning block boundaries intact
+- The empty string after a trailing newline is not yielded; inner blank lines are
+- Empty files yield nothing; a file with no trailing newline keeps its last line
+- Invalid UTF-8 is replaced rather than raising; CRLF endings are stripped
+- read_tail_lines returns the last N lines in file order
+- Cost parsing finds the final "result" line without reading the whole file
+- Cost parsing returns None when no result line is present
+- LineReader returns only complete lines, carrying partial lines across reads and chunks
+- LineReader(final=True) returns an unterminated last line
+- inotify_open's fd becomes readable when the file is written (Linux)
+"""
+import json
+import os
+import select
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.file_tail import LineReader, inotify_drain, inotify_open, iter_lines_reversed, read_tail_lines
+from oncall.watcher import _parse_session_cost, _read_log_tail
+
+
+class TestIterLinesReversed:
+    def test_lines_spanning_blocks(self, tmp_path):
+        f = tmp_path / "a.txt"
+        lines = [f"line-{i}-" + "x" * (i * 7) for i in range(20)]
+        f.write_text("\n".join(lines) + "\n")
+        assert list(iter_lines_reversed(f, block_size=16)) == lines[::-1]
+
+    def test_trailing_newline_and_inner_blank_lines(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_text("a\n\nb\n")
+        assert list(iter_lines_reversed(f, block_size=2)) == ["b", "", "a"]
+
+    def test_no_trailing_newline(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_text("a\nb")
+        assert list(iter_lines_reversed(f)) == ["b", "a"]
+
+    def test_empty_file(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_text("")
+        assert list(iter_lines_reversed(f)) == []
+
+    def test_invalid_utf8_and_crlf(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_bytes(b"ok\r\nbad \xff byte\r\n")
+        assert list(iter_lines_reversed(f)) == ["bad � byte", "ok"]
+
+
+class TestReadTailLines:
+    def test_last_n_in_file_order(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_text("\n".join(str(i) for i in range(100)) + "\n")
+        assert read_tail_lines(f, 3, block_size=8) == ["97", "98", "99"]
+
+    def test_fewer_lines_than_n(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_text("only\n")
+        assert read_tail_lines(f, 10) == ["only"]
+
+
+class TestLineReader:
+    def test_partial_line_carried_across_reads(self, tmp_path):
+        f = tmp_path / "s.tmp"
+        f.write_text("")
+        with LineReader(f, block_size=4) as reader:
+            assert reader.read_lines() == []
+            with open(f, "a") as out:
+                out.write('{"a": 1}\n{"b"')
+                out.flush()
+                assert reader.read_lines() == ['{"a": 1}']
+                out.write(': 2}\r\n\n')
+                out.flush()
+                assert reader.read_lines() == ['{"b": 2}', ""]
+                assert reader.read_lines() == []
+
+    def test_final_returns_unterminated_line(self, tmp_path):
+        f = tmp_path / "s.tmp"
+        f.write_text("x" * 100 + "\ntail")
+        with LineReader(f, block_size=8) as reader:
+            assert reader.read_lines() == ["x" * 100]
+            assert reader.read_lines(final=True) == ["tail"]
+            assert reader.read_lines(final=True) == []
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_inotify_fd_readable_on_write(tmp_path):
+    f = tmp_path / "s.tmp"
+    f.write_text("")
+    fd = inotify_open(f)
+    assert fd is not None
+    try:
+        assert select.select([fd], [], [], 0)[0] == []
+        with open(f, "a") as out:
+            out.write("x\n")
+        assert select.select([fd], [], [], 1)[0] == [fd]
+        inotify_drain(fd)
+        assert select.select([fd], [], [], 0)[0] == []
+    finally:
+        os.close(fd)
+
+
+def test_inotify_open_missing_file(tmp_path):
+    assert inotify_open(tmp_path / "missing") is None
+
+
+class TestSessionCost:
+    def test_finds_final_result_line(self, tmp_path):
+        f = tmp_path / ".session-x.tmp"
+        partials = [json.dumps({"type": "stream_event", "n": i}) for i in range(5000)]
+        result = json.dumps({"type": "result", "total_cost_usd": 0.4321})
+        f.write_text("\n".join(partials + [result]) + "\n")
+        with patch.object(Path, "read_text", side_effect=AssertionError("whole-file read")):
+            assert _parse_session_cost(f) == 0.4321
+
+    def test_no_result_line_returns_none(self, tmp_path):
+        f = tmp_path / ".session-x.tmp"
+        f.write_text('{"type": "stream_event"}\nnot json\n')
+        assert _parse_session_cost(f) is None
+
+    def test_missing_file_returns_none(self, tmp_path):
+        assert _parse_session_cost(tmp_path / "missing.tmp") is None
+
+
+def test_read_log_tail_uses_reverse_reader(tmp_path):
+    f = tmp_path / "crash.log"
+    f.write_text("\n".join(f"l{i}" for i in range(50)) + "\n")
+    with patch.object(Path, "read_text", side_effect=AssertionError("whole-file read")):
+        assert _read_log_tail(f, lines=2) == "l48\nl49"
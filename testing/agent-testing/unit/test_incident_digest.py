@@ -0,0 +1,229 @@
+"""UT-035 — Pre-computed incident digest.
+
+Tests for core/incident_digest.py (state extraction across RESTCONF JSON, Genie
+parsed and raw CLI shapes; digest rendering) and the watcher's time-budgeted
+collection (_collect_incident_digest) and prompt injection.
+
+No devices required: tool results are literal fixtures; the route lookup and the
+prefetch are patched.
+
+Validates:
+- OSPF/BGP peer state is found in RESTCONF, Genie and raw text output
+- Interface status is found in RESTCONF, Genie and raw text output
+- ECMP next-hops are reported present/MISSING from the route lookup
+- Missing or failed data renders as "?", never as a guessed state
+- Output is cut at max_chars
+- Collection returns within the time budget while the prefetch is still running
+- The digest is appended to the agent prompt inside data delimiters
+"""
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.incident_digest import build_digest, interface_status, ip_mentioned, peer_state
+
+SLA_PATH = {
+    "id": "C1C_TO_IBN",
+    "source_device": "C1C",
+    "destination_ip": "200.50.50.6",
+    "ecmp": True,
+    "ecmp_node": "C1C",
+    "ecmp_next_hops": ["E1C", "E2C"],
+    "scope_devices": ["C1C", "E1C", "E2C"],
+}
+ROUTERS = {
+    "C1C": {"direct_links": {
+        "E1C": {"local_interface": "GigabitEthernet6", "remote_ip": "10.0.0.26"},
+        "E2C": {"local_interface": "GigabitEthernet5", "remote_ip": "10.0.0.30"},
+        "A1C": {"local_interface": "GigabitEthernet2", "remote_ip": "10.1.1.5"},
+    }},
+}
+NODES = {"C1C", "E1C", "E2C"}
+
+RESTCONF_OSPF = {"Cisco-IOS-XE-ospf-oper:ospf-state": {"ospf-instance": [{"ospf-area": [{"ospf-interface": [
+    {"name": "GigabitEthernet6", "ospf-neighbor": [
+        {"neighbor-id": "5.5.5.5", "address": "10.0.0.26", "state": "ospf-nbr-full"}]},
+]}]}]}}
+GENIE_OSPF = {"interfaces": {"GigabitEthernet6": {"neighbors": {
+    "5.5.5.5": {"priority": 1, "state": "FULL/DR", "address": "10.0.0.26", "dead_time": "00:00:38"}}}}}
+RAW_OSPF = (
+    "Neighbor ID     Pri   State           Dead Time   Address         Interface\n"
+    "5.5.5.5           1   INIT/DROTHER    00:00:38    10.0.0.26       GigabitEthernet6\n"
+)
+GENIE_BGP = {"vrf": {"default": {"neighbor": {"200.50.50.2": {"address_family": {"": {"state_pfxrcd": "Idle"}}}}}}}
+RAW_BGP = "Neighbor        V           AS MsgRcvd MsgSent   TblVer  InQ OutQ Up/Down  State/PfxRcd\n" \
+          "200.50.50.2     4        65002     120     118       12    0    0 01:02:03        4\n"
+
+RESTCONF_INTF = {"ietf-interfaces:interfaces": {"interface": [
+    {"name": "GigabitEthernet6", "enabled": True}, {"name": "GigabitEthernet5", "enabled": False}]}}
+GENIE_INTF = {"interface": {"GigabitEthernet6": {"ip_address": "10.0.0.25", "status": "up", "protocol": "up"},
+                            "GigabitEthernet5": {"ip_address": "10.0.0.29",
+                                                 "status": "administratively down", "protocol": "down"}}}
+RAW_INTF = (
+    "Interface              IP-Address      OK? Method Status                Protocol\n"
+    "GigabitEthernet6       10.0.0.25       YES NVRAM  up                    up\n"
+    "GigabitEthernet5       10.0.0.29       YES NVRAM  administratively down down\n"
+)
+ROUTE_ONE_HOP = "Routing entry for 200.50.50.4/30\n  * 10.0.0.26, from 5.5.5.5, via GigabitEthernet6\n"
+
+
+def _ok(raw, parsed=None):
+    result = {"device": "C1C", "cli_style": "ios", "raw": raw}
+    if parsed is not None:
+        result["parsed"] = parsed
+    return result
+
+
+class TestPeerState:
+    @pytest.mark.parametrize("data,expected", [
+        (RESTCONF_OSPF, "FULL"), (GENIE_OSPF, "FULL"), (RAW_OSPF, "INIT"),
+    ])
+    def test_ospf_shapes(self, data, expected):
+        assert peer_state(data, "10.0.0.26") == expected
+
+    def test_bgp_genie_keyed_by_address(self):
+        assert peer_state(GENIE_BGP, "200.50.50.2") == "IDLE"
+
+    def test_bgp_raw_prefix_count_means_established(self):
+        assert peer_state(RAW_BGP, "200.50.50.2") == "ESTABLISHED"
+
+    def test_restconf_bgp_summary(self):
+        data = {"bgp-neighbor-summary": [{"id": "200.50.50.2", "state": "fsm-established"}]}
+        assert peer_state(data, "200.50.50.2") == "ESTABLISHED"
+
+    def test_absent_peer(self):
+        assert peer_state(RAW_OSPF, "10.0.0.30") is None
+        assert peer_state(RESTCONF_OSPF, "10.0.0.30") is None
+
+
+class TestInterfaceStatus:
+    def test_restconf_enabled_flag(self):
+        assert interface_status(RESTCONF_INTF, "GigabitEthernet6") == "enabled"
+        assert interface_status(RESTCONF_INTF, "GigabitEthernet5") == "disabled"
+
+    def test_genie(self):
+        assert interface_status(GENIE_INTF, "GigabitEthernet6") == "up/up"
+        assert interface_status(GENIE_INTF, "GigabitEthernet5") == "admin-down/down"
+
+    def test_raw_text(self):
+        assert interface_status(RAW_INTF, "GigabitEthernet6") == "up/up"
+        assert interface_status(RAW_INTF, "GigabitEthernet5") == "admin-down/down"
+
+    def test_not_found(self):
+        assert interface_status(RAW_INTF, "GigabitEthernet9") is None
+
+
+class TestIpMentioned:
+    def test_whole_address_only(self):
+        assert ip_mentioned(ROUTE_ONE_HOP, "10.0.0.26")
+        assert not ip_mentioned(ROUTE_ONE_HOP, "10.0.0.2")
+        assert not ip_mentioned("via 110.0.0.26", "10.0.0.26")
+
+    def test_nested_structures(self):
+        assert ip_mentioned({"fib-nexthop-entries": [{"nh-addr": "10.0.0.30"}]}, "10.0.0.30")
+
+
+class TestBuildDigest:
+    def test_links_adjacency_and_ecmp(self):
+        state = {"C1C": {
+            "ospf_neighbors": _ok(RAW_OSPF, GENIE_OSPF),
+            "interfaces": _ok(RAW_INTF),
+        }}
+        digest = build_digest(SLA_PATH, ROUTERS, NODES, state, _ok(ROUTE_ONE_HOP))
+        assert "C1C GigabitEthernet6 → E1C (10.0.0.26): intf up/up, OSPF FULL" in digest
+        assert "C1C GigabitEthernet5 → E2C (10.0.0.30): intf admin-down/down, no OSPF neighbor, BGP ?" in digest
+        assert "A1C" not in digest  # off-path link
+        assert "ECMP next-hops at C1C toward 200.50.50.6: E1C present, E2C MISSING" in digest
+
+    def test_missing_data_is_unknown(self):
+        state = {"C1C": {"interfaces": {"device": "C1C", "error": "timeout"}}}
+        digest = build_digest(SLA_PATH, ROUTERS, NODES, state, None)
+        assert "C1C GigabitEthernet6 → E1C (10.0.0.26): intf ?, OSPF ?, BGP ?" in digest
+        assert "E1C ?, E2C ?" in digest
+
+    def test_truncated_at_max_chars(self):
+        full = build_digest(SLA_PATH, ROUTERS, NODES, {}, None)
+        for max_chars in (30, 80, 120, len(full) - 1):
+            digest = build_digest(SLA_PATH, ROUTERS, NODES, {}, None, max_chars=max_chars)
+            assert len(digest) <= max_chars
+            assert digest.endswith("(digest truncated)")
+
+    def test_exact_fit_not_truncated(self):
+        full = build_digest(SLA_PATH, ROUTERS, NODES, {}, None)
+        assert build_digest(SLA_PATH, ROUTERS, NODES, {}, None, max_chars=len(full)) == full
+
+    def test_empty_without_links_or_ecmp(self):
+        assert build_digest({"id": "x"}, {}, {"C1C"}, {}) == ""
+
+
+class TestWatcherDigest:
+    def test_collection_respects_budget(self, monkeypatch):
+        import oncall.watcher as watcher
+
+        monkeypatch.setenv("INCIDENT_DIGEST_BUDGET_SECONDS", "0.2")
+        monkeypatch.setattr(watcher, "load_sla_paths", lambda: [SLA_PATH])
+        monkeypatch.setattr(watcher, "load_intent_routers", lambda: ROUTERS)
+        monkeypatch.setattr(watcher, "_lookup_ecmp_route", AsyncMock(return_value=_ok(ROUTE_ONE_HOP)))
+
+        async def _run():
+            results = {"C1C": {"interfaces": _ok(RAW_INTF)}}
+            slow = asyncio.create_task(asyncio.sleep(30))
+            start = time.monotonic()
+            digest = await watcher._collect_incident_digest("C1C", (slow, results))
+            elapsed = time.monotonic() - start
+            assert not slow.done()  # the prefetch keeps filling the cache
+            slow.cancel()
+            return digest, elapsed
+
+        digest, elapsed = asyncio.run(_run())
+        assert elapsed < 2
+        assert "intf up/up, OSPF ?, BGP ?" in digest
+        assert "E1C present, E2C MISSING" in digest
+
+    def test_digest_appended_to_prompt(self, tmp_path, monkeypatch):
+        import oncall.watcher as watcher
+
+        data = tmp_path / "data"
+        data.mkdir()
+        monkeypatch.setattr(watcher, "PROJECT_DIR", tmp_path)
+        monkeypatch.setattr(watcher, "LOGS_DIR", tmp_path / "logs")
+        monkeypatch.setattr(watcher, "LOCK_FILE", tmp_path / "oncall.lock")
+        monkeypatch.setattr(watcher, "STOP_FILE", data / "stop_session")
+        monkeypatch.setattr(watcher, "DASHBOARD_STATE_FILE", data / "dashboard_state.json")
+        monkeypatch.setattr(watcher, "SESSION_TICKET_FILE", data / "session_ticket.json")
+        monkeypatch.setattr(watcher, "LOG_FILE", str(tmp_path / "network.json"))
+        monkeypatch.setattr(watcher, "notify_operator", lambda name: None)
+        monkeypatch.setattr(watcher, "_collect_incident_digest",
+                            AsyncMock(return_value="  ECMP next-hops at C1C toward 200.50.50.6: E1C present"))
+        launched = {}
+
+        async def fake_tmux(*args, **kwargs):
+            if args[0] == "new-session":
+                launched["cmd"] = args[-1]
+            return subprocess.CompletedProcess(args, 0, stdout="", stderr="")
+
+        async def _run():
+            prefetch = (asyncio.create_task(asyncio.sleep(0)), {})
+            await watcher.invoke_claude(
+                {"ts": "2026-03-01T07:00:00Z", "device": "172.20.20.207",
+                 "msg": "%TRACK-6-STATE: 1 ip sla 1 reachability Up -> Down"},
+                {"172.20.20.207": "C1C"}, prefetch=prefetch,
+            )
+
+        with patch.object(watcher, "_tmux", side_effect=fake_tmux), \
+             patch.object(watcher, "_wait_for_tmux_process_exit", new=AsyncMock(return_value=(0, False))), \
+             patch.object(watcher.jira_client, "_is_configured", return_value=False), \
+             patch.object(watcher.discord_approval, "post_investigation_started", new=AsyncMock()), \
+             patch.object(watcher, "_post_discord_session_notification", new=AsyncMock()):
+            asyncio.run(_run())
+
+        assert "BEGIN DEVICE STATE DIGEST" in launched["cmd"]
+        assert "E1C present" in launched["cmd"]
@@ -0,0 +1,168 @@
+"""UT-036 — IP → device reverse index.
+
+Tests for core/ip_index.py and its consumers: traceroute hop annotation
+(tools/operational.py) and tool-result host labels in dashboard/ws_bridge.py.
+
+No devices required: inventory and INTENT data are literal fixtures; the index
+file lives under tmp_path.
+
+Validates:
+- Management and both direct_link ends resolve exactly, with interface names
+- A device's own interface name wins over the far-side view
+- Addresses inside a link subnet resolve to the link (longest prefix wins)
+- Unknown and malformed addresses return None
+- annotate() labels every resolvable address once, in order
+- write_index/load_index round trip, with reload on file change
+- get_index() rebuilds when INTENT.json changes
+- traceroute results carry hop_devices
+- Dashboard tool_result events carry host labels when the index file exists
+"""
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core import ip_index
+from core.ip_index import IpIndex, build_index, label
+
+DEVICES = {
+    "C1C": {"host": "172.20.20.207", "transport": "restconf", "cli_style": "ios"},
+    "E1C": {"host": "172.20.20.209", "transport": "restconf", "cli_style": "ios"},
+}
+ROUTERS = {
+    "C1C": {"direct_links": {
+        "E1C": {"local_interface": "GigabitEthernet6", "local_ip": "10.0.0.25",
+                "remote_ip": "10.0.0.26", "subnet": "10.0.0.24/30"},
+    }},
+    "E1C": {"direct_links": {
+        "C1C": {"local_interface": "GigabitEthernet2", "local_ip": "10.0.0.26",
+                "remote_ip": "10.0.0.25", "subnet": "10.0.0.24/30"},
+        "IBN": {"local_interface": "GigabitEthernet4", "local_ip": "200.50.50.1",
+                "remote_ip": "200.50.50.2", "subnet": "200.50.50.0/30"},
+    }},
+}
+
+
+@pytest.fixture
+def index():
+    return build_index(DEVICES, ROUTERS)
+
+
+class TestLookup:
+    def test_management_host(self, index):
+        assert index.lookup("172.20.20.207") == {"device": "C1C", "interface": None, "kind": "mgmt"}
+
+    def test_interface_addresses(self, index):
+        assert label(index.lookup("10.0.0.25")) == "C1C GigabitEthernet6"
+        assert label(index.lookup("10.0.0.26")) == "E1C GigabitEthernet2"
+
+    def test_far_side_only_device(self, index):
+        """IBN has no INTENT entry of its own — its address is known from E1C's link."""
+        assert label(index.lookup("200.50.50.2")) == "IBN"
+
+    def test_subnet_match(self, index):
+        assert label(index.lookup("10.0.0.24")) == "C1C–E1C link 10.0.0.24/30"
+
+    def test_longest_prefix_wins(self):
+        idx = IpIndex()
+        idx.add_subnet("10.0.0.0/16", {"subnet": "10.0.0.0/16", "devices": ["A", "B"]})
+        idx.add_subnet("10.0.0.24/30", {"subnet": "10.0.0.24/30", "devices": ["C", "D"]})
+        assert idx.lookup("10.0.0.27")["devices"] == ["C", "D"]
+        assert idx.lookup("10.0.9.1")["devices"] == ["A", "B"]
+
+    def test_unknown_and_malformed(self, index):
+        assert index.lookup("192.0.2.1") is None
+        assert index.lookup("not-an-ip") is None
+
+    def test_device_map_covers_all_hosts(self, index):
+        dm = index.device_map()
+        assert dm["172.20.20.209"] == "E1C"
+        assert dm["10.0.0.26"] == "E1C"
+        assert dm["200.50.50.2"] == "IBN"
+
+
+class TestAnnotate:
+    def test_traceroute_text(self, index):
+        text = (
+            "Tracing the route to 200.50.50.2\n"
+            "  1 10.0.0.26 2 msec 1 msec 1 msec\n"
+            "  2 200.50.50.2 3 msec *  2 msec\n"
+            "  3 192.0.2.9 5 msec\n"
+        )
+        assert index.annotate(text) == {"200.50.50.2": "IBN", "10.0.0.26": "E1C GigabitEthernet2"}
+
+    def test_non_text(self, index):
+        assert index.annotate({"raw": "10.0.0.26"}) == {}
+
+
+class TestPersistence:
+    def test_round_trip_and_reload(self, index, tmp_path):
+        path = tmp_path / "ip_index.json"
+        ip_index.write_index(index, path)
+        loaded = ip_index.load_index(path)
+        assert loaded.lookup("10.0.0.24")["devices"] == ["C1C", "E1C"]
+        assert loaded.hosts == index.hosts
+
+        ip_index.write_index(IpIndex({"1.2.3.4": {"device": "X", "interface": None, "kind": "mgmt"}}), path)
+        os.utime(path, (1, 1))  # force a distinct mtime
+        assert ip_index.load_index(path).lookup("1.2.3.4")["device"] == "X"
+
+    def test_missing_file(self, tmp_path):
+        assert ip_index.load_index(tmp_path / "nope.json") is None
+
+    def test_get_index_rebuilds_on_intent_change(self, tmp_path, monkeypatch):
+        intent = tmp_path / "INTENT.json"
+        intent.write_text(json.dumps({"routers": {}}))
+        os.utime(intent, (1, 1))
+        monkeypatch.setattr(ip_index, "INTENT_FILE", intent)
+        monkeypatch.setattr(ip_index, "_cached", None)
+        monkeypatch.setattr("core.inventory.devices", DEVICES)
+        assert ip_index.get_index().lookup("10.0.0.25") is None
+
+        intent.write_text(json.dumps({"routers": ROUTERS}))
+        os.utime(intent, (2, 2))
+        assert label(ip_index.get_index().lookup("10.0.0.25")) == "C1C GigabitEthernet6"
+
+
+class TestConsumers:
+    def test_traceroute_hop_devices(self, index):
+        from input_models.models import TracerouteInput
+        from tools import operational
+
+        raw = "  1 10.0.0.26 2 msec\n  2 200.50.50.2 3 msec\n"
+        with patch.object(operational, "devices", DEVICES), \
+             patch.object(operational, "execute_command",
+                          new=AsyncMock(return_value={"device": "C1C", "cli_style": "ios", "raw": raw})), \
+             patch.object(operational.ip_index, "get_index", return_value=index):
+            result = asyncio.run(operational.traceroute(TracerouteInput(device="C1C", destination="200.50.50.2")))
+        assert result["hop_devices"] == {"10.0.0.26": "E1C GigabitEthernet2", "200.50.50.2": "IBN"}
+
+    def test_dashboard_tool_result_hosts(self, index, tmp_path, monkeypatch):
+        import dashboard.ws_bridge as bridge
+
+        path = tmp_path / "ip_index.json"
+        ip_index.write_index(index, path)
+        monkeypatch.setattr(ip_index, "INDEX_FILE", path)
+        line = json.dumps({"type": "stream_event", "event": {
+            "type": "content_block_start",
+            "content_block": {"type": "tool_result", "tool_use_id": "t1", "content": "via 10.0.0.26"},
+        }})
+        events = bridge.parse_ndjson_line(line)
+        assert events[0]["hosts"] == {"10.0.0.26": "E1C GigabitEthernet2"}
+
+    def test_dashboard_without_index(self, tmp_path, monkeypatch):
+        import dashboard.ws_bridge as bridge
+
+        monkeypatch.setattr(ip_index, "INDEX_FILE", tmp_path / "absent.json")
+        line = json.dumps({"type": "stream_event", "event": {
+            "type": "content_block_start",
+            "content_block": {"type": "tool_result", "tool_use_id": "t1", "content": "via 10.0.0.26"},
+        }})
+        assert "hosts" not in bridge.parse_ndjson_line(line)[0]
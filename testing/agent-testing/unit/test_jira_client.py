@@ -21,6 +21,7 @@ Validates:
 - resolve_issue falls back to comment-only when no matching transition
 - resolve_issue falls back to comment-only when transition GET fails
 - resolve_issue skips when not configured
+- Calls on the same event loop share one pooled ClientSession; close() releases it
 """
 import asyncio
 import json
@@ -33,6 +34,7 @@ import pytest
 PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+from core import jira_client
 from core.jira_client import _is_configured, _to_adf, create_issue, add_comment, resolve_issue
 
 
@@ -210,10 +212,9 @@ class TestCreateIssue:
         import aiohttp as _aiohttp
         with patch("core.jira_client._is_configured", return_value=True), \
              patch("aiohttp.ClientSession") as MockSession:
-            MockSession.return_value.__aenter__ = AsyncMock(
+            MockSession.return_value.post = MagicMock(
                 side_effect=_aiohttp.ClientError("connection refused")
             )
-            MockSession.return_value.__aexit__ = AsyncMock(return_value=False)
             result = run(create_issue("SLA Failure", "desc"))
         assert result is None
 
@@ -434,3 +435,34 @@ class TestResolveIssue:
              patch("aiohttp.ClientSession") as MockSession:
             run(resolve_issue("SUP-1", "comment"))
             MockSession.assert_not_called()
+
+
+# ── Session pooling ────────────────────────────────────────────────────────────
+
+class TestSessionPooling:
+    def test_calls_on_one_loop_share_a_session(self, monkeypatch):
+        _jira_env(monkeypatch)
+        session = _make_mock_session(status_201=True)
+        session.close = AsyncMock()
+
+        async def _two_calls():
+            await create_issue("SLA Failure", "desc")
+            await add_comment("SUP-1", "note")
+            await jira_client.close()
+
+        with patch("core.jira_client._is_configured", return_value=True), \
+             patch("aiohttp.ClientSession", return_value=session) as MockSession:
+            run(_two_calls())
+
+        assert MockSession.call_count == 1
+        assert session.post.call_count == 2
+        session.close.assert_awaited_once()
+
+    def test_new_event_loop_gets_new_session(self, monkeypatch):
+        _jira_env(monkeypatch)
+        session = _make_mock_session(status_201=True)
+        with patch("core.jira_client._is_configured", return_value=True), \
+             patch("aiohttp.ClientSession", return_value=session) as MockSession:
+            run(create_issue("SLA Failure", "desc"))
+            run(create_issue("SLA Failure", "desc"))
+        assert MockSession.call_count == 2
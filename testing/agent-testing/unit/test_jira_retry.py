@@ -0,0 +1,244 @@
+"""UT-042 — Jira client retry, batched comments and latency stats.
+
+Tests for the retry/batching layer of core/jira_client.py (_request, add_comments,
+stats) and the outbox's batching of queued Jira comments.
+
+A local aiohttp server plays Jira: it records every request and answers with
+scripted statuses (or stalls) before falling back to success. JIRA_BASE_URL points
+at it; no Jira instance or network access required.
+
+Validates:
+- A transition lookup is retried on 503 and on a read timeout
+- Retry-After on a 429 is honoured
+- create_issue and add_comment are retried on 503 but never on 500/502/504 (no duplicates)
+- Retries stop after JIRA_MAX_RETRIES and the failure is reported
+- A comment answered by a 502/504 or a read timeout raises DeliveryUncertain, and the
+  outbox parks it instead of posting it again
+- add_comments posts several bodies as one comment, split only above the size limit
+- stats() reports calls, errors, retries and latency per operation
+- Consecutive outbox comments for one issue are delivered in a single request
+- The outbox folds no more than one request's worth, so a failed request is retried
+  without reposting comments that already went through
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core import jira_client, outbox
+from core.delivery import DeliveryUncertain
+
+
+class FakeJira:
+    """Answers with the scripted statuses first (a float stalls that long), then succeeds."""
+
+    def __init__(self, script=(), retry_after=None):
+        self.script = list(script)
+        self.retry_after = retry_after
+        self.requests = []  # (time, method, path, json)
+
+    async def handle(self, request):
+        body = await request.json() if request.can_read_body else None
+        self.requests.append((time.monotonic(), request.method, request.path, body))
+        if self.script:
+            step = self.script.pop(0)
+            if isinstance(step, float):
+                await asyncio.sleep(step)
+            else:
+                headers = {"Retry-After": self.retry_after} if self.retry_after else {}
+                return web.json_response({"errorMessages": ["scripted"]}, status=step, headers=headers)
+        if request.path.endswith("/transitions") and request.method == "GET":
+            return web.json_response({"transitions": [{"id": "31", "name": "Done"}]})
+        if request.path.endswith("/transitions"):
+            return web.Response(status=204)
+        if request.path.endswith("/issue"):
+            return web.json_response({"key": "SUP-1"}, status=201)
+        return web.json_response({"id": "c1"}, status=201)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self.handle)
+        return app
+
+
+@pytest.fixture(autouse=True)
+def _jira_env(monkeypatch):
+    monkeypatch.setenv("JIRA_EMAIL", "a@b.c")
+    monkeypatch.setenv("JIRA_API_TOKEN", "tok")
+    monkeypatch.setenv("JIRA_PROJECT_KEY", "SUP")
+    monkeypatch.setattr(jira_client, "RETRY_BACKOFF_SECONDS", 0.01)
+    monkeypatch.setattr(jira_client, "_stats", {})
+
+
+def _run(fake, coro_fn, monkeypatch):
+    async def _main():
+        server = TestServer(fake.app())
+        await server.start_server()
+        monkeypatch.setenv("JIRA_BASE_URL", str(server.make_url("")))
+        try:
+            return await asyncio.wait_for(coro_fn(), timeout=10)
+        finally:
+            await jira_client.close()
+            await server.close()
+
+    return asyncio.run(_main())
+
+
+def _methods(fake):
+    return [(method, path.rsplit("/", 1)[-1]) for _, method, path, _ in fake.requests]
+
+
+class TestRetry:
+    def test_transition_lookup_retried_on_503(self, monkeypatch):
+        fake = FakeJira(script=[503])
+        _run(fake, lambda: jira_client.resolve_issue("SUP-1", "fixed"), monkeypatch)
+        assert _methods(fake) == [("GET", "transitions"), ("GET", "transitions"),
+                                  ("POST", "transitions"), ("POST", "comment")]
+
+    def test_transition_lookup_retried_on_timeout(self, monkeypatch):
+        monkeypatch.setattr(jira_client, "_JIRA_TIMEOUT", aiohttp.ClientTimeout(total=0.2))
+        fake = FakeJira(script=[1.0])
+        _run(fake, lambda: jira_client.resolve_issue("SUP-1", "fixed"), monkeypatch)
+        assert _methods(fake)[:3] == [("GET", "transitions"), ("GET", "transitions"), ("POST", "transitions")]
+
+    def test_retry_after_honoured(self, monkeypatch):
+        fake = FakeJira(script=[429], retry_after="0.3")
+        assert _run(fake, lambda: jira_client.add_comment("SUP-1", "x"), monkeypatch) is True
+        times = [t for t, *_ in fake.requests]
+        assert times[1] - times[0] >= 0.25
+
+    def test_create_retried_on_503(self, monkeypatch):
+        fake = FakeJira(script=[503])
+        key = _run(fake, lambda: jira_client.create_issue("s", "d"), monkeypatch)
+        assert key == "SUP-1" and len(fake.requests) == 2
+
+    def test_post_not_retried_on_500(self, monkeypatch):
+        fake = FakeJira(script=[500])
+        assert _run(fake, lambda: jira_client.add_comment("SUP-1", "x"), monkeypatch) is False
+        assert len(fake.requests) == 1
+
+    def test_create_not_retried_on_gateway_timeout(self, monkeypatch):
+        fake = FakeJira(script=[504])
+        assert _run(fake, lambda: jira_client.create_issue("s", "d"), monkeypatch) is None
+        assert len(fake.requests) == 1
+
+    def test_comment_gateway_timeout_uncertain(self, monkeypatch):
+        fake = FakeJira(script=[504])
+        with pytest.raises(DeliveryUncertain, match="504"):
+            _run(fake, lambda: jira_client.add_comment("SUP-1", "x"), monkeypatch)
+        assert len(fake.requests) == 1
+
+    def test_comment_read_timeout_uncertain(self, monkeypatch):
+        monkeypatch.setattr(jira_client, "_JIRA_TIMEOUT", aiohttp.ClientTimeout(total=0.2))
+        fake = FakeJira(script=[1.0])
+        with pytest.raises(DeliveryUncertain):
+            _run(fake, lambda: jira_client.add_comment("SUP-1", "x"), monkeypatch)
+        assert len(fake.requests) == 1
+
+    def test_transition_lookup_retried_on_502(self, monkeypatch):
+        fake = FakeJira(script=[502])
+        _run(fake, lambda: jira_client.resolve_issue("SUP-1", "fixed"), monkeypatch)
+        assert _methods(fake)[:2] == [("GET", "transitions"), ("GET", "transitions")]
+
+    def test_retries_bounded(self, monkeypatch):
+        monkeypatch.setenv("JIRA_MAX_RETRIES", "1")
+        fake = FakeJira(script=[503, 503, 503])
+        assert _run(fake, lambda: jira_client.add_comment("SUP-1", "x"), monkeypatch) is False
+        assert len(fake.requests) == 2
+
+
+class TestBatching:
+    def test_one_request_for_several_bodies(self, monkeypatch):
+        fake = FakeJira()
+        assert _run(fake, lambda: jira_client.add_comments("SUP-1", ["a", "b", "c"]), monkeypatch) is True
+        assert len(fake.requests) == 1
+        content = fake.requests[0][3]["body"]["content"]
+        assert [node["type"] for node in content] == ["paragraph", "rule", "paragraph", "rule", "paragraph"]
+
+    def test_split_above_size_limit(self, monkeypatch):
+        monkeypatch.setattr(jira_client, "_COMMENT_BATCH_CHARS", 10)
+        fake = FakeJira()
+        assert _run(fake, lambda: jira_client.add_comments("SUP-1", ["aaaa", "bbbb", "cccc"]), monkeypatch) is True
+        assert len(fake.requests) == 2
+
+    def test_stats(self, monkeypatch):
+        fake = FakeJira(script=[503])
+
+        async def _go():
+            await jira_client.add_comment("SUP-1", "x")
+            await jira_client.add_comment("SUP-1", "y")
+            return jira_client.stats()
+
+        stats = _run(fake, _go, monkeypatch)["add_comment"]
+        assert (stats["calls"], stats["errors"], stats["retries"]) == (2, 0, 1)
+        assert 0 < stats["p50_ms"] <= stats["p95_ms"] <= stats["max_ms"]
+
+
+class TestOutboxBatching:
+    def test_queued_comments_delivered_together(self, monkeypatch, tmp_path):
+        fake = FakeJira()
+
+        async def _go():
+            box = outbox.Outbox(tmp_path / "outbox.db")
+            for text in ("first", "second", "third"):
+                box.enqueue("jira_client.add_comment", "jira:SUP-1", {"issue_key": "SUP-1", "comment_text": text})
+            box.enqueue("jira_client.add_comment", "jira:SUP-1", {"issue_key": "SUP-1", "comment_text": "again"},
+                        key="k")
+            runner = asyncio.create_task(box.run())
+            while box.pending():
+                await asyncio.sleep(0.01)
+            runner.cancel()
+            await box.close()
+
+        _run(fake, _go, monkeypatch)
+        assert len(fake.requests) == 1
+        texts = [node["content"][0]["text"] for node in fake.requests[0][3]["body"]["content"]
+                 if node["type"] == "paragraph"]
+        assert texts == ["first", "second", "third", "again"]
+
+    def test_partial_failure_not_reposted(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(jira_client, "_COMMENT_BATCH_CHARS", 10)
+        monkeypatch.setattr(outbox, "RETRY_BASE_SECONDS", 0.01)
+        fake = FakeJira(script=[201, 500])  # the second POST fails
+
+        async def _go():
+            box = outbox.Outbox(tmp_path / "outbox.db")
+            for text in ("aaaa", "bbbb", "cccc"):
+                box.enqueue("jira_client.add_comment", "jira:SUP-1", {"issue_key": "SUP-1", "comment_text": text})
+            runner = asyncio.create_task(box.run())
+            while box.pending():
+                await asyncio.sleep(0.01)
+            runner.cancel()
+            await box.close()
+
+        _run(fake, _go, monkeypatch)
+        posts = [[node["content"][0]["text"] for node in body["body"]["content"] if node["type"] == "paragraph"]
+                 for *_, body in fake.requests]
+        assert posts == [["aaaa", "bbbb"], ["cccc"], ["cccc"]]
+
+    def test_uncertain_comment_parked_not_reposted(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(outbox, "RETRY_BASE_SECONDS", 0.01)
+        fake = FakeJira(script=[502])
+
+        async def _go():
+            box = outbox.Outbox(tmp_path / "outbox.db")
+            box.enqueue("jira_client.add_comment", "jira:SUP-1", {"issue_key": "SUP-1", "comment_text": "once"})
+            runner = asyncio.create_task(box.run())
+            while box.pending():
+                await asyncio.sleep(0.01)
+            runner.cancel()
+            dead = box.dead()
+            await box.close()
+            return dead
+
+        dead = _run(fake, _go, monkeypatch)
+        assert len(fake.requests) == 1
+        assert len(dead) == 1 and "DeliveryUncertain" in dead[0]["last_error"]
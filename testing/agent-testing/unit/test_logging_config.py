@@ -10,11 +10,17 @@ Validates:
 - setup_logging() respects LOG_LEVEL env var
 - setup_watcher_logging() adds a RotatingFileHandler to ainoc.watcher
 - setup_watcher_logging() is idempotent (second call adds no duplicate handler)
+- Handlers sit behind a queue: records are formatted and written on the listener thread
+- Records queued before stop_logging() are all written, with their extras and tracebacks
+- The JSON encoder falls back to json when the fast encoder rejects a field
+- DebugRateLimit caps DEBUG records per second for a logger and its children, reports
+  the suppressed count, and never drops INFO and above
 """
 import json
 import logging
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+from logging.handlers import QueueHandler, RotatingFileHandler
 from pathlib import Path
 
 import pytest
@@ -22,7 +28,8 @@ import pytest
 PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from core.logging_config import JSONFormatter, setup_logging, setup_watcher_logging
+from core import logging_config
+from core.logging_config import DebugRateLimit, JSONFormatter, setup_logging, setup_watcher_logging, stop_logging
 
 
 def _fresh_logger(name: str) -> logging.Logger:
@@ -34,6 +41,15 @@ def _fresh_logger(name: str) -> logging.Logger:
     return log
 
 
+def _file_handlers(log: logging.Logger) -> list:
+    """RotatingFileHandlers attached to log, directly or behind a QueueHandler's listener."""
+    found = []
+    for h in log.handlers:
+        listener = getattr(h, "listener", None)
+        found += [u for u in (listener.handlers if listener else (h,)) if isinstance(u, RotatingFileHandler)]
+    return found
+
+
 # ── JSONFormatter ──────────────────────────────────────────────────────────────
 
 class TestJSONFormatter:
@@ -103,6 +119,101 @@ class TestJSONFormatter:
         assert ts.endswith("Z")
         assert "T" in ts
 
+    def test_timestamp_cache_tracks_seconds(self):
+        fmt = JSONFormatter()
+        first = self._make_record()
+        first.created, first.msecs = 1772349965.065, 65.0
+        second = self._make_record()
+        second.created, second.msecs = 1772349966.5, 500.0
+        assert json.loads(fmt.format(first))["ts"] == "2026-03-01T07:26:05.065Z"
+        assert json.loads(fmt.format(second))["ts"] == "2026-03-01T07:26:06.500Z"
+
+    def test_fast_encoder_fallback(self, monkeypatch):
+        class Rejecting:
+            @staticmethod
+            def dumps(entry, default=None):
+                raise TypeError("Dict key must be str")
+
+        monkeypatch.setattr(logging_config, "_ORJSON_AVAILABLE", True)
+        monkeypatch.setattr(logging_config, "orjson", Rejecting, raising=False)
+        record = self._make_record(counts={1: "x"})
+        parsed = json.loads(JSONFormatter().format(record))
+        assert parsed["counts"] == {"1": "x"}
+
+
+# ── Queued pipeline ────────────────────────────────────────────────────────────
+
+class TestQueuedPipeline:
+    def setup_method(self):
+        _fresh_logger("ainoc")
+
+    def teardown_method(self):
+        stop_logging()
+        _fresh_logger("ainoc")
+
+    def test_written_on_listener_thread(self, monkeypatch):
+        writers = []
+
+        class Recording(logging.Handler):
+            def emit(self, record):
+                writers.append((threading.current_thread(), self.format(record)))
+
+        monkeypatch.setattr(logging, "StreamHandler", Recording)
+        monkeypatch.setenv("LOG_FORMAT", "json")
+        setup_logging()
+        root = logging.getLogger("ainoc")
+        assert isinstance(root.handlers[0], QueueHandler)
+
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("ainoc.test").exception("failed %s", "here", extra={"device": "A1C"})
+        stop_logging()
+
+        (thread, line), = writers
+        assert thread is not threading.current_thread()
+        parsed = json.loads(line)
+        assert parsed["msg"] == "failed here" and parsed["device"] == "A1C"
+        assert "ValueError: boom" in parsed["exc"]
+
+    def test_log_async_off(self, monkeypatch):
+        monkeypatch.setenv("LOG_ASYNC", "0")
+        setup_logging()
+        assert type(logging.getLogger("ainoc").handlers[0]) is logging.StreamHandler
+
+
+# ── DebugRateLimit ─────────────────────────────────────────────────────────────
+
+class TestDebugRateLimit:
+    def _record(self, name, created, level=logging.DEBUG):
+        record = logging.LogRecord(name=name, level=level, pathname="x.py", lineno=1,
+                                   msg="m", args=(), exc_info=None)
+        record.created = created
+        return record
+
+    def test_caps_per_second_and_reports_suppressed(self):
+        limit = DebugRateLimit({"ainoc.transport.ssh": 2})
+        passed = [limit.filter(self._record("ainoc.transport.ssh", 100.0 + i * 0.1)) for i in range(5)]
+        assert passed == [True, True, False, False, False]
+        later = self._record("ainoc.transport.ssh", 101.2)
+        assert limit.filter(later) is True
+        assert later.suppressed == 3
+
+    def test_children_limited_others_not(self):
+        limit = DebugRateLimit({"ainoc.transport": 1})
+        assert limit.filter(self._record("ainoc.transport.ssh", 100.0))
+        assert not limit.filter(self._record("ainoc.transport.restconf", 100.1))
+        assert all(limit.filter(self._record("ainoc.watcher", 100.0)) for _ in range(5))
+
+    def test_info_never_dropped(self):
+        limit = DebugRateLimit({"ainoc.transport.ssh": 0})
+        assert limit.filter(self._record("ainoc.transport.ssh", 100.0, level=logging.INFO))
+        assert not limit.filter(self._record("ainoc.transport.ssh", 100.0))
+
+    def test_configured_from_env(self, monkeypatch):
+        monkeypatch.setenv("LOG_DEBUG_RATE_LIMITS", "ainoc.transport.ssh=5, bad, ainoc.tools=x,ainoc.vault=1")
+        assert logging_config._debug_rate_limits() == {"ainoc.transport.ssh": 5.0, "ainoc.vault": 1.0}
+
 
 # ── setup_logging ──────────────────────────────────────────────────────────────
 
@@ -156,8 +267,7 @@ class TestSetupWatcherLogging:
         log_file = tmp_path / "watcher.log"
         setup_watcher_logging(log_file)
         watcher_log = logging.getLogger("ainoc.watcher")
-        file_handlers = [h for h in watcher_log.handlers if isinstance(h, RotatingFileHandler)]
-        assert len(file_handlers) == 1
+        assert len(_file_handlers(watcher_log)) == 1
 
     def test_creates_parent_directory(self, tmp_path):
         log_file = tmp_path / "logs" / "watcher.log"
@@ -170,5 +280,4 @@ class TestSetupWatcherLogging:
         setup_watcher_logging(log_file)
         setup_watcher_logging(log_file)  # Second call must be a no-op
         watcher_log = logging.getLogger("ainoc.watcher")
-        file_handlers = [h for h in watcher_log.handlers if isinstance(h, RotatingFileHandler)]
-        assert len(file_handlers) == 1
+        assert len(_file_handlers(watcher_log)) == 1
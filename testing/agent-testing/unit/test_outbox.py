@@ -0,0 +1,222 @@
+"""UT-041 — Durable notification outbox.
+
+Tests for core/outbox.py and the watcher's use of it for Jira comments and Discord
+notifications.
+
+The database lives under tmp_path; delivery targets are fake coroutines registered
+in place of jira_client/discord_approval. No Jira or Discord required.
+
+Validates:
+- Idempotency keys: a repeated key (explicit or payload-derived) is stored once
+- Entries in a stream are delivered in order; other streams are not held back
+- A failure (exception or False) is retried with backoff and keeps its stream's order
+- An entry is parked as dead after OUTBOX_MAX_ATTEMPTS and its stream moves on
+- An entry whose outcome is unknown (DeliveryUncertain) is parked at once, never resent
+- Undelivered entries survive a restart and are delivered by the next dispatcher
+- submit() calls the target directly when no dispatcher is running
+- With the dispatcher running, the watcher's session notification returns without waiting on Discord
+"""
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core import outbox
+from core.delivery import DeliveryUncertain
+from core.outbox import Outbox
+
+
+class FakeTarget:
+    """Records deliveries; fail_times[name] failures before succeeding, optional delay."""
+
+    def __init__(self, fail_times=None, delay=0.0):
+        self.fail_times = dict(fail_times or {})
+        self.delay = delay
+        self.delivered = []
+
+    async def send(self, name, fail_with=False):
+        await asyncio.sleep(self.delay)
+        if self.fail_times.get(name, 0) > 0:
+            self.fail_times[name] -= 1
+            if fail_with == "uncertain":
+                raise DeliveryUncertain("read timeout")
+            if fail_with:
+                raise ConnectionError("API down")
+            return False
+        self.delivered.append(name)
+        return True
+
+
+@pytest.fixture
+def target(monkeypatch, tmp_path):
+    fake = FakeTarget()
+    monkeypatch.setattr(outbox, "_TARGETS", {"fake": SimpleNamespace(send=fake.send)})
+    monkeypatch.setattr(outbox, "RETRY_BASE_SECONDS", 0.01)
+    monkeypatch.setenv("OUTBOX_DB", str(tmp_path / "outbox.db"))
+    return fake
+
+
+async def _until(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def _with_outbox(coro_fn):
+    async def _main():
+        box = outbox.start()
+        try:
+            return await coro_fn(box)
+        finally:
+            await outbox.stop(drain_timeout=1)
+
+    return asyncio.run(_main())
+
+
+class TestEnqueue:
+    def test_idempotency_keys(self, target, tmp_path):
+        async def _go():
+            box = Outbox(tmp_path / "o.db")
+            results = [
+                box.enqueue("fake.send", "s", {"name": "a"}, key="k1"),
+                box.enqueue("fake.send", "s", {"name": "b"}, key="k1"),
+                box.enqueue("fake.send", "s", {"name": "c"}),
+                box.enqueue("fake.send", "s", {"name": "c"}),
+            ]
+            pending = box.pending()
+            await box.close()
+            return results, pending
+
+        assert asyncio.run(_go()) == ([True, False, True, False], 2)
+
+    def test_direct_call_without_dispatcher(self, target):
+        result = asyncio.run(outbox.submit("fake.send", stream="s", name="x"))
+        assert result is True
+        assert target.delivered == ["x"]
+
+    def test_unknown_kind(self):
+        with pytest.raises(LookupError):
+            asyncio.run(outbox.submit("nope.send", stream="s"))
+
+
+class TestDispatcher:
+    def test_order_within_stream(self, target):
+        async def _go(box):
+            for name in ("a1", "a2", "a3"):
+                await outbox.submit("fake.send", stream="A", name=name)
+            await _until(lambda: len(target.delivered) == 3)
+
+        _with_outbox(_go)
+        assert target.delivered == ["a1", "a2", "a3"]
+
+    def test_retry_holds_stream_but_not_others(self, target):
+        target.fail_times = {"a1": 2}
+
+        async def _go(box):
+            await outbox.submit("fake.send", stream="A", name="a1")
+            await outbox.submit("fake.send", stream="A", name="a2")
+            await outbox.submit("fake.send", stream="B", name="b1")
+            await _until(lambda: len(target.delivered) == 3)
+
+        _with_outbox(_go)
+        assert target.delivered.index("b1") < target.delivered.index("a1") < target.delivered.index("a2")
+
+    def test_exception_is_retried(self, target):
+        target.fail_times = {"a1": 1}
+
+        async def _go(box):
+            await outbox.submit("fake.send", stream="A", name="a1", fail_with=True)
+            await _until(lambda: target.delivered == ["a1"])
+
+        _with_outbox(_go)
+
+    def test_dead_after_max_attempts(self, target, monkeypatch):
+        monkeypatch.setenv("OUTBOX_MAX_ATTEMPTS", "2")
+        target.fail_times = {"a1": 99}
+
+        async def _go(box):
+            await outbox.submit("fake.send", stream="A", name="a1", fail_with=True)
+            await outbox.submit("fake.send", stream="A", name="a2")
+            await _until(lambda: target.delivered == ["a2"])
+            return box.dead()
+
+        dead = _with_outbox(_go)
+        assert len(dead) == 1
+        assert dead[0]["attempts"] == 2 and "API down" in dead[0]["last_error"]
+
+    def test_uncertain_delivery_not_resent(self, target):
+        target.fail_times = {"a1": 1}
+
+        async def _go(box):
+            await outbox.submit("fake.send", stream="A", name="a1", fail_with="uncertain")
+            await outbox.submit("fake.send", stream="A", name="a2")
+            await _until(lambda: target.delivered == ["a2"])
+            return box.dead()
+
+        dead = _with_outbox(_go)
+        assert target.delivered == ["a2"]  # a1 was not sent a second time
+        assert len(dead) == 1 and dead[0]["attempts"] == 1
+        assert "DeliveryUncertain" in dead[0]["last_error"]
+
+    def test_survives_restart(self, target, monkeypatch):
+        target.fail_times = {"a1": 99}
+        monkeypatch.setenv("OUTBOX_MAX_ATTEMPTS", "50")
+
+        async def _first_run(box):
+            await outbox.submit("fake.send", stream="A", name="a1")
+            await _until(lambda: box._db.execute("SELECT attempts FROM outbox").fetchone()[0] >= 1)
+
+        _with_outbox(_first_run)
+        assert target.delivered == []
+
+        target.fail_times = {}
+
+        async def _second_run(box):
+            await _until(lambda: target.delivered == ["a1"])
+            return box.pending()
+
+        assert _with_outbox(_second_run) == 0
+
+
+class TestWatcherIntegration:
+    def test_session_notification_does_not_wait_on_discord(self, target, tmp_path, monkeypatch):
+        import oncall.watcher as watcher
+
+        slow = FakeTarget(delay=0.3)
+        calls = []
+
+        async def post_session_complete(**kwargs):
+            await slow.send("complete")
+            calls.append(kwargs)
+            return True
+
+        monkeypatch.setattr(outbox, "_TARGETS", {
+            "discord_approval": SimpleNamespace(post_session_complete=post_session_complete),
+        })
+        session_log = tmp_path / "session.json"
+        session_log.write_text("")
+
+        async def _go(box):
+            start = asyncio.get_running_loop().time()
+            with patch("oncall.watcher.discord_approval.is_configured", return_value=True), \
+                 patch("oncall.watcher.PROJECT_DIR", tmp_path):
+                for _ in range(2):  # the second submit is a duplicate of the first
+                    await watcher._post_discord_session_notification(
+                        timed_out=False, watcher_exc=None, exit_code=0,
+                        device_name="A1C", device_ip="172.20.20.205", issue_key="SUP-9",
+                        session_name="oncall-1", session_start=watcher.datetime.now(watcher.timezone.utc),
+                        session_json=session_log,
+                    )
+            elapsed = asyncio.get_running_loop().time() - start
+            await _until(lambda: calls)
+            return elapsed
+
+        assert _with_outbox(_go) < 0.2
+        assert len(calls) == 1 and calls[0]["issue_key"] == "SUP-9"
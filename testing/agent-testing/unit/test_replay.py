@@ -0,0 +1,135 @@
+"""UT-038 — Watcher replay / benchmark mode.
+
+Tests for oncall/replay.py: the synthetic storm generator, timestamp compression and
+an end-to-end replay through watcher._process_lines with the agent stubbed.
+
+No devices, tmux, Jira or Discord required: the replay's log and lock files live in
+tmp_path and SLA paths are literal fixtures.
+
+Validates:
+- generate_storm is reproducible with a seed and produces the expected event mix
+- Background noise never matches the SLA Down/Up patterns
+- _retime compresses offsets by the speed factor and keeps non-JSON lines
+- A storm across overlapping SLA paths yields one session with correlated events
+- A later, separate Down event starts a second session
+- The report carries throughput, latency percentiles and resource usage
+- Queue lag is measured per queued copy, so a repeated line gets its own timestamp
+- The replay runs on injected files and hooks; watcher globals are never touched
+- A given workdir is used as-is, without creating a temporary directory
+"""
+import asyncio
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import oncall.watcher as watcher
+from oncall.replay import SLA_DOWN_MSG, _percentiles, _retime, _TimedQueue, generate_storm, replay
+
+START = datetime(2026, 3, 1, 7, 0, 0, tzinfo=timezone.utc)
+SLA_PATHS = [
+    {"id": "C1C_TO_IBN", "source_device": "C1C", "scope_devices": ["C1C", "E1C", "IBN"]},
+    {"id": "C2C_TO_IBN", "source_device": "C2C", "scope_devices": ["C2C", "E1C", "IBN"]},
+]
+DEVICE_MAP = {"172.20.20.207": "C1C", "172.20.20.208": "C2C", "172.20.20.205": "A1C"}
+
+
+class TestGenerator:
+    def test_reproducible_with_seed(self):
+        a = generate_storm(["10.0.0.1"], ["10.0.0.2"], duration=5, rate=10, start=START, seed=7)
+        b = generate_storm(["10.0.0.1"], ["10.0.0.2"], duration=5, rate=10, start=START, seed=7)
+        assert a == b
+
+    def test_event_mix(self):
+        events = generate_storm(["10.0.0.1", "10.0.0.3"], ["10.0.0.2", "10.0.0.4"],
+                                duration=10, rate=20, flaps=2, start=START, seed=1)
+        downs = [e for e in events if watcher.is_sla_down_event(e["msg"])]
+        ups = [e for e in events if watcher.is_sla_up_event(e["msg"])]
+        assert len(events) == 200 + 2 * (1 + 2 * 2)
+        assert len(downs) == 2 * 3 and len(ups) == 2 * 2
+        assert {e["device"] for e in downs} == {"10.0.0.2", "10.0.0.4"}
+        assert [e["ts"] for e in events] == sorted(e["ts"] for e in events)
+
+    def test_noise_is_not_classified(self):
+        events = generate_storm(["10.0.0.1"], [], duration=10, rate=50, start=START, seed=3)
+        assert not any(watcher.is_sla_down_event(e["msg"]) or watcher.is_sla_up_event(e["msg"])
+                       for e in events)
+
+
+class TestRetime:
+    def test_offsets_compressed_and_raw_lines_kept(self):
+        lines = [
+            json.dumps({"ts": "2026-03-01T07:00:00Z", "device": "a", "msg": "x"}),
+            "not json",
+            json.dumps({"ts": "2026-03-01T07:00:10Z", "device": "a", "msg": "y"}),
+        ]
+        schedule = _retime(lines, 10, START)
+        assert [offset for offset, _ in schedule] == [0.0, 0.0, 1.0]
+        assert schedule[1][1] == "not json"
+        assert json.loads(schedule[2][1])["ts"] == "2026-03-01T07:00:01Z"
+
+    def test_percentiles(self):
+        assert _percentiles([]) == {}
+        pct = _percentiles([i / 1000 for i in range(1, 101)])
+        assert (pct["p50"], pct["p90"], pct["p99"], pct["max"]) == (50.0, 90.0, 99.0, 100.0)
+
+
+class TestTimedQueue:
+    def test_repeated_line_timed_per_copy(self):
+        async def _go():
+            queue = _TimedQueue()
+            queue.put_line("same")
+            await asyncio.sleep(0.2)
+            queue.put_line("same")
+            return [await queue.get(), await queue.get()], queue.lag
+
+        lines, lag = asyncio.run(_go())
+        assert lines == ["same", "same"]
+        assert lag[0] >= 0.2 and lag[1] < 0.1
+
+
+class TestReplay:
+    @pytest.fixture(autouse=True)
+    def _paths(self, monkeypatch):
+        monkeypatch.setattr(watcher, "load_sla_paths", lambda: SLA_PATHS)
+
+    def _storm(self):
+        events = generate_storm(["172.20.20.205"], ["172.20.20.207", "172.20.20.208"],
+                                duration=30, rate=20, storm_at=5, start=START, seed=2)
+        # A separate failure long after the first session has finished
+        events.append({"ts": "2026-03-01T07:00:29.500000Z", "device": "172.20.20.207", "msg": SLA_DOWN_MSG})
+        return [json.dumps(e) for e in events]
+
+    def test_storm_grouped_then_second_session(self, tmp_path):
+        log_file, lock_file, invoke = watcher.LOG_FILE, watcher.LOCK_FILE, watcher.invoke_claude
+        report = asyncio.run(replay(self._storm(), DEVICE_MAP, speed=100, hold_seconds=5,
+                                    session_seconds=5, workdir=tmp_path))
+
+        assert report["sessions"] == 2
+        assert report["correlated"] == 1
+        assert report["events"] == 30 * 20 + 3
+        assert report["processed"] + report["dropped_after_session"] == report["events"]
+        assert report["dispatch_ms"]["max"] >= 5 / 100 * 1000  # includes the scaled hold
+        assert report["detection_ms"]["max"] < report["dispatch_ms"]["max"]
+        assert set(report["queue_lag_ms"]) == {"p50", "p90", "p99", "max"}
+        assert report["events_per_sec"] > 0 and report["max_rss_mb"] > 0
+
+        assert (watcher.LOG_FILE, watcher.LOCK_FILE, watcher.invoke_claude) == (log_file, lock_file, invoke)
+        assert (tmp_path / "network.json").read_text().count("\n") == report["events"]
+
+    def test_workdir_used_without_temp_dir(self, tmp_path, monkeypatch):
+        def _no_temp_dir(*args, **kwargs):
+            raise AssertionError("TemporaryDirectory created although workdir was given")
+
+        monkeypatch.setattr("oncall.replay.tempfile.TemporaryDirectory", _no_temp_dir)
+        report = asyncio.run(replay([], DEVICE_MAP, speed=100, workdir=tmp_path))
+        assert report["events"] == 0 and (tmp_path / "network.json").exists()
+
+    def test_invalid_speed(self):
+        with pytest.raises(ValueError):
+            asyncio.run(replay([], {}, speed=0))
@@ -0,0 +1,174 @@
+"""UT-033 — Session stream archive.
+
+Tests for core/session_archive.py: archive_session, load_index, list_sessions,
+read_frame, read_lines, iter_session_lines, enforce_retention.
+
+Uses the sample stream-json session in logs/ plus synthetic files under tmp_path;
+SESSION_ARCHIVE_DIR points at tmp_path.
+
+Validates:
+- Archived stream round-trips byte-for-byte line content across multiple frames
+- Every frame is an independently decompressible gzip member at its indexed offset
+- Tool calls are indexed with their line and frame
+- Cost is parsed from the result line unless supplied in metadata
+- read_lines inflates only the frames covering the requested range
+- iter_session_lines can start at a line offset without inflating earlier frames
+- Archiving is skipped when disabled (SESSION_ARCHIVE_MAX_MB=0) or the file is missing
+- Retention removes sessions beyond the size budget (oldest first) and the age limit
+"""
+import gzip
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core import session_archive
+from core.session_archive import (
+    archive_session,
+    enforce_retention,
+    iter_session_lines,
+    list_sessions,
+    load_index,
+    read_frame,
+    read_lines,
+)
+
+SAMPLE = PROJECT_ROOT / "logs" / ".session-oncall-20260317-064333.tmp"
+
+
+@pytest.fixture(autouse=True)
+def archive_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("SESSION_ARCHIVE_DIR", str(tmp_path / "sessions"))
+    monkeypatch.setenv("SESSION_ARCHIVE_FRAME_KB", "4")
+    monkeypatch.delenv("SESSION_ARCHIVE_MAX_MB", raising=False)
+    monkeypatch.delenv("SESSION_ARCHIVE_MAX_AGE_DAYS", raising=False)
+    return tmp_path / "sessions"
+
+
+def _stream(tmp_path: Path, name: str, n_lines: int = 200, cost: float = 0.25) -> Path:
+    path = tmp_path / f".session-{name}.tmp"
+    lines = []
+    for i in range(n_lines):
+        if i % 50 == 10:
+            lines.append(json.dumps({"type": "stream_event", "event": {
+                "type": "content_block_start", "index": 1,
+                "content_block": {"type": "tool_use", "id": f"tu_{i}", "name": "mcp__aiNOC__get_ospf"},
+            }}))
+        else:
+            lines.append(json.dumps({"type": "stream_event", "event": {
+                "type": "content_block_delta", "delta": {"type": "text_delta", "text": f"reasoning {i} " * 5},
+            }}))
+    lines.append(json.dumps({"type": "result", "total_cost_usd": cost}))
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+class TestArchiveSession:
+    def test_round_trip_across_frames(self, tmp_path):
+        src = _stream(tmp_path, "oncall-a")
+        archive_session(src, {"session_name": "oncall-a", "device_name": "C1C"})
+        index = load_index("oncall-a")
+        assert len(index["frames"]) > 1
+        assert list(iter_session_lines("oncall-a")) == src.read_text().splitlines()
+        assert index["line_count"] == 201
+        assert index["device_name"] == "C1C"
+
+    def test_frames_are_independent_gzip_members(self, tmp_path, archive_env):
+        src = _stream(tmp_path, "oncall-a")
+        archive = archive_session(src, {"session_name": "oncall-a"})
+        index = load_index("oncall-a")
+        raw = archive.read_bytes()
+        frame = index["frames"][-1]
+        chunk = gzip.decompress(raw[frame["offset"]:frame["offset"] + frame["length"]])
+        assert chunk.decode().splitlines() == read_frame("oncall-a", len(index["frames"]) - 1)
+        # The whole file is also a valid multi-member gzip stream
+        assert gzip.decompress(raw) == src.read_bytes()
+
+    def test_tool_calls_indexed(self, tmp_path):
+        src = _stream(tmp_path, "oncall-a")
+        archive_session(src, {"session_name": "oncall-a"})
+        index = load_index("oncall-a")
+        assert [c["id"] for c in index["tool_calls"]] == ["tu_10", "tu_60", "tu_110", "tu_160"]
+        call = index["tool_calls"][2]
+        assert json.loads(read_lines("oncall-a", call["line"], 1)[0])["event"]["content_block"]["id"] == "tu_110"
+        frame = index["frames"][call["frame"]]
+        assert frame["first_line"] <= call["line"] < frame["first_line"] + frame["lines"]
+
+    def test_cost_from_result_line_or_meta(self, tmp_path):
+        archive_session(_stream(tmp_path, "oncall-a", cost=0.5), {"session_name": "oncall-a", "cost_usd": None})
+        archive_session(_stream(tmp_path, "oncall-b", cost=0.5), {"session_name": "oncall-b", "cost_usd": 0.9})
+        assert load_index("oncall-a")["cost_usd"] == 0.5
+        assert load_index("oncall-b")["cost_usd"] == 0.9
+
+    def test_sample_session_file(self):
+        archive_session(SAMPLE, {"session_name": "oncall-sample"})
+        index = load_index("oncall-sample")
+        assert index["tool_calls"]
+        assert index["compressed_bytes"] < index["raw_bytes"]
+        assert list(iter_session_lines("oncall-sample")) == SAMPLE.read_text().splitlines()
+
+    def test_read_lines_inflates_only_needed_frames(self, tmp_path):
+        src = _stream(tmp_path, "oncall-a")
+        archive_session(src, {"session_name": "oncall-a"})
+        expected = src.read_text().splitlines()[100:103]
+        with patch.object(session_archive.gzip, "decompress", wraps=gzip.decompress) as spy:
+            assert read_lines("oncall-a", 100, 3) == expected
+        assert spy.call_count <= 2
+
+    def test_iter_session_lines_from_offset_skips_frames(self, tmp_path):
+        src = _stream(tmp_path, "oncall-a")
+        archive_session(src, {"session_name": "oncall-a"})
+        index = load_index("oncall-a")
+        start = index["frames"][-1]["first_line"] + 1
+        with patch.object(session_archive.gzip, "decompress", wraps=gzip.decompress) as spy:
+            assert list(iter_session_lines("oncall-a", start)) == src.read_text().splitlines()[start:]
+        assert spy.call_count == 1
+
+    def test_disabled_or_missing_file(self, tmp_path, monkeypatch):
+        assert archive_session(tmp_path / "missing.tmp", {}) is None
+        monkeypatch.setenv("SESSION_ARCHIVE_MAX_MB", "0")
+        assert archive_session(_stream(tmp_path, "oncall-a"), {"session_name": "oncall-a"}) is None
+
+    def test_list_sessions_newest_first_without_frames(self, tmp_path):
+        archive_session(_stream(tmp_path, "oncall-a"), {"session_name": "oncall-a"})
+        archive_session(_stream(tmp_path, "oncall-b"), {"session_name": "oncall-b"})
+        sessions = list_sessions()
+        assert [s["session_name"] for s in sessions] == ["oncall-b", "oncall-a"]
+        assert "frames" not in sessions[0]
+
+
+class TestRetention:
+    def _age(self, archive_env, name, seconds_ago):
+        t = time.time() - seconds_ago
+        for suffix in (".ndjson.gz", ".index.json"):
+            os.utime(archive_env / f"{name}{suffix}", (t, t))
+
+    def test_size_budget_removes_oldest(self, tmp_path, archive_env, monkeypatch):
+        for i, name in enumerate(["oncall-1", "oncall-2", "oncall-3"]):
+            archive_session(_stream(tmp_path, name), {"session_name": name})
+            self._age(archive_env, name, 300 - i * 100)
+        one = sum(p.stat().st_size for p in archive_env.glob("oncall-3.*"))
+        monkeypatch.setenv("SESSION_ARCHIVE_MAX_MB", str((one * 2.5) / (1024 * 1024)))
+        assert enforce_retention() == ["oncall-1"]
+        assert not (archive_env / "oncall-1.index.json").exists()
+        assert (archive_env / "oncall-3.ndjson.gz").exists()
+
+    def test_age_limit(self, tmp_path, archive_env, monkeypatch):
+        archive_session(_stream(tmp_path, "oncall-old"), {"session_name": "oncall-old"})
+        archive_session(_stream(tmp_path, "oncall-new"), {"session_name": "oncall-new"})
+        self._age(archive_env, "oncall-old", 3 * 86400)
+        monkeypatch.setenv("SESSION_ARCHIVE_MAX_AGE_DAYS", "2")
+        assert enforce_retention() == ["oncall-old"]
+
+    def test_disabled_never_deletes(self, tmp_path, archive_env, monkeypatch):
+        archive_session(_stream(tmp_path, "oncall-a"), {"session_name": "oncall-a"})
+        monkeypatch.setenv("SESSION_ARCHIVE_MAX_MB", "0")
+        assert enforce_retention() == []
+        assert (archive_env / "oncall-a.ndjson.gz").exists()
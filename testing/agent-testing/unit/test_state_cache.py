@@ -0,0 +1,192 @@
+"""UT-034 — Device state prefetch cache.
+
+Tests for core/state_cache.py, its use in transport.execute_command(), and the
+watcher prefetch helpers (_prefetch_device_state, _start_state_prefetch).
+
+No devices required: transport backends and tool functions are patched; the cache
+directory is redirected to tmp_path via STATE_CACHE_DIR.
+
+Validates:
+- store/take round trip marks hits with _cache_hit and _cache_age_s
+- Entries are single-use and expire after STATE_CACHE_TTL_SECONDS
+- Error results are never cached
+- Keys distinguish ActionChain contents and transport overrides
+- invalidate() removes one device's entries or all entries
+- STATE_CACHE_TTL_SECONDS=0 disables the cache
+- execute_command stores results while recording and serves them once afterwards
+- _prefetch_device_state runs every query per device with recording enabled
+- _start_state_prefetch targets the failing SLA path's nodes
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core import state_cache
+from platforms.platform_map import ActionChain
+from transport import execute_command
+
+RESTCONF_DEVICE = {
+    "host": "172.20.20.209",
+    "platform": "cisco_iosxe",
+    "transport": "restconf",
+    "cli_style": "ios",
+}
+CHAIN = ActionChain([
+    ("restconf", {"url": "Cisco-IOS-XE-ospf-oper:ospf-oper-data/ospf-state", "method": "GET"}),
+    ("ssh", "show ip ospf neighbor"),
+])
+RESULT = {"device": "C1C", "cli_style": "ios", "raw": {"ospf": "up"}}
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("STATE_CACHE_DIR", str(tmp_path / "state_cache"))
+    monkeypatch.delenv("STATE_CACHE_TTL_SECONDS", raising=False)
+    return tmp_path / "state_cache"
+
+
+class TestStoreTake:
+    def test_round_trip_marks_hit(self):
+        assert state_cache.store("C1C", CHAIN, None, dict(RESULT))
+        hit = state_cache.take("C1C", CHAIN)
+        assert hit["raw"] == {"ospf": "up"}
+        assert hit["_cache_hit"] is True
+        assert hit["_cache_age_s"] >= 0
+
+    def test_single_use(self):
+        state_cache.store("C1C", CHAIN, None, dict(RESULT))
+        assert state_cache.take("C1C", CHAIN) is not None
+        assert state_cache.take("C1C", CHAIN) is None
+
+    def test_expired_entry_is_a_miss(self, monkeypatch):
+        state_cache.store("C1C", CHAIN, None, dict(RESULT))
+        monkeypatch.setenv("STATE_CACHE_TTL_SECONDS", "0.01")
+        time.sleep(0.02)
+        assert state_cache.take("C1C", CHAIN) is None
+
+    def test_errors_not_cached(self):
+        assert not state_cache.store("C1C", CHAIN, None, {"device": "C1C", "error": "timeout"})
+        assert not state_cache.store("C1C", CHAIN, None, {"device": "C1C", "raw": {"error": "401"}})
+        assert state_cache.take("C1C", CHAIN) is None
+
+    def test_equal_chains_share_a_key(self):
+        state_cache.store("C1C", CHAIN, None, dict(RESULT))
+        assert state_cache.take("C1C", ActionChain(list(CHAIN.actions))) is not None
+
+    def test_transport_override_is_a_different_key(self):
+        state_cache.store("C1C", CHAIN, None, dict(RESULT))
+        assert state_cache.take("C1C", CHAIN, "ssh") is None
+
+    def test_miss_without_cache_dir(self, cache_dir):
+        assert not cache_dir.exists()
+        assert state_cache.take("C1C", CHAIN) is None
+
+    def test_disabled_by_zero_ttl(self, monkeypatch):
+        monkeypatch.setenv("STATE_CACHE_TTL_SECONDS", "0")
+        assert not state_cache.is_enabled()
+        assert not state_cache.store("C1C", CHAIN, None, dict(RESULT))
+
+
+class TestInvalidate:
+    def test_single_device(self):
+        state_cache.store("C1C", CHAIN, None, dict(RESULT))
+        state_cache.store("C1", CHAIN, None, dict(RESULT))
+        assert state_cache.invalidate("C1C") == 1
+        assert state_cache.take("C1C", CHAIN) is None
+        assert state_cache.take("C1", CHAIN) is not None
+
+    def test_all_devices(self):
+        state_cache.store("C1C", CHAIN, None, dict(RESULT))
+        state_cache.store("E1C", CHAIN, None, dict(RESULT))
+        assert state_cache.invalidate() == 2
+
+
+class TestExecuteCommand:
+    def test_recorded_result_served_once(self):
+        rc = AsyncMock(return_value={"ospf": "up"})
+        with patch("transport.devices", {"C1C": RESTCONF_DEVICE}), \
+             patch("transport.execute_restconf", new=rc), \
+             patch("transport.execute_ssh", new=AsyncMock()):
+
+            async def _prefetch():
+                with state_cache.recording():
+                    return await execute_command("C1C", CHAIN)
+
+            live = asyncio.run(_prefetch())
+            first = asyncio.run(execute_command("C1C", CHAIN))
+            second = asyncio.run(execute_command("C1C", CHAIN))
+
+        assert "_cache_hit" not in live
+        assert first["_cache_hit"] is True
+        assert first["raw"] == live["raw"]
+        assert "_cache_hit" not in second
+        assert rc.await_count == 2  # prefetch + the call after the entry was consumed
+
+    def test_recording_does_not_consume_entries(self):
+        state_cache.store("C1C", CHAIN, None, dict(RESULT))
+        with patch("transport.devices", {"C1C": RESTCONF_DEVICE}), \
+             patch("transport.execute_restconf", new=AsyncMock(return_value={"ospf": "fresh"})):
+
+            async def _prefetch():
+                with state_cache.recording():
+                    return await execute_command("C1C", CHAIN)
+
+            result = asyncio.run(_prefetch())
+        assert result["raw"] == {"ospf": "fresh"}
+        assert state_cache.take("C1C", CHAIN)["raw"] == {"ospf": "fresh"}
+
+
+class TestWatcherPrefetch:
+    def test_every_query_runs_while_recording(self):
+        import oncall.watcher as watcher
+
+        seen = []
+
+        def _tool(name):
+            async def _call(params):
+                seen.append((name, params.device, state_cache.is_recording()))
+                return {"device": params.device, "raw": {}}
+            return _call
+
+        with patch("tools.protocol.get_ospf", new=_tool("ospf")), \
+             patch("tools.protocol.get_bgp", new=_tool("bgp")), \
+             patch("tools.operational.get_interfaces", new=_tool("interfaces")), \
+             patch("tools.routing.get_routing", new=_tool("routing")):
+            results = asyncio.run(watcher._prefetch_device_state(["C1C", "E1C"]))
+
+        assert len(seen) == 8
+        assert all(recording for _, _, recording in seen)
+        assert set(results["C1C"]) == {"ospf_neighbors", "bgp_summary", "interfaces", "routing"}
+        assert not state_cache.is_recording()
+
+    def test_start_targets_sla_path_nodes(self, monkeypatch):
+        import oncall.watcher as watcher
+
+        monkeypatch.setattr(watcher, "load_sla_paths", lambda: [{
+            "id": "p1", "source_device": "C1C",
+            "scope_devices": ["C1C", "E1C"], "ecmp_next_hops": ["X1C"],
+        }])
+        prefetch = AsyncMock(return_value={})
+        monkeypatch.setattr(watcher, "_prefetch_device_state", prefetch)
+
+        async def _run():
+            task, results = watcher._start_state_prefetch({"device": "172.20.20.207"}, {"172.20.20.207": "C1C"})
+            await task
+            return results
+
+        results = asyncio.run(_run())
+        prefetch.assert_awaited_once_with(["C1C", "E1C", "X1C"], results)
+
+    def test_start_disabled(self, monkeypatch):
+        import oncall.watcher as watcher
+
+        monkeypatch.setenv("STATE_CACHE_TTL_SECONDS", "0")
+        monkeypatch.setenv("INCIDENT_DIGEST_BUDGET_SECONDS", "0")
+        assert watcher._start_state_prefetch({"device": "1.1.1.1"}, {}) is None
@@ -0,0 +1,175 @@
+"""UT-029 — Watcher storm correlation.
+
+Tests for oncall/watcher.py storm correlation stage:
+  load_sla_paths, find_sla_path, sla_path_nodes, correlate_events,
+  collect_correlated_events, scan_for_deferred_events(exclude_events=...).
+
+No real tmux, Jira, or Discord required. network.json is a tmp_path file;
+the hold window asyncio.sleep is patched out.
+
+Validates:
+- sla_path_nodes unions scope_devices with ECMP/egress fields
+- Down events on paths sharing a core node are correlated with the trigger
+- Events from devices with no SLA path are never correlated
+- Events outside the hold window (relative to the previous member) are not correlated
+- Grouping is transitive through shared nodes
+- collect_correlated_events returns [] and does not sleep when hold is 0
+- collect_correlated_events scans network.json after the hold and groups events
+- scan_for_deferred_events skips events listed in exclude_events
+"""
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from oncall.watcher import (
+    load_sla_paths,
+    find_sla_path,
+    sla_path_nodes,
+    correlate_events,
+    collect_correlated_events,
+    scan_for_deferred_events,
+)
+
+DEVICE_MAP = {
+    "172.20.20.205": "A1C",
+    "172.20.20.207": "C1C",
+    "172.20.20.208": "C2C",
+    "172.20.20.209": "E1C",
+    "172.20.20.240": "X1C",
+}
+
+PATHS = [
+    {"id": "C1C_TO_IBN", "source_device": "C1C", "ecmp_node": "C1C",
+     "ecmp_next_hops": ["E1C", "E2C"], "scope_devices": ["C1C", "C2C", "E1C", "E2C", "IBN"]},
+    {"id": "C2C_TO_IAN", "source_device": "C2C", "ecmp_node": "C2C",
+     "ecmp_next_hops": ["E1C", "E2C"], "scope_devices": ["C2C", "C1C", "E1C", "E2C", "IAN"]},
+    {"id": "A1C_TO_X1C", "source_device": "A1C", "primary_abr": "C1C",
+     "scope_devices": ["A1C", "C1C", "C2C", "E1C", "E2C", "IAN", "X1C"]},
+    {"id": "ISOLATED", "source_device": "X1C", "scope_devices": ["X1C", "Z9"]},
+]
+
+T0 = datetime(2026, 3, 1, 7, 0, 0, tzinfo=timezone.utc)
+
+
+def _ev(ip: str, offset_s: float, msg: str = "%TRACK-6-STATE: 1 ip sla 1 reachability Up -> Down") -> dict:
+    ts = (T0 + timedelta(seconds=offset_s)).isoformat().replace("+00:00", "Z")
+    return {"ts": ts, "device": ip, "msg": msg}
+
+
+# ── Path helpers ───────────────────────────────────────────────────────────────
+
+class TestPathHelpers:
+    def test_sla_path_nodes_includes_ecmp_fields(self):
+        path = {"source_device": "E1C", "ecmp_node": "E1C", "ecmp_next_hops": ["C1C", "C2C"],
+                "egress_devices": ["C1C", "C2C"], "scope_devices": ["E1C", "E2C"]}
+        assert sla_path_nodes(path) == {"E1C", "E2C", "C1C", "C2C"}
+
+    def test_find_sla_path_by_source_device(self):
+        assert find_sla_path("C2C", PATHS)["id"] == "C2C_TO_IAN"
+        assert find_sla_path("IAN", PATHS) is None
+
+    def test_load_sla_paths_missing_file_returns_empty(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("oncall.watcher.SLA_PATHS_FILE", tmp_path / "missing.json")
+        assert load_sla_paths() == []
+
+    def test_load_sla_paths_reads_repo_file(self):
+        ids = {p["id"] for p in load_sla_paths()}
+        assert "C1C_TO_IBN" in ids
+
+
+# ── correlate_events ───────────────────────────────────────────────────────────
+
+class TestCorrelateEvents:
+    def test_shared_core_node_correlates(self):
+        trigger = _ev("172.20.20.207", 0)  # C1C
+        cands = [_ev("172.20.20.208", 2), _ev("172.20.20.205", 4)]  # C2C, A1C
+        correlated, uncorrelated = correlate_events(trigger, cands, DEVICE_MAP, PATHS, 10)
+        assert [e["device_name"] for e in correlated] == ["C2C", "A1C"]
+        assert [e["path_id"] for e in correlated] == ["C2C_TO_IAN", "A1C_TO_X1C"]
+        assert uncorrelated == []
+
+    def test_device_without_path_not_correlated(self):
+        trigger = _ev("172.20.20.207", 0)
+        cands = [_ev("172.20.20.209", 1)]  # E1C — no SLA path sourced from E1C in PATHS
+        correlated, uncorrelated = correlate_events(trigger, cands, DEVICE_MAP, PATHS, 10)
+        assert correlated == []
+        assert len(uncorrelated) == 1
+
+    def test_event_outside_window_not_correlated(self):
+        trigger = _ev("172.20.20.207", 0)
+        cands = [_ev("172.20.20.208", 30)]
+        correlated, uncorrelated = correlate_events(trigger, cands, DEVICE_MAP, PATHS, 10)
+        assert correlated == []
+        assert len(uncorrelated) == 1
+
+    def test_window_chains_from_previous_member(self):
+        trigger = _ev("172.20.20.207", 0)
+        cands = [_ev("172.20.20.208", 8), _ev("172.20.20.205", 16)]
+        correlated, _ = correlate_events(trigger, cands, DEVICE_MAP, PATHS, 10)
+        assert len(correlated) == 2
+
+    def test_grouping_is_transitive(self):
+        # X1C path shares nothing with C1C's path, but A1C's path brings X1C into the group
+        trigger = _ev("172.20.20.207", 0)
+        cands = [_ev("172.20.20.240", 3), _ev("172.20.20.205", 1)]
+        correlated, uncorrelated = correlate_events(trigger, cands, DEVICE_MAP, PATHS, 10)
+        assert [e["device_name"] for e in correlated] == ["A1C", "X1C"]
+        assert uncorrelated == []
+
+    def test_unrelated_path_not_correlated(self):
+        trigger = _ev("172.20.20.207", 0)
+        cands = [_ev("172.20.20.240", 1)]  # X1C → ISOLATED path, no shared node with C1C path
+        correlated, uncorrelated = correlate_events(trigger, cands, DEVICE_MAP, PATHS, 10)
+        assert correlated == []
+        assert len(uncorrelated) == 1
+
+
+# ── collect_correlated_events ──────────────────────────────────────────────────
+
+class TestCollectCorrelatedEvents:
+    def test_zero_hold_returns_empty_without_sleeping(self):
+        with patch("oncall.watcher.asyncio.sleep", new=AsyncMock()) as mock_sleep:
+            assert asyncio.run(collect_correlated_events(_ev("172.20.20.207", 0), DEVICE_MAP, 0)) == []
+        mock_sleep.assert_not_called()
+
+    def test_scans_log_and_groups(self, tmp_path, monkeypatch):
+        trigger = _ev("172.20.20.207", 0)
+        log = tmp_path / "network.json"
+        log.write_text("\n".join(json.dumps(e) for e in [
+            trigger,
+            _ev("172.20.20.208", 2),
+            _ev("172.20.20.240", 3),
+            {"ts": trigger["ts"], "device": "172.20.20.205", "msg": "%SYS-5-CONFIG_I: Configured"},
+        ]) + "\n")
+        paths_file = tmp_path / "paths.json"
+        paths_file.write_text(json.dumps({"paths": PATHS}))
+        monkeypatch.setattr("oncall.watcher.LOG_FILE", str(log))
+        monkeypatch.setattr("oncall.watcher.SLA_PATHS_FILE", paths_file)
+
+        with patch("oncall.watcher.asyncio.sleep", new=AsyncMock()) as mock_sleep:
+            correlated = asyncio.run(collect_correlated_events(trigger, DEVICE_MAP, 10))
+
+        mock_sleep.assert_awaited_once_with(10)
+        assert [e["device_name"] for e in correlated] == ["C2C"]
+
+
+# ── scan_for_deferred_events(exclude_events=...) ───────────────────────────────
+
+def test_deferred_scan_skips_excluded_events(tmp_path, monkeypatch):
+    trigger = _ev("172.20.20.207", 0)
+    correlated = _ev("172.20.20.208", 2)
+    other = _ev("172.20.20.240", 3)
+    log = tmp_path / "network.json"
+    log.write_text("\n".join(json.dumps(e) for e in [trigger, correlated, other]) + "\n")
+    monkeypatch.setattr("oncall.watcher.LOG_FILE", str(log))
+
+    deferred = scan_for_deferred_events(
+        trigger, T0, T0 + timedelta(minutes=1), DEVICE_MAP, exclude_events=[correlated],
+    )
+    assert [e["device_name"] for e in deferred] == ["X1C"]
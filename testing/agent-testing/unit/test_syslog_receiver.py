@@ -0,0 +1,115 @@
+"""UT-037 — Native UDP syslog ingestion.
+
+Tests for oncall/watcher.py parse_syslog() and the SYSLOG_LISTEN receiver
+(_start_syslog_receiver, _flush_syslog_lines).
+
+Uses a real UDP socket on 127.0.0.1 with an ephemeral port; LOG_FILE lives
+under tmp_path. No Vector, devices or root privileges required.
+
+Validates:
+- RFC 3164 with and without hostname, and Cisco sequence-number format
+- RFC 5424 timestamp, structured data and BOM handling
+- PRI decoding into Vector's severity/facility names
+- Datagrams without a valid <PRI> are ignored
+- Received events reach the queue in network.json line format
+- Received events are batch-appended to LOG_FILE, including on shutdown
+"""
+import asyncio
+import json
+import socket
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import oncall.watcher as watcher
+from oncall.watcher import is_sla_down_event, parse_syslog
+
+DOWN = "%TRACK-6-STATE: 1 ip sla 1 reachability Up -> Down"
+
+
+class TestParseSyslog:
+    def test_rfc3164_with_hostname(self):
+        event = parse_syslog(f"<189>Mar  1 07:00:00 C1C {DOWN}".encode(), "172.20.20.207")
+        assert event["msg"] == DOWN
+        assert event["device"] == "172.20.20.207"
+        assert is_sla_down_event(event["msg"])
+
+    def test_rfc3164_without_hostname(self):
+        event = parse_syslog(f"<189>Mar  1 07:00:00 {DOWN}".encode(), "172.20.20.207")
+        assert event["msg"] == DOWN
+
+    def test_cisco_sequence_format_still_classified(self):
+        event = parse_syslog(f"<189>42: *Mar  1 07:00:00.123: {DOWN}".encode(), "172.20.20.207")
+        assert is_sla_down_event(event["msg"])
+
+    def test_rfc5424(self):
+        data = f"<165>1 2026-03-01T07:00:00.003Z C1C IOSXE - - [meta seq=\"1\"] \ufeff{DOWN}".encode()
+        event = parse_syslog(data, "172.20.20.207")
+        assert event["ts"] == "2026-03-01T07:00:00.003Z"
+        assert event["msg"] == DOWN
+
+    def test_rfc5424_nil_timestamp_uses_receive_time(self):
+        event = parse_syslog(b"<165>1 - C1C IOSXE - - - hello", "10.0.0.1")
+        assert watcher.parse_event_ts(event) is not None
+        assert event["msg"] == "hello"
+
+    def test_pri_decoding(self):
+        event = parse_syslog(b"<189>Mar  1 07:00:00 C1C x", "10.0.0.1")
+        assert (event["facility"], event["severity"]) == ("local7", "notice")
+        event = parse_syslog(b"<3>Mar  1 07:00:00 C1C x", "10.0.0.1")
+        assert (event["facility"], event["severity"]) == ("kern", "err")
+
+    @pytest.mark.parametrize("data", [b"no pri", b"<999>Mar  1 07:00:00 x", b""])
+    def test_invalid_ignored(self, data):
+        assert parse_syslog(data, "10.0.0.1") is None
+
+
+class TestReceiver:
+    def test_events_queued_and_appended(self, tmp_path, monkeypatch):
+        log_file = tmp_path / "network.json"
+        monkeypatch.setattr(watcher, "LOG_FILE", str(log_file))
+        monkeypatch.setenv("SYSLOG_FLUSH_MS", "20")
+
+        async def _run():
+            queue: asyncio.Queue = asyncio.Queue()
+            transport, flusher = await watcher._start_syslog_receiver(queue, "127.0.0.1:0")
+            port = transport.get_extra_info("sockname")[1]
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.sendto(f"<189>Mar  1 07:00:00 C1C {DOWN}".encode(), ("127.0.0.1", port))
+                sock.sendto(b"garbage", ("127.0.0.1", port))
+                sock.sendto(b"<190>Mar  1 07:00:01 C1C %SYS-6-LOGGINGHOST_STARTSTOP: x", ("127.0.0.1", port))
+            first = await asyncio.wait_for(queue.get(), timeout=5)
+            second = await asyncio.wait_for(queue.get(), timeout=5)
+            await asyncio.sleep(0.1)  # at least one flush interval
+            written = log_file.read_text()
+            transport.close()
+            flusher.cancel()
+            await asyncio.gather(flusher, return_exceptions=True)
+            return first, second, written
+
+        first, second, written = asyncio.run(_run())
+        event = json.loads(first)
+        assert event["msg"] == DOWN and event["device"] == "127.0.0.1"
+        assert "LOGGINGHOST" in json.loads(second)["msg"]
+        assert [json.loads(line)["msg"] for line in written.splitlines()] == [
+            DOWN, "%SYS-6-LOGGINGHOST_STARTSTOP: x",
+        ]
+
+    def test_pending_lines_flushed_on_shutdown(self, tmp_path, monkeypatch):
+        log_file = tmp_path / "network.json"
+        monkeypatch.setattr(watcher, "LOG_FILE", str(log_file))
+
+        async def _run():
+            pending = ['{"msg": "a"}', '{"msg": "b"}']
+            task = asyncio.create_task(watcher._flush_syslog_lines(pending, 60))
+            await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return pending
+
+        assert asyncio.run(_run()) == []
+        assert log_file.read_text().splitlines() == ['{"msg": "a"}', '{"msg": "b"}']
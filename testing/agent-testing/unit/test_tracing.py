@@ -0,0 +1,175 @@
+"""UT-043 — Tool-call tracing.
+
+Tests for core/tracing.py and its instrumentation of the tool → transport path
+(tracing.tool, @traced on get_action, execute_command, _execute_single,
+execute_restconf, execute_ssh and the trimmers; the MCPServer middleware).
+
+Scrapli and httpx are mocked at the library boundary so the real, instrumented
+transport functions run; traces go to a TRACE_FILE under tmp_path.
+
+Validates:
+- A tool call produces one trace: root → tool handler → get_action/execute_command →
+  _execute_single → execute_restconf / execute_ssh → genie_parse, plus the trimmer
+- A failed RESTCONF tier is recorded as an error span before the SSH fallback
+- The export is one OTLP/JSON ExportTraceServiceRequest line with linked span ids
+- The tool result gets "_timings" (total and per-span ms) without mutating the original dict
+- Through the MCP server, argument validation shows up as a "validate_args" span
+- Outside a trace, instrumented functions record nothing; TRACING=0 disables tracing
+- A failing export never fails the tool call
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core import tracing
+from input_models.models import BgpQuery
+from tools.protocol import get_bgp
+from transport import execute_command
+
+
+@pytest.fixture(autouse=True)
+def trace_file(monkeypatch, tmp_path):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setenv("TRACE_FILE", str(path))
+    monkeypatch.delenv("TRACING", raising=False)
+    return path
+
+
+def _scrapli(raw="BGP summary", parsed=None):
+    response = MagicMock()
+    response.result = raw
+    response.genie_parse_output.return_value = parsed or {"vrf": {}}
+    conn = MagicMock()
+    conn.send_command = AsyncMock(return_value=response)
+    cm = MagicMock()
+    cm.__aenter__ = AsyncMock(return_value=conn)
+    cm.__aexit__ = AsyncMock(return_value=False)
+    return cm
+
+
+def _httpx(status_code):
+    response = MagicMock(status_code=status_code, text="unavailable")
+    client = MagicMock()
+    client.get = AsyncMock(return_value=response)
+    cm = MagicMock()
+    cm.__aenter__ = AsyncMock(return_value=client)
+    cm.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=cm)
+
+
+def _spans(trace_file):
+    lines = trace_file.read_text().splitlines()
+    assert len(lines) == 1
+    request = json.loads(lines[0])
+    return request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+
+def _fallback_call():
+    """get_bgp on a c8000v whose RESTCONF tier fails, so SSH answers."""
+    traced_bgp = tracing.tool(get_bgp)
+    with patch("transport.restconf.httpx.AsyncClient", _httpx(503)), \
+         patch("transport.ssh.AsyncScrapli", return_value=_scrapli()):
+        return asyncio.run(traced_bgp(BgpQuery(device="C1C", query="summary")))
+
+
+class TestSpans:
+    def test_tree_and_fallback(self, trace_file):
+        result = _fallback_call()
+        assert result["_transport_used"] == "ssh"
+
+        spans = _spans(trace_file)
+        by_name = {}
+        for s in spans:
+            by_name.setdefault(s["name"], []).append(s)
+        ids = {s["spanId"]: s for s in spans}
+
+        def parent(s):
+            return ids[s["parentSpanId"]]["name"]
+
+        assert "parentSpanId" not in by_name["tool/get_bgp"][0]
+        assert parent(by_name["get_bgp"][0]) == "tool/get_bgp"
+        assert parent(by_name["get_action"][0]) == "get_bgp"
+        assert parent(by_name["execute_command"][0]) == "get_bgp"
+        assert parent(by_name["_trim_bgp"][0]) == "get_bgp"
+        assert parent(by_name["execute_restconf"][0]) == "_execute_single"
+        assert parent(by_name["execute_ssh"][0]) == "_execute_single"
+        assert parent(by_name["genie_parse"][0]) == "execute_ssh"
+
+        restconf_tier, ssh_tier = by_name["_execute_single"]
+        assert restconf_tier["status"]["code"] == 2 and "503" in restconf_tier["status"]["message"]
+        assert ssh_tier["status"] == {"code": 1}
+        attrs = {a["key"]: a["value"] for a in by_name["execute_command"][0]["attributes"]}
+        assert attrs["device"] == {"stringValue": "C1C"}
+
+    def test_otlp_shape(self, trace_file):
+        _fallback_call()
+        spans = _spans(trace_file)
+        assert len({s["traceId"] for s in spans}) == 1
+        assert all(len(s["traceId"]) == 32 and len(s["spanId"]) == 16 for s in spans)
+        for s in spans:
+            assert int(s["startTimeUnixNano"]) <= int(s["endTimeUnixNano"])
+        assert spans[0]["name"] == "tool/get_bgp"  # sorted by start time
+
+    def test_timings_in_result(self):
+        result = _fallback_call()
+        timings = result["_timings"]
+        assert set(timings["spans"]) >= {"get_bgp", "execute_command", "execute_restconf", "execute_ssh"}
+        assert timings["total_ms"] >= timings["spans"]["execute_command"]
+
+    def test_result_copied_not_mutated(self):
+        original = {"device": "C1C"}
+
+        async def handler():
+            return original
+
+        result = asyncio.run(tracing.tool(handler)())
+        assert "_timings" in result and "_timings" not in original
+
+
+class TestMcpServer:
+    def test_validation_span(self, trace_file):
+        from fastmcp import Client
+
+        if "MCPServer" in sys.modules:
+            mcp = sys.modules["MCPServer"].mcp
+        else:
+            with patch("core.logging_config.setup_logging"):
+                import MCPServer
+            mcp = MCPServer.mcp
+
+        async def _go():
+            async with Client(mcp) as client:
+                result = await client.call_tool("get_bgp", {"params": {"device": "NOPE", "query": "summary"}})
+                return result.data
+
+        data = asyncio.run(_go())
+        assert data["error"] == "Unknown device: NOPE"
+        assert "validate_args" in data["_timings"]["spans"]
+        names = [s["name"] for s in _spans(trace_file)]
+        assert names[:2] == ["tool/get_bgp", "validate_args"]
+
+
+class TestDisabled:
+    def test_no_trace_outside_tool_call(self, trace_file):
+        with patch("transport.ssh.AsyncScrapli", return_value=_scrapli()):
+            result = asyncio.run(execute_command("A1C", "show ip bgp summary"))
+        assert "_timings" not in result
+        assert not trace_file.exists()
+
+    def test_tracing_off(self, trace_file, monkeypatch):
+        monkeypatch.setenv("TRACING", "0")
+        result = _fallback_call()
+        assert "_timings" not in result
+        assert not trace_file.exists()
+
+    def test_export_failure_ignored(self, trace_file, monkeypatch, tmp_path):
+        monkeypatch.setenv("TRACE_FILE", str(tmp_path))  # a directory: open() fails
+        result = _fallback_call()
+        assert result["_transport_used"] == "ssh" and "_timings" in result
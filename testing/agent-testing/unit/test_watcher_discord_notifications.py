@@ -69,7 +69,7 @@ def _call_notify(
             import os
             os.utime(target, (src_stat.st_atime, src_stat.st_mtime))
 
-        _post_discord_session_notification(
+        asyncio.run(_post_discord_session_notification(
             timed_out=timed_out,
             watcher_exc=watcher_exc,
             exit_code=exit_code,
@@ -79,7 +79,7 @@ def _call_notify(
             session_name="oncall-test",
             session_start=session_start,
             session_json=session_log,
-        )
+        ))
 
 
 # ---------------------------------------------------------------------------
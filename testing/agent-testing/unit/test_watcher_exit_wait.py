@@ -0,0 +1,131 @@
+"""UT-031 — Watcher pidfd-based agent exit detection.
+
+Tests for oncall/watcher.py: _wait_for_agent_exit, _read_exit_status, _parse_pane_pid.
+
+Real short-lived child processes stand in for the tmux pane process; _tmux is
+patched, so no tmux server is required.
+
+Validates:
+- _parse_pane_pid parses `tmux new-session -P -F '#{pane_pid}'` output
+- Agent exit is detected immediately and the wrapper's exit status is returned
+- A missing exit file falls back to a single tmux pane_dead_status query
+- The stop sentinel kills the session within the same wait → (None, True)
+- The timeout kills the session → (None, True)
+- An already-exited PID returns without waiting
+- Without pidfd support the tmux polling fallback is used
+"""
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import oncall.watcher as watcher
+from oncall.watcher import _parse_pane_pid, _read_exit_status, _wait_for_agent_exit
+
+
+@pytest.fixture
+def fake_tmux():
+    """Patch _tmux; list-panes reports pane_dead_status 7, everything else succeeds."""
+    async def _fake(*args, **kwargs):
+        stdout = "7\n" if args[0] == "list-panes" else ""
+        return subprocess.CompletedProcess(args, 0, stdout=stdout, stderr="")
+    with patch.object(watcher, "_tmux", side_effect=_fake) as mock:
+        yield mock
+
+
+@pytest.fixture
+def stop_file(tmp_path, monkeypatch):
+    path = tmp_path / "stop_session"
+    monkeypatch.setattr(watcher, "STOP_FILE", path)
+    monkeypatch.setattr(watcher, "_EXIT_WAIT_TICK", 0.05)
+    return path
+
+
+def _tmux_subcommands(mock) -> list:
+    return [c.args[0] for c in mock.call_args_list]
+
+
+class TestParsePanePid:
+    def test_parses_pid(self):
+        assert _parse_pane_pid("12345\n") == 12345
+
+    def test_empty_or_garbage_returns_none(self):
+        assert _parse_pane_pid("") is None
+        assert _parse_pane_pid("no-pid") is None
+
+
+class TestWaitForAgentExit:
+    def test_exit_detected_with_wrapper_status(self, tmp_path, fake_tmux, stop_file):
+        exit_file = tmp_path / "s.exit"
+        proc = subprocess.Popen(["sh", "-c", f"sleep 0.2; echo 3 > {exit_file}"])
+        try:
+            start = time.monotonic()
+            result = asyncio.run(_wait_for_agent_exit("oncall-t", proc.pid, exit_file, timeout_minutes=1))
+            elapsed = time.monotonic() - start
+        finally:
+            proc.wait()
+        assert result == (3, False)
+        assert elapsed < 1.0
+        assert "list-panes" not in _tmux_subcommands(fake_tmux)
+
+    def test_missing_exit_file_queries_tmux_once(self, tmp_path, fake_tmux, stop_file):
+        proc = subprocess.Popen(["sleep", "0.1"])
+        try:
+            result = asyncio.run(_wait_for_agent_exit("oncall-t", proc.pid, tmp_path / "none.exit", 1))
+        finally:
+            proc.wait()
+        assert result == (7, False)
+        assert _tmux_subcommands(fake_tmux) == ["list-panes"]
+
+    def test_stop_sentinel_kills_session(self, tmp_path, fake_tmux, stop_file):
+        stop_file.write_text("")
+        proc = subprocess.Popen(["sleep", "5"])
+        try:
+            result = asyncio.run(_wait_for_agent_exit("oncall-t", proc.pid, tmp_path / "s.exit", 1))
+        finally:
+            proc.kill()
+            proc.wait()
+        assert result == (None, True)
+        assert not stop_file.exists()
+        assert "kill-session" in _tmux_subcommands(fake_tmux)
+
+    def test_timeout_kills_session(self, tmp_path, fake_tmux, stop_file):
+        proc = subprocess.Popen(["sleep", "5"])
+        try:
+            result = asyncio.run(
+                _wait_for_agent_exit("oncall-t", proc.pid, tmp_path / "s.exit", timeout_minutes=0.003)
+            )
+        finally:
+            proc.kill()
+            proc.wait()
+        assert result == (None, True)
+        assert "kill-session" in _tmux_subcommands(fake_tmux)
+
+    def test_already_exited_pid_returns_immediately(self, tmp_path, fake_tmux, stop_file):
+        exit_file = tmp_path / "s.exit"
+        exit_file.write_text("0\n")
+        with patch.object(watcher.os, "pidfd_open", side_effect=ProcessLookupError):
+            result = asyncio.run(_wait_for_agent_exit("oncall-t", 999999, exit_file, 1))
+        assert result == (0, False)
+
+    def test_no_pidfd_support_falls_back_to_polling(self, tmp_path, fake_tmux, stop_file):
+        legacy = AsyncMock(return_value=(0, False))
+        with patch.object(watcher.os, "pidfd_open", side_effect=AttributeError), \
+             patch.object(watcher, "_wait_for_tmux_process_exit", new=legacy):
+            result = asyncio.run(_wait_for_agent_exit("oncall-t", 1, tmp_path / "s.exit", 5))
+        assert result == (0, False)
+        legacy.assert_awaited_once()
+
+
+def test_read_exit_status_prefers_exit_file(tmp_path, fake_tmux):
+    exit_file = tmp_path / "s.exit"
+    exit_file.write_text("0\n")
+    assert asyncio.run(_read_exit_status("oncall-t", exit_file)) == 0
+    fake_tmux.assert_not_called()
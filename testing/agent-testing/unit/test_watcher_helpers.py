@@ -8,10 +8,11 @@ No real filesystem mounts, tmux, or device connections required.
 All file operations use tmp_path; PID checks use patch.
 
 Validates:
-- load_device_map builds IP→name dict from NETWORK.json
-- load_device_map returns {} on missing file
-- load_device_map returns {} on malformed JSON
+- load_device_map builds IP→name dict from the inventory (core.inventory.devices)
+- load_device_map adds INTENT.json direct_link interface addresses
+- load_device_map returns {} when the inventory cannot be loaded
 - load_device_map skips entries without "host" key
+- load_device_map writes the index for the dashboard (data/ip_index.json)
 - resolve_device returns device name when IP is in map
 - resolve_device falls back to IP string when not in map
 - resolve_device handles empty map
@@ -55,53 +56,61 @@ from oncall.watcher import (
 # ── load_device_map ────────────────────────────────────────────────────────────
 
 class TestLoadDeviceMap:
-    def test_normal_load(self, tmp_path, monkeypatch):
-        """Normal NETWORK.json yields correct IP→name mapping."""
+    @pytest.fixture(autouse=True)
+    def _isolate(self, tmp_path, monkeypatch):
+        """No INTENT.json links and no writes into the real data/ directory."""
+        monkeypatch.setattr("oncall.watcher.INTENT_FILE", tmp_path / "missing_intent.json")
+        monkeypatch.setattr("core.ip_index.INDEX_FILE", tmp_path / "ip_index.json")
+
+    def test_normal_load(self, monkeypatch):
+        """Inventory management hosts yield the IP→name mapping."""
         inventory = {
             "A1C": {"host": "172.20.20.205", "platform": "cisco_iosxe", "transport": "asyncssh", "cli_style": "ios"},
             "C1C": {"host": "172.20.20.207", "platform": "cisco_iosxe", "transport": "restconf", "cli_style": "ios"},
         }
-        inv_file = tmp_path / "NETWORK.json"
-        inv_file.write_text(json.dumps(inventory))
-        monkeypatch.setattr("oncall.watcher.INVENTORY_FILE", inv_file)
+        monkeypatch.setattr("core.inventory.devices", inventory)
 
         result = load_device_map()
         assert result == {"172.20.20.205": "A1C", "172.20.20.207": "C1C"}
 
-    def test_missing_file_returns_empty_dict(self, tmp_path, monkeypatch):
-        """Missing inventory file returns empty dict, does not raise."""
-        monkeypatch.setattr("oncall.watcher.INVENTORY_FILE", tmp_path / "nonexistent.json")
-        result = load_device_map()
-        assert result == {}
+    def test_intent_interface_addresses_included(self, tmp_path, monkeypatch):
+        """Both ends of every direct_link resolve to their device."""
+        intent = {"routers": {"C1C": {"direct_links": {"E1C": {
+            "local_interface": "GigabitEthernet6", "local_ip": "10.0.0.25",
+            "remote_ip": "10.0.0.26", "subnet": "10.0.0.24/30",
+        }}}}}
+        intent_file = tmp_path / "INTENT.json"
+        intent_file.write_text(json.dumps(intent))
+        monkeypatch.setattr("oncall.watcher.INTENT_FILE", intent_file)
+        monkeypatch.setattr("core.inventory.devices", {"C1C": {"host": "172.20.20.207"}})
 
-    def test_malformed_json_returns_empty_dict(self, tmp_path, monkeypatch):
-        """Malformed JSON in inventory file returns empty dict, does not raise."""
-        inv_file = tmp_path / "NETWORK.json"
-        inv_file.write_text("{bad json!}")
-        monkeypatch.setattr("oncall.watcher.INVENTORY_FILE", inv_file)
         result = load_device_map()
-        assert result == {}
+        assert result == {"172.20.20.207": "C1C", "10.0.0.25": "C1C", "10.0.0.26": "E1C"}
 
-    def test_entries_without_host_key_skipped(self, tmp_path, monkeypatch):
-        """Entries without a 'host' key raise KeyError — the whole map returns empty
-        (current implementation propagates the KeyError up to the except block)."""
-        inventory = {
+    def test_inventory_error_returns_empty_dict(self, monkeypatch):
+        """An inventory/index failure returns empty dict, does not raise."""
+        monkeypatch.setattr("core.inventory.devices", {"A1C": {"host": "172.20.20.205"}})
+        with patch.object(watcher.ip_index, "build_index", side_effect=RuntimeError("boom")):
+            assert load_device_map() == {}
+
+    def test_entries_without_host_key_skipped(self, monkeypatch):
+        """Entries without a 'host' key are skipped; the rest still resolve."""
+        monkeypatch.setattr("core.inventory.devices", {
             "A1C": {"platform": "cisco_iosxe"},  # missing "host"
-        }
-        inv_file = tmp_path / "NETWORK.json"
-        inv_file.write_text(json.dumps(inventory))
-        monkeypatch.setattr("oncall.watcher.INVENTORY_FILE", inv_file)
-        result = load_device_map()
-        # KeyError is caught by the except Exception handler — returns {}
-        assert result == {}
-
-    def test_empty_inventory_returns_empty_dict(self, tmp_path, monkeypatch):
-        """Empty JSON object yields empty device map."""
-        inv_file = tmp_path / "NETWORK.json"
-        inv_file.write_text("{}")
-        monkeypatch.setattr("oncall.watcher.INVENTORY_FILE", inv_file)
-        result = load_device_map()
-        assert result == {}
+            "C1C": {"host": "172.20.20.207"},
+        })
+        assert load_device_map() == {"172.20.20.207": "C1C"}
+
+    def test_empty_inventory_returns_empty_dict(self, monkeypatch):
+        """Empty inventory yields empty device map."""
+        monkeypatch.setattr("core.inventory.devices", {})
+        assert load_device_map() == {}
+
+    def test_index_written_for_dashboard(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("core.inventory.devices", {"C1C": {"host": "172.20.20.207"}})
+        load_device_map()
+        data = json.loads((tmp_path / "ip_index.json").read_text())
+        assert data["hosts"]["172.20.20.207"]["device"] == "C1C"
 
 
 # ── resolve_device ─────────────────────────────────────────────────────────────
@@ -0,0 +1,145 @@
+"""UT-030 — Watcher parallel pre-launch pipeline.
+
+Tests for oncall/watcher.py invoke_claude() launch ordering and the session
+ticket side channel (_write_session_ticket, SESSION_TICKET_FILE).
+
+No real tmux, Jira, or Discord required: _tmux, _wait_for_tmux_process_exit and
+the Jira/Discord client coroutines are patched; all files live under tmp_path.
+
+Validates:
+- The tmux session is launched before Jira create_issue returns
+- The issue key is published to the session ticket file and the dashboard state
+- The issue key reaches the session-complete notification
+- The "investigation started" embed waits briefly for the issue key, else shows it pending
+- The ticket file reports "unavailable" when Jira is not configured
+- The ticket file is removed when the session ends
+- Time-to-agent-start is logged
+"""
+import asyncio
+import json
+import logging
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import oncall.watcher as watcher
+from oncall.watcher import _write_session_ticket
+
+EVENT = {
+    "ts": "2026-03-01T07:00:00Z",
+    "device": "172.20.20.207",
+    "msg": "%TRACK-6-STATE: 1 ip sla 1 reachability Up -> Down",
+}
+DEVICE_MAP = {"172.20.20.207": "C1C"}
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch):
+    """Redirect every file the watcher touches into tmp_path."""
+    data = tmp_path / "data"
+    data.mkdir()
+    monkeypatch.setattr(watcher, "PROJECT_DIR", tmp_path)
+    monkeypatch.setattr(watcher, "LOGS_DIR", tmp_path / "logs")
+    monkeypatch.setattr(watcher, "LOCK_FILE", tmp_path / "oncall.lock")
+    monkeypatch.setattr(watcher, "STOP_FILE", data / "stop_session")
+    monkeypatch.setattr(watcher, "DASHBOARD_STATE_FILE", data / "dashboard_state.json")
+    monkeypatch.setattr(watcher, "SESSION_TICKET_FILE", data / "session_ticket.json")
+    monkeypatch.setattr(watcher, "LOG_FILE", str(tmp_path / "network.json"))
+    monkeypatch.setattr(watcher, "notify_operator", lambda name: None)
+    return tmp_path
+
+
+def _run_invoke(sandbox, *, jira_enabled=True, jira_delay=0.05):
+    """Run invoke_claude with tmux/Jira/Discord patched. Returns an ordered call log."""
+    calls: list = []
+    snapshots: dict = {}
+
+    async def fake_tmux(*args, **kwargs):
+        calls.append(("tmux", args[0]))
+        return subprocess.CompletedProcess(args, 0, stdout="", stderr="")
+
+    async def fake_create_issue(**kwargs):
+        calls.append(("jira_start",))
+        await asyncio.sleep(jira_delay)
+        calls.append(("jira_done",))
+        return "SUP-7"
+
+    async def fake_wait(session_name, **kwargs):
+        # Let the parallel ticket task finish while the "agent" is running
+        await asyncio.sleep(jira_delay * 3)
+        ticket = sandbox / "data" / "session_ticket.json"
+        snapshots["ticket"] = json.loads(ticket.read_text())
+        snapshots["dashboard"] = json.loads((sandbox / "data" / "dashboard_state.json").read_text())
+        return (0, False)
+
+    notify = AsyncMock()
+    snapshots["started"] = started = AsyncMock()
+    with patch.object(watcher, "_tmux", side_effect=fake_tmux), \
+         patch.object(watcher, "_wait_for_tmux_process_exit", side_effect=fake_wait), \
+         patch.object(watcher.jira_client, "_is_configured", return_value=jira_enabled), \
+         patch.object(watcher.jira_client, "create_issue", side_effect=fake_create_issue), \
+         patch.object(watcher.jira_client, "add_comment", new=AsyncMock()), \
+         patch.object(watcher.discord_approval, "post_investigation_started", new=started), \
+         patch.object(watcher, "_post_discord_session_notification", new=notify):
+        asyncio.run(watcher.invoke_claude(EVENT, DEVICE_MAP))
+    return calls, snapshots, notify
+
+
+class TestLaunchOrdering:
+    def test_tmux_launched_before_jira_completes(self, sandbox):
+        calls, _, _ = _run_invoke(sandbox)
+        assert calls.index(("tmux", "new-session")) < calls.index(("jira_done",))
+
+    def test_issue_key_published_to_ticket_file_and_dashboard(self, sandbox):
+        _, snapshots, _ = _run_invoke(sandbox)
+        assert snapshots["ticket"]["status"] == "created"
+        assert snapshots["ticket"]["issue_key"] == "SUP-7"
+        assert snapshots["dashboard"]["issue_key"] == "SUP-7"
+
+    def test_issue_key_reaches_session_notification(self, sandbox):
+        _, _, notify = _run_invoke(sandbox)
+        assert notify.await_args.kwargs["issue_key"] == "SUP-7"
+
+    def test_started_embed_carries_issue_key(self, sandbox):
+        _, snapshots, _ = _run_invoke(sandbox)
+        kwargs = snapshots["started"].await_args.kwargs
+        assert kwargs["issue_key"] == "SUP-7" and not kwargs["ticket_pending"]
+
+    def test_started_embed_does_not_wait_for_slow_ticket(self, sandbox, monkeypatch):
+        monkeypatch.setenv("STARTED_EMBED_TICKET_WAIT_SECONDS", "0.01")
+        _, snapshots, _ = _run_invoke(sandbox)
+        kwargs = snapshots["started"].await_args.kwargs
+        assert kwargs["issue_key"] is None and kwargs["ticket_pending"]
+
+    def test_ticket_file_removed_after_session(self, sandbox):
+        _run_invoke(sandbox)
+        assert not (sandbox / "data" / "session_ticket.json").exists()
+
+    def test_time_to_agent_start_logged(self, sandbox, caplog):
+        with caplog.at_level(logging.INFO, logger="ainoc.watcher"):
+            _run_invoke(sandbox)
+        assert any("Time to agent start" in r.getMessage() for r in caplog.records)
+
+
+class TestSessionTicketFile:
+    def test_unavailable_when_jira_not_configured(self, sandbox):
+        _, snapshots, _ = _run_invoke(sandbox, jira_enabled=False)
+        assert snapshots["ticket"]["status"] == "unavailable"
+        assert snapshots["ticket"]["issue_key"] is None
+
+    def test_write_session_ticket_structure(self, sandbox):
+        _write_session_ticket("oncall-x", "unavailable")
+        data = json.loads((sandbox / "data" / "session_ticket.json").read_text())
+        assert data == {"session_name": "oncall-x", "status": "unavailable", "issue_key": None}
+
+    def test_pending_then_created(self, sandbox):
+        _write_session_ticket("oncall-x", "pending")
+        _write_session_ticket("oncall-x", "created", "SUP-9")
+        data = json.loads((sandbox / "data" / "session_ticket.json").read_text())
+        assert data["status"] == "created" and data["issue_key"] == "SUP-9"
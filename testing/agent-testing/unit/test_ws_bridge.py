@@ -4,9 +4,12 @@ Tests the parsing/classification layer in dashboard/ws_bridge.py.
 No actual WebSocket connections — pure logic tests.
 """
 
+import asyncio
 import json
+import os
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
 
@@ -341,32 +344,100 @@ class TestToolResultBlock:
 
 
 # ---------------------------------------------------------------------------
-# Event buffer (ring buffer)
+# Event buffer (compacted replay state)
 # ---------------------------------------------------------------------------
 
 class TestEventBuffer:
     def setup_method(self):
-        bridge.EVENT_BUFFER.clear()
+        self.buffer = bridge._ReplayBuffer()
 
     def test_buffer_accepts_events(self):
-        bridge.EVENT_BUFFER.append({"ui_type": "reasoning", "text": "hello"})
-        assert len(bridge.EVENT_BUFFER) == 1
-
-    def test_buffer_respects_maxlen(self):
-        for i in range(bridge.BUFFER_SIZE + 50):
-            bridge.EVENT_BUFFER.append({"i": i})
-        assert len(bridge.EVENT_BUFFER) == bridge.BUFFER_SIZE
-
-    def test_buffer_evicts_oldest_on_overflow(self):
-        for i in range(bridge.BUFFER_SIZE + 10):
-            bridge.EVENT_BUFFER.append({"i": i})
-        # Oldest entries (0..9) should be gone; newest (10..BUFFER_SIZE+9) remain
-        assert bridge.EVENT_BUFFER[0]["i"] == 10
+        self.buffer.append({"ui_type": "reasoning", "text": "hello"})
+        assert len(self.buffer) == 1
+
+    def test_reasoning_deltas_merged_into_paragraphs(self):
+        for text in ("Let ", "me ", "check."):
+            self.buffer.append({"ui_type": "reasoning", "text": text})
+        self.buffer.append({"ui_type": "tool_start", "tool": "get_ospf", "id": "t1", "is_mcp": True})
+        self.buffer.append({"ui_type": "reasoning", "text": "Next."})
+        assert [e.get("text") for e in self.buffer.events()] == ["Let me check.", None, "Next."]
+
+    def test_tool_lifecycle_collapsed_per_id(self):
+        self.buffer.append({"ui_type": "tool_start", "tool": "get_ospf", "id": "t1", "is_mcp": True})
+        self.buffer.append({"ui_type": "tool_start", "tool": "get_bgp", "id": "t2", "is_mcp": True})
+        self.buffer.append({"ui_type": "tool_input_complete", "tool": "get_ospf", "id": "t1",
+                                    "input": {"device": "C1C"}, "is_mcp": True})
+        self.buffer.append({"ui_type": "tool_result", "id": "t1", "output": "FULL",
+                                    "hosts": {"10.0.0.26": "E1C"}})
+        assert len(self.buffer) == 2
+        assert self.buffer.events() == [
+            {"ui_type": "tool_start", "tool": "get_ospf", "id": "t1", "is_mcp": True},
+            {"ui_type": "tool_input_complete", "tool": "get_ospf", "id": "t1", "is_mcp": True,
+             "input": {"device": "C1C"}},
+            {"ui_type": "tool_result", "id": "t1", "output": "FULL", "hosts": {"10.0.0.26": "E1C"}},
+            {"ui_type": "tool_start", "tool": "get_bgp", "id": "t2", "is_mcp": True},
+        ]
+
+    def test_memory_bounded_by_content_not_deltas(self):
+        for _ in range(2000):
+            self.buffer.append({"ui_type": "reasoning", "text": "x"})
+        assert len(self.buffer) == 1
+        assert self.buffer.events()[0]["text"] == "x" * 2000
+        assert self.buffer.truncated == 0
+
+    def test_long_session_kept_within_byte_budget(self):
+        # Entry count alone no longer drops anything
+        for i in range(1000):
+            self.buffer.append({"ui_type": "tool_start", "tool": "t", "id": f"t{i}"})
+        assert len(self.buffer) == 1000 and self.buffer.truncated == 0
+
+    def test_buffer_evicts_oldest_entries_over_budget(self, monkeypatch):
+        monkeypatch.setattr(bridge, "BUFFER_MAX_BYTES", 1000)
+        for i in range(20):
+            self.buffer.append({"ui_type": "tool_start", "tool": "t", "id": f"t{i}"})
+            self.buffer.append({"ui_type": "tool_result", "id": f"t{i}", "output": "x" * 100})
+        kept = len(self.buffer)
+        assert 0 < kept < 20 and self.buffer.truncated == 20 - kept
+        assert self.buffer._bytes <= 1000
+        assert self.buffer.events()[0]["id"] == f"t{20 - kept}"
+        # A late result for an evicted tool starts a new entry rather than being lost
+        self.buffer.append({"ui_type": "tool_result", "id": "t0", "output": "late"})
+        assert self.buffer.events()[-1]["output"] == "late"
+
+    def test_oversized_entry_kept(self, monkeypatch):
+        monkeypatch.setattr(bridge, "BUFFER_MAX_BYTES", 10)
+        self.buffer.append({"ui_type": "reasoning", "text": "a"})
+        self.buffer.append({"ui_type": "tool_start", "tool": "t", "id": "t1"})
+        self.buffer.append({"ui_type": "tool_result", "id": "t1", "output": "x" * 100})
+        assert len(self.buffer) == 1 and self.buffer.truncated == 1
+        assert self.buffer.events()[-1]["output"] == "x" * 100
+
+    def test_init_frame_reports_truncation(self, monkeypatch):
+        monkeypatch.setattr(bridge, "BUFFER_MAX_BYTES", 20)
+        channel = bridge._Channel({"state": "active", "session_name": "s1"})
+        monkeypatch.setattr(bridge, "CHANNELS", {"s1": channel})
+        client = bridge._Client(_FakeWebSocket())
+        client.channel = "s1"
+        assert json.loads(bridge._init_message(client))["truncated"] == 0
+        for text in ("a" * 15, "b" * 15):
+            channel.buffer.append({"ui_type": "reasoning", "text": text})
+            channel.buffer.append({"ui_type": "session_update", "issue_key": "SUP-1"})
+        init = json.loads(bridge._init_message(client))
+        assert init["truncated"] == channel.buffer.truncated > 0
+        assert init["buffer"][-1] == {"ui_type": "session_update", "issue_key": "SUP-1"}
+
+    def test_events_do_not_alias_buffer(self):
+        self.buffer.append({"ui_type": "reasoning", "text": "a"})
+        self.buffer.events()[0]["text"] = "changed"
+        assert self.buffer.events()[0]["text"] == "a"
 
     def test_buffer_clear(self):
-        bridge.EVENT_BUFFER.extend([{"a": 1}, {"b": 2}])
-        bridge.EVENT_BUFFER.clear()
-        assert len(bridge.EVENT_BUFFER) == 0
+        self.buffer.append({"ui_type": "session_end", "cost": 0.1})
+        self.buffer.append({"ui_type": "tool_start", "tool": "t", "id": "t1"})
+        self.buffer.truncated = 3
+        self.buffer.clear()
+        assert len(self.buffer) == 0 and self.buffer.events() == []
+        assert self.buffer.truncated == 0
 
 
 # ---------------------------------------------------------------------------
@@ -410,3 +481,665 @@ class TestSessionState:
         )
         for key in expected_keys:
             assert key in bridge.SESSION_STATE, f"Missing key in active SESSION_STATE schema: {key}"
+
+
+# ---------------------------------------------------------------------------
+# Session file tail-follow (inotify wake-ups, polling fallback)
+# ---------------------------------------------------------------------------
+
+def _reasoning_line(text: str) -> str:
+    return _stream_event({
+        "type": "content_block_delta",
+        "delta": {"type": "text_delta", "text": text},
+        "index": 0,
+    })
+
+
+class TestTailSessionFile:
+    @pytest.fixture(autouse=True)
+    def _collect(self, monkeypatch):
+        self.sent = []
+
+        async def fake_broadcast(event):
+            self.sent.append(event)
+
+        monkeypatch.setattr(bridge, "_broadcast", fake_broadcast)
+        monkeypatch.setattr(bridge, "TAIL_STATE_CHECK", 0.05)
+        monkeypatch.setattr(bridge, "TAIL_POLL_INTERVAL", 0.01)
+
+    def _run(self, path):
+        channel = bridge._Channel({"state": "active", "session_name": "oncall-x", "session_file": str(path)})
+
+        async def _go():
+            task = asyncio.create_task(bridge._tail_session_file(channel, bridge._parse_queue()))
+            with open(path, "a") as fh:
+                fh.write(_reasoning_line("one") + "\n" + _reasoning_line("two")[:10])
+                fh.flush()
+                for _ in range(100):
+                    if self.sent:
+                        break
+                    await asyncio.sleep(0.01)
+                texts_before_idle = [e["text"] for e in self.sent]
+                fh.write(_reasoning_line("two")[10:])  # completed, but no trailing newline
+            channel.ended = True
+            await asyncio.wait_for(task, timeout=5)
+            await asyncio.wait_for(channel.drained.wait(), timeout=5)
+            return texts_before_idle
+
+        return channel, asyncio.run(_go())
+
+    def test_streams_lines_and_drains_on_idle(self, tmp_path):
+        path = tmp_path / ".session-oncall-x.tmp"
+        path.write_text("")
+        channel, texts_before_idle = self._run(path)
+        assert texts_before_idle == ["one"]
+        assert [e["text"] for e in self.sent] == ["one", "two"]
+        assert {e["session"] for e in self.sent} == {"oncall-x"}
+        assert channel.buffer.events() == [{"ui_type": "reasoning", "text": "onetwo"}]
+
+    def test_polling_fallback_without_inotify(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(bridge.file_tail, "inotify_open", lambda path: None)
+        path = tmp_path / ".session-oncall-x.tmp"
+        path.write_text("")
+        _, texts_before_idle = self._run(path)
+        assert texts_before_idle == ["one"]
+        assert [e["text"] for e in self.sent] == ["one", "two"]
+
+
+# ---------------------------------------------------------------------------
+# Frame coalescing (DASHBOARD_FLUSH_MS)
+# ---------------------------------------------------------------------------
+
+class TestFrameCoalescing:
+    @pytest.fixture(autouse=True)
+    def _client(self, monkeypatch):
+        self.frames = []
+        client = SimpleNamespace(enqueue=lambda frame: self.frames.append(json.loads(frame)), replay=None, channel=None)
+        monkeypatch.setattr(bridge, "CLIENTS", {object(): client})
+        monkeypatch.setattr(bridge, "FLUSH_INTERVAL", 0.02)
+        monkeypatch.setattr(bridge, "FRAME_STATS", {"events": 0, "frames": 0, "bytes": 0})
+        bridge._pending.clear()
+        yield
+        bridge._flush_frames()
+
+    def _send(self, events, settle=0.05):
+        async def _go():
+            for event in events:
+                await bridge._broadcast(event)
+            await asyncio.sleep(settle)
+        asyncio.run(_go())
+
+    def test_reasoning_deltas_merged_into_one_frame(self):
+        self._send([{"ui_type": "reasoning", "text": t} for t in ("Let ", "me ", "check")])
+        assert self.frames == [{"ui_type": "reasoning", "text": "Let me check"}]
+
+    def test_mixed_events_batched_in_order(self):
+        self._send([
+            {"ui_type": "reasoning", "text": "a"},
+            {"ui_type": "tool_start", "tool": "get_ospf", "id": "t1", "is_mcp": True},
+            {"ui_type": "reasoning", "text": "b"},
+            {"ui_type": "reasoning", "text": "c"},
+        ])
+        assert len(self.frames) == 1
+        assert self.frames[0]["ui_type"] == "batch"
+        assert [e.get("text", e["ui_type"]) for e in self.frames[0]["events"]] == ["a", "tool_start", "bc"]
+        assert bridge.FRAME_STATS["events"] == 4 and bridge.FRAME_STATS["frames"] == 1
+
+    def test_size_cap_flushes_early(self, monkeypatch):
+        monkeypatch.setattr(bridge, "FLUSH_INTERVAL", 60)
+        monkeypatch.setattr(bridge, "FRAME_MAX_BYTES", 10)
+        self._send([{"ui_type": "reasoning", "text": "x" * 6} for _ in range(4)], settle=0)
+        assert [f["text"] for f in self.frames] == ["x" * 12, "x" * 12]
+
+    def test_zero_interval_sends_each_event(self, monkeypatch):
+        monkeypatch.setattr(bridge, "FLUSH_INTERVAL", 0)
+        self._send([{"ui_type": "reasoning", "text": "a"}, {"ui_type": "reasoning", "text": "b"}], settle=0)
+        assert [f["text"] for f in self.frames] == ["a", "b"]
+
+    def test_buffered_event_not_mutated_by_merge(self):
+        first = {"ui_type": "reasoning", "text": "a"}
+        self._send([first, {"ui_type": "reasoning", "text": "b"}])
+        assert first == {"ui_type": "reasoning", "text": "a"}
+
+    def test_no_clients_nothing_queued(self, monkeypatch):
+        monkeypatch.setattr(bridge, "CLIENTS", {})
+        self._send([{"ui_type": "reasoning", "text": "a"}], settle=0)
+        assert bridge._pending == [] and self.frames == []
+
+
+# ---------------------------------------------------------------------------
+# Per-client send queues, slow-consumer handling, /stats
+# ---------------------------------------------------------------------------
+
+class _FakeWebSocket:
+    remote_address = ("10.9.9.9", 50000)
+
+    def __init__(self):
+        self.sent = []
+        self.closed = None
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def send(self, msg):
+        await self.gate.wait()
+        self.sent.append(json.loads(msg))
+
+    async def close(self, code=1000, reason=""):
+        self.closed = (code, reason)
+
+
+class TestClientQueue:
+    @pytest.fixture(autouse=True)
+    def _state(self, monkeypatch):
+        self.channel = bridge._Channel({"state": "active", "session_name": "s1"})
+        monkeypatch.setattr(bridge, "CHANNELS", {"s1": self.channel})
+        monkeypatch.setattr(bridge, "CLIENTS", {})
+        bridge._pending.clear()
+
+    def test_queued_frames_merged_into_one_message(self):
+        client = bridge._Client(_FakeWebSocket())
+        client.resync = False
+        client.enqueue(json.dumps({"ui_type": "reasoning", "text": "a"}))
+        client.enqueue(json.dumps({"ui_type": "batch", "events": [{"ui_type": "tool_start", "id": "t1"}]}))
+        merged = json.loads(client.take_frame())
+        assert merged["ui_type"] == "batch"
+        assert merged["events"][0]["text"] == "a"
+        assert merged["events"][1]["events"][0]["id"] == "t1"
+        assert client.queued_bytes == 0 and not client.queue
+
+    def test_overflow_drops_queue_and_resyncs(self, monkeypatch):
+        monkeypatch.setattr(bridge, "CLIENT_QUEUE_FRAMES", 3)
+        client = bridge._Client(_FakeWebSocket())
+        client.resync = False
+        for i in range(4):
+            client.enqueue(json.dumps({"ui_type": "reasoning", "text": str(i)}))
+        assert client.resync and not client.queue
+        assert client.stats["dropped_frames"] == 4
+
+    def test_byte_cap_bounds_memory(self, monkeypatch):
+        monkeypatch.setattr(bridge, "CLIENT_QUEUE_BYTES", 100)
+        client = bridge._Client(_FakeWebSocket())
+        for _ in range(50):
+            client.enqueue(json.dumps({"ui_type": "reasoning", "text": "x" * 30}))
+            assert client.queued_bytes <= 100
+
+    def test_lagging_client_disconnected(self, monkeypatch):
+        monkeypatch.setattr(bridge, "CLIENT_MAX_LAG", 0.01)
+        ws = _FakeWebSocket()
+
+        async def _go():
+            client = bridge._Client(ws)
+            client.enqueue('{"ui_type": "reasoning", "text": "a"}')
+            await asyncio.sleep(0.03)
+            client.enqueue('{"ui_type": "reasoning", "text": "b"}')
+            await asyncio.sleep(0)
+            return client
+
+        client = asyncio.run(_go())
+        assert ws.closed == (1013, "client too slow")
+        assert client.closing and len(client.queue) == 1
+
+    def test_sender_snapshot_first_then_merges_backlog(self):
+        ws = _FakeWebSocket()
+        self.channel.buffer.append({"ui_type": "reasoning", "text": "earlier"})
+
+        async def _go():
+            client = bridge._Client(ws)
+            client.channel = "s1"
+            bridge.CLIENTS[ws] = client
+            client.wakeup.set()
+            sender = asyncio.create_task(bridge._client_sender(client))
+            await asyncio.sleep(0.01)
+            ws.gate.clear()  # slow consumer: the next send blocks
+            client.enqueue('{"ui_type": "reasoning", "text": "1"}')
+            await asyncio.sleep(0.01)
+            client.enqueue('{"ui_type": "reasoning", "text": "2"}')
+            client.enqueue('{"ui_type": "reasoning", "text": "3"}')
+            assert client.lag() > 0
+            ws.gate.set()
+            await asyncio.sleep(0.01)
+            sender.cancel()
+            return client
+
+        client = asyncio.run(_go())
+        assert ws.sent[0]["ui_type"] == "init" and ws.sent[0]["state"]["session_name"] == "s1"
+        assert ws.sent[0]["buffer"] == [{"ui_type": "reasoning", "text": "earlier"}]
+        assert ws.sent[1] == {"ui_type": "reasoning", "text": "1"}
+        assert [e["text"] for e in ws.sent[2]["events"]] == ["2", "3"]
+        assert client.stats["frames"] == 3 and client.stats["resyncs"] == 1
+
+    def test_stats_endpoint(self):
+        client = bridge._Client(_FakeWebSocket())
+        bridge.CLIENTS[client.ws] = client
+        response = bridge._http_handler(None, SimpleNamespace(path="/stats", headers={}))
+        body = json.loads(response.body)
+        assert response.status_code == 200
+        assert body["clients"][0]["remote"] == "10.9.9.9:50000"
+        assert {"queued_frames", "queued_bytes", "lag_ms", "dropped_frames", "resyncs"} <= set(body["clients"][0])
+        assert "frames" in body and "events" in body
+
+
+# ---------------------------------------------------------------------------
+# Watcher → bridge state push channel (Unix datagram socket, state-file fallback)
+# ---------------------------------------------------------------------------
+
+class TestStatePushChannel:
+    @pytest.fixture(autouse=True)
+    def _paths(self, tmp_path, monkeypatch):
+        import oncall.watcher as watcher
+
+        self.watcher = watcher
+        self.state_file = tmp_path / "dashboard_state.json"
+        sock = tmp_path / "dashboard.sock"
+        monkeypatch.setattr(bridge, "STATE_FILE", self.state_file)
+        monkeypatch.setattr(bridge, "STATE_SOCKET", sock)
+        monkeypatch.setattr(watcher, "DASHBOARD_STATE_FILE", self.state_file)
+        monkeypatch.setattr(watcher, "DASHBOARD_SOCKET", sock)
+        monkeypatch.setattr(bridge, "SESSION_STATE", {"state": "idle"})
+        monkeypatch.setattr(bridge, "CHANNELS", {})
+        monkeypatch.setattr(watcher, "_dashboard_sessions", {})
+        self.sent = []
+
+        async def fake_broadcast(event):
+            self.sent.append(event["ui_type"])
+
+        monkeypatch.setattr(bridge, "_broadcast", fake_broadcast)
+
+    async def _until(self, ui_type, timeout=1.0):
+        for _ in range(int(timeout / 0.01)):
+            if ui_type in self.sent:
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+    def test_pushed_state_applied_without_polling(self, monkeypatch):
+        monkeypatch.setattr(bridge, "STATE_RESYNC_INTERVAL", 60)
+
+        async def _go():
+            task = asyncio.create_task(bridge.watch_state_file())
+            await asyncio.sleep(0.05)
+            self.watcher._write_dashboard_state({"state": "active", "session_name": "oncall-1"})
+            started = await self._until("session_start", timeout=0.5)
+            self.watcher._write_dashboard_state({"state": "idle"})
+            idle = await self._until("session_idle", timeout=0.5)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return started, idle
+
+        assert asyncio.run(_go()) == (True, True)
+        assert not bridge.STATE_SOCKET.exists()  # removed on shutdown
+
+    def test_state_file_read_on_startup(self):
+        self.state_file.write_text(json.dumps({"state": "active", "session_name": "oncall-2"}))
+
+        async def _go():
+            task = asyncio.create_task(bridge.watch_state_file())
+            found = await self._until("session_start")
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return found
+
+        assert asyncio.run(_go())
+
+    def test_polling_fallback_without_socket(self, monkeypatch):
+        monkeypatch.setattr(bridge, "_open_state_socket", lambda: None)
+        monkeypatch.setattr(bridge, "STATE_POLL_INTERVAL", 0.01)
+
+        async def _go():
+            task = asyncio.create_task(bridge.watch_state_file())
+            await asyncio.sleep(0.05)
+            self.state_file.write_text(json.dumps({"state": "active", "session_name": "oncall-3"}))
+            found = await self._until("session_start")
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return found
+
+        assert asyncio.run(_go())
+
+    def test_watcher_publish_without_bridge_is_silent(self):
+        self.watcher._write_dashboard_state({"state": "idle"})
+        assert json.loads(self.state_file.read_text()) == {"state": "idle", "sessions": []}
+
+
+# ---------------------------------------------------------------------------
+# Parallel sessions — per-session channels, subscriptions, shared parse worker
+# ---------------------------------------------------------------------------
+
+def _live_state(name, session_file):
+    return {"state": "active", "session_name": name, "device_name": name.upper(), "session_file": str(session_file)}
+
+
+class TestSessionChannels:
+    @pytest.fixture(autouse=True)
+    def _state(self, monkeypatch):
+        monkeypatch.setattr(bridge, "CHANNELS", {})
+        monkeypatch.setattr(bridge, "CLIENTS", {})
+        monkeypatch.setattr(bridge, "SESSION_STATE", {"state": "idle"})
+        monkeypatch.setattr(bridge, "FLUSH_INTERVAL", 0)
+        monkeypatch.setattr(bridge, "TAIL_STATE_CHECK", 0.05)
+        bridge._pending.clear()
+
+    def _client(self, follow=True):
+        client = bridge._Client(_FakeWebSocket())
+        client.resync = False
+        client.follow = follow
+        bridge.CLIENTS[client.ws] = client
+        return client
+
+    @staticmethod
+    def _received(client):
+        return _flatten([json.loads(frame) for _, frame in client.queue])
+
+    @staticmethod
+    async def _settle(condition, timeout=2.0):
+        for _ in range(int(timeout / 0.01)):
+            if condition():
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+    def test_live_sessions_from_snapshot_and_legacy_messages(self):
+        a, b = _live_state("a", "/a"), _live_state("b", "/b")
+        assert bridge._live_sessions({**a, "sessions": [a, b]}) == {"a": a, "b": b}
+        assert bridge._live_sessions({"state": "idle", "session_name": "a", "sessions": [b]}) == {"b": b}
+        assert bridge._live_sessions(a) == {"a": a}
+        assert bridge._live_sessions({"state": "idle"}) == {}
+
+    def test_parallel_sessions_routed_to_their_subscribers(self, tmp_path):
+        file_a, file_b = tmp_path / "a.tmp", tmp_path / "b.tmp"
+        file_a.write_text(_reasoning_line("from a") + "\n")
+        file_b.write_text(_reasoning_line("from b") + "\n")
+
+        async def _go():
+            await bridge._apply_sessions({"a": _live_state("a", file_a)})
+            watcher_a = self._client(follow=False)
+            bridge._subscribe(watcher_a, bridge.CHANNELS["a"], resync=False)
+            watcher_b = self._client()  # follows: moves to b when it starts
+            await bridge._apply_sessions({"a": _live_state("a", file_a), "b": _live_state("b", file_b)})
+            await self._settle(lambda: len(bridge.CHANNELS["a"].buffer) and len(bridge.CHANNELS["b"].buffer))
+            bridge._flush_frames()
+            return watcher_a, watcher_b
+
+        watcher_a, watcher_b = asyncio.run(_go())
+        texts_a = [m.get("text") for m in self._received(watcher_a) if m["ui_type"] == "reasoning"]
+        texts_b = [m.get("text") for m in self._received(watcher_b) if m["ui_type"] == "reasoning"]
+        assert texts_a == ["from a"] and texts_b == ["from b"]
+        assert bridge.SESSION_STATE["session_name"] == "b"
+        session_lists = [m for m in self._received(watcher_a) if m["ui_type"] == "sessions"]
+        assert [s["session_name"] for s in session_lists[-1]["sessions"]] == ["a", "b"]
+
+    def test_unwatched_session_is_not_tailed(self, tmp_path):
+        path = tmp_path / "a.tmp"
+        path.write_text(_reasoning_line("before anyone looked") + "\n")
+
+        async def _go():
+            await bridge._apply_sessions({"a": _live_state("a", path)})
+            channel = bridge.CHANNELS["a"]
+            untailed = channel.tail is None
+            client = self._client(follow=False)
+            bridge._subscribe(client, channel)
+            caught_up = await self._settle(lambda: len(channel.buffer) == 1)
+            bridge._unsubscribe(client)
+            await asyncio.sleep(0.02)
+            return channel, untailed, caught_up
+
+        channel, untailed, caught_up = asyncio.run(_go())
+        assert untailed and caught_up  # the first subscriber reads the file from the top
+        assert channel.tail is None and len(channel.buffer) == 0 and not channel.tool_inputs
+
+    def test_session_end_drains_then_notifies_subscribers(self, tmp_path):
+        path = tmp_path / "a.tmp"
+        path.write_text("")
+
+        async def _go():
+            client = self._client()
+            await bridge._apply_sessions({"a": _live_state("a", path)})
+            await asyncio.sleep(0.05)
+            path.write_text(_reasoning_line("last words"))  # no trailing newline
+            await bridge._apply_sessions({})
+            return client
+
+        client = asyncio.run(_go())
+        types = [m["ui_type"] for m in self._received(client)]
+        assert types.index("session_start") < types.index("reasoning") < types.index("session_idle")
+        assert bridge.CHANNELS == {} and bridge.SESSION_STATE == {"state": "idle"}
+
+    def test_watcher_reports_every_live_session(self, tmp_path, monkeypatch):
+        import oncall.watcher as watcher
+
+        state_file = tmp_path / "dashboard_state.json"
+        monkeypatch.setattr(watcher, "DASHBOARD_STATE_FILE", state_file)
+        monkeypatch.setattr(watcher, "DASHBOARD_SOCKET", tmp_path / "absent.sock")
+        monkeypatch.setattr(watcher, "_dashboard_sessions", {})
+        watcher._write_dashboard_state(_live_state("a", "/a"))
+        watcher._write_dashboard_state(_live_state("b", "/b"))
+        assert [s["session_name"] for s in json.loads(state_file.read_text())["sessions"]] == ["a", "b"]
+        watcher._write_dashboard_state({"state": "idle", "session_name": "a"})
+        message = json.loads(state_file.read_text())
+        assert bridge._live_sessions(message) == {"b": _live_state("b", "/b")}
+
+
+# ---------------------------------------------------------------------------
+# Session history — archived session list and per-client replay
+# ---------------------------------------------------------------------------
+
+def _archived_session(tmp_path, name="oncall-a", tools=4, duration_s=None):
+    """Write and archive a stream with reasoning and `tools` complete tool calls (small frames)."""
+    from core import session_archive
+
+    lines = []
+    for i in range(tools):
+        lines.append(_reasoning_line(f"step {i} " * 20))
+        lines.append(_stream_event({"type": "content_block_start", "index": 1, "content_block": {
+            "type": "tool_use", "id": f"tu_{i}", "name": "mcp__mcp_automation__get_ospf"}}))
+        lines.append(_stream_event({"type": "content_block_delta", "index": 1, "delta": {
+            "type": "input_json_delta", "partial_json": json.dumps({"device": f"R{i}"})}}))
+        lines.append(_stream_event({"type": "content_block_stop", "index": 1}))
+        lines.append(_stream_event({"type": "content_block_start", "index": 0, "content_block": {
+            "type": "tool_result", "tool_use_id": f"tu_{i}", "content": f"result {i}"}}))
+    lines.append(json.dumps({"type": "result", "total_cost_usd": 0.25}))
+    src = tmp_path / f".session-{name}.tmp"
+    src.write_text("\n".join(lines) + "\n")
+    session_archive.archive_session(src, {"session_name": name, "device_name": "C1C", "duration_s": duration_s})
+    return lines
+
+
+def _flatten(messages):
+    """Unpack batch frames (client-queue merges) into the individual messages sent."""
+    out = []
+    for msg in messages:
+        if msg.get("ui_type") == "batch":
+            out.extend(_flatten(msg["events"]))
+        else:
+            out.append(msg)
+    return out
+
+
+class TestArchiveReplay:
+    @pytest.fixture(autouse=True)
+    def _archive(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("SESSION_ARCHIVE_DIR", str(tmp_path / "sessions"))
+        monkeypatch.setenv("SESSION_ARCHIVE_FRAME_KB", "1")
+        monkeypatch.setattr(bridge, "SESSION_STATE", {"state": "idle"})
+        monkeypatch.setattr(bridge, "CHANNELS", {})
+        monkeypatch.setattr(bridge, "CLIENTS", {})
+        bridge._pending.clear()
+        _reset_tool_inputs()
+
+    def _run(self, requests, until="replay_end", timeout=5):
+        """Connect a fake client, send the replay requests and collect what it receives."""
+        ws = _FakeWebSocket()
+
+        async def _go():
+            client = bridge._Client(ws)
+            client.resync = False
+            bridge.CLIENTS[ws] = client
+            sender = asyncio.create_task(bridge._client_sender(client))
+            for request in requests:
+                bridge._start_replay(client, request)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while loop.time() < deadline and not any(m["ui_type"] == until for m in _flatten(ws.sent)):
+                await asyncio.sleep(0.01)
+            elapsed = timeout - (deadline - loop.time())
+            if client.replay is not None:
+                client.replay.cancel()
+            sender.cancel()
+            return client, elapsed
+
+        client, elapsed = asyncio.run(_go())
+        return client, _flatten(ws.sent), elapsed
+
+    def test_sessions_endpoint(self, tmp_path):
+        _archived_session(tmp_path)
+        response = bridge._http_handler(None, SimpleNamespace(path="/sessions", headers={}))
+        sessions = json.loads(response.body)
+        assert response.status_code == 200
+        assert sessions[0]["session_name"] == "oncall-a"
+        assert sessions[0]["device_name"] == "C1C"
+        assert [c["name"] for c in sessions[0]["tool_calls"]] == ["get_ospf"] * 4
+        assert "frames" not in sessions[0]
+
+    def test_full_replay_matches_live_parsing(self, tmp_path):
+        lines = _archived_session(tmp_path)
+        tool_inputs = {}
+        expected = [ev for line in lines for ev in bridge.parse_ndjson_line(line, tool_inputs)]
+        bridge._tool_inputs[7] = {"json_buf": "live", "id": "x", "name": "y"}
+
+        client, sent, _ = self._run([{"action": "replay", "session": "oncall-a", "speed": 0}])
+
+        assert sent[0]["ui_type"] == "replay_start" and sent[0]["meta"]["device_name"] == "C1C"
+        assert sent[-1] == {"ui_type": "replay_end", "session": "oncall-a", "line": len(lines)}
+        events = [ev for m in sent if m["ui_type"] == "replay_batch" for ev in m["events"]]
+        assert [e for e in events if e["ui_type"] != "reasoning"] == [
+            e for e in expected if e["ui_type"] != "reasoning"]
+        assert "".join(e["text"] for e in events if e["ui_type"] == "reasoning") == "".join(
+            e["text"] for e in expected if e["ui_type"] == "reasoning")
+        assert bridge._tool_inputs == {7: {"json_buf": "live", "id": "x", "name": "y"}}  # live parse state untouched
+
+    def test_seek_to_tool_call_reads_from_its_frame(self, tmp_path, monkeypatch):
+        from core import session_archive
+
+        _archived_session(tmp_path, tools=12)
+        index = session_archive.load_index("oncall-a")
+        call = index["tool_calls"][9]
+        read = []
+        real_read_frame = session_archive.read_frame
+        monkeypatch.setattr(session_archive, "read_frame",
+                            lambda name, n, idx=None: read.append(n) or real_read_frame(name, n, idx))
+
+        _, sent, _ = self._run([{"action": "replay", "session": "oncall-a", "tool_index": 9, "speed": 0}])
+
+        events = [ev for m in sent if m["ui_type"] == "replay_batch" for ev in m["events"]]
+        assert sent[0]["line"] == call["line"]
+        assert events[0] == {"ui_type": "tool_start", "tool": "get_ospf", "id": "tu_9", "is_mcp": True}
+        assert events[1]["input"] == {"device": "R9"}
+        assert min(read) == call["frame"] > 0
+
+    def test_paced_by_recorded_duration_and_speed(self, tmp_path):
+        _archived_session(tmp_path, tools=2, duration_s=0.6)
+        _, _, elapsed = self._run([{"action": "replay", "session": "oncall-a", "speed": 2}])
+        assert 0.2 <= elapsed < 2
+
+    def test_live_frames_withheld_during_replay(self, tmp_path):
+        _archived_session(tmp_path, duration_s=60)
+
+        async def _go():
+            client = bridge._Client(_FakeWebSocket())
+            client.resync = False
+            bridge.CLIENTS[client.ws] = client
+            bridge._start_replay(client, {"session": "oncall-a", "speed": 1})
+            await asyncio.sleep(0.01)
+            queued = len(client.queue)
+            bridge._pending.append({"ui_type": "reasoning", "text": "live"})
+            bridge._flush_frames()
+            withheld = len(client.queue) == queued
+            bridge._stop_replay(client)
+            return client, withheld
+
+        client, withheld = asyncio.run(_go())
+        assert withheld
+        assert client.replay is None and client.resync  # back to live via a fresh init snapshot
+
+    @pytest.mark.parametrize("request_", [
+        {"session": "oncall-missing"},
+        {"session": "../sessions/oncall-a"},
+        {"session": "oncall-a", "tool_index": 99},
+        {"session": "oncall-a", "line": -1},
+        {"session": "oncall-a", "speed": "fast"},
+    ])
+    def test_invalid_requests_answered_with_error(self, tmp_path, request_):
+        _archived_session(tmp_path)
+        client, sent, _ = self._run([request_], until="replay_error", timeout=1)
+        assert sent == [{"ui_type": "replay_error", "session": request_["session"], "error": sent[0]["error"]}]
+        assert client.replay is None
+
+
+# ---------------------------------------------------------------------------
+# Static assets — in-memory, pre-compressed, ETag / Last-Modified revalidation
+# ---------------------------------------------------------------------------
+
+class TestStaticAssets:
+    @pytest.fixture(autouse=True)
+    def _asset(self, tmp_path, monkeypatch):
+        self.path = tmp_path / "index.html"
+        self.path.write_text("<html>" + "dashboard " * 500 + "</html>")
+        self.asset = bridge._StaticAsset(self.path, "text/html; charset=utf-8")
+        monkeypatch.setattr(bridge, "STATIC_ASSETS", {"/": self.asset})
+
+    def _get(self, **headers):
+        return bridge._http_handler(None, SimpleNamespace(path="/", headers=headers))
+
+    def test_gzip_negotiated(self):
+        import gzip
+
+        response = self._get(**{"Accept-Encoding": "gzip, deflate"})
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert gzip.decompress(response.body) == self.path.read_bytes()
+        assert int(response.headers["Content-Length"]) == len(response.body) < self.path.stat().st_size
+
+    def test_identity_without_or_refused_encoding(self):
+        for headers in ({}, {"Accept-Encoding": "gzip;q=0, identity"}):
+            response = self._get(**headers)
+            assert "Content-Encoding" not in response.headers
+            assert response.body == self.path.read_bytes()
+
+    def test_brotli_preferred_when_installed(self):
+        brotli = pytest.importorskip("brotli")
+        response = self._get(**{"Accept-Encoding": "gzip, br"})
+        assert response.headers["Content-Encoding"] == "br"
+        assert brotli.decompress(response.body) == self.path.read_bytes()
+
+    def test_etag_revalidation(self):
+        etag = self._get(**{"Accept-Encoding": "gzip"}).headers["ETag"]
+        response = self._get(**{"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert response.status_code == 304 and response.body == b""
+        assert response.headers["ETag"] == etag
+        assert self._get(**{"If-None-Match": '"stale"'}).status_code == 200
+
+    def test_last_modified_revalidation(self):
+        last_modified = self._get().headers["Last-Modified"]
+        assert self._get(**{"If-Modified-Since": last_modified}).status_code == 304
+        assert self._get(**{"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"}).status_code == 200
+
+    def test_read_once_and_reloaded_on_change(self, monkeypatch):
+        first = self._get()
+        reads = []
+        real_read = Path.read_bytes
+        monkeypatch.setattr(Path, "read_bytes", lambda p: reads.append(p) or real_read(p))
+        assert self._get().body == first.body
+        assert reads == []
+
+        self.path.write_text("<html>changed</html>")
+        mtime = self.path.stat().st_mtime + 5
+        os.utime(self.path, (mtime, mtime))
+        response = self._get(**{"If-None-Match": first.headers["ETag"]})
+        assert response.status_code == 200 and response.body == b"<html>changed</html>"
+        assert response.headers["ETag"] != first.headers["ETag"]
+        assert len(reads) == 1
+
+    def test_missing_file(self):
+        self.path.unlink()
+        assert self._get().status_code == 404
@@ -5,6 +5,7 @@ import logging
 import time
 from pathlib import Path
 
+from core import state_cache
 from core.inventory import devices
 
 log = logging.getLogger("ainoc.tools.config")
@@ -170,6 +171,9 @@ async def push_config(params: ConfigCommand) -> dict:
 
     end = time.perf_counter()
     _mark_approval_executed()
+    # Pre-change state prefetched by the watcher must not answer post-change verification
+    for dev_name in params.devices:
+        state_cache.invalidate(dev_name)
     log.info("push_config RESULT: %s", json.dumps({k: v for k, v in results.items()}, default=str))
     results["execution_time_seconds"] = round(end - start, 2)
     results["risk_assessment"]        = risk
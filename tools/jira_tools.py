@@ -1,4 +1,5 @@
 """Jira case management tool handlers — thin wrappers around jira_client functions."""
+from core.delivery import DeliveryUncertain
 from core.jira_client import add_comment as _add_comment
 from core.jira_client import resolve_issue as _resolve_issue
 from input_models.models import JiraCommentInput, JiraResolveInput
@@ -9,6 +10,8 @@ async def jira_add_comment(params: JiraCommentInput) -> str:
     try:
         await _add_comment(params.issue_key, params.comment)
         return f"Comment added to {params.issue_key}"
+    except DeliveryUncertain as e:
+        return f"Jira comment on {params.issue_key} may or may not have been added — check before retrying: {e}"
     except Exception as e:
         return f"Jira comment failed for {params.issue_key}: {e}"
 
@@ -1,5 +1,8 @@
 """Operational tools: get_interfaces, ping, traceroute, run_show."""
 import json
+import logging
+
+from core import ip_index
 from core.inventory import devices
 from core.settings import SSH_TIMEOUT_OPS_LONG
 from platforms.platform_map import get_action
@@ -7,6 +10,8 @@ from transport import execute_command
 from input_models.models import InterfacesQuery, PingInput, TracerouteInput, ShowCommand
 from tools import _error_response
 
+log = logging.getLogger("ainoc.tools.operational")
+
 
 async def get_interfaces(params: InterfacesQuery) -> dict:
     """
@@ -77,6 +82,8 @@ async def traceroute(params: TracerouteInput) -> dict:
 
     Notes:
     - All devices use SSH CLI for traceroute (resolved via PLATFORM_MAP tools.traceroute).
+    - hop_devices maps each hop address to its device and interface (e.g.
+      "10.0.0.26": "E1C GigabitEthernet2") — use it to check hops against scope_devices.
 
     Recommended usage:
     - Use when ping succeeds but path is unexpected.
@@ -99,7 +106,17 @@ async def traceroute(params: TracerouteInput) -> dict:
     if params.source and cli_style == "ios":
         action += f" source {params.source}"
 
-    return await execute_command(params.device, action, timeout_ops=SSH_TIMEOUT_OPS_LONG)
+    result = await execute_command(params.device, action, timeout_ops=SSH_TIMEOUT_OPS_LONG)
+
+    # Annotate hop addresses with device + interface (management, interface or link subnet)
+    try:
+        hop_devices = ip_index.get_index().annotate(result.get("raw"))
+    except Exception as e:
+        log.debug("traceroute hop annotation failed: %s", e)
+        hop_devices = {}
+    if hop_devices:
+        result["hop_devices"] = hop_devices
+    return result
 
 
 async def run_show(params: ShowCommand) -> dict:
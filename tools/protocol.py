@@ -1,6 +1,7 @@
 """Protocol diagnostic tools: get_ospf, get_bgp."""
 import ipaddress
 
+from core import tracing
 from core.inventory import devices
 from platforms.platform_map import get_action
 from transport import execute_command
@@ -68,6 +69,7 @@ def _recursive_strip(data, keys_to_remove: frozenset):
     return data
 
 
+@tracing.traced
 def _trim_ospf(result: dict, query: str) -> dict:
     """Post-process OSPF results for the RESTCONF transport tier.
 
@@ -126,6 +128,7 @@ def _filter_bgp_ipv4_unicast(data):
     return data
 
 
+@tracing.traced
 def _trim_bgp(result: dict, query: str) -> dict:
     """Post-process BGP results for the RESTCONF transport tier.
 
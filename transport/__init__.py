@@ -8,6 +8,7 @@ Two branches (Cisco-only 2-tier stack):
 """
 import logging
 
+from core import state_cache, tracing
 from core.inventory import devices
 from platforms.platform_map import ActionChain
 from transport.ssh     import execute_ssh
@@ -16,11 +17,15 @@ from transport.restconf import execute_restconf
 log = logging.getLogger("ainoc.transport")
 
 
+@tracing.traced
 async def _execute_single(device: dict, transport_type: str, sub_action,
                           timeout_ops: int | None = None) -> tuple:
     """Execute one tier of an ActionChain. Returns (raw_output, parsed_output)."""
+    tracing.annotate(tier=transport_type)
     if transport_type == "restconf":
         raw = await execute_restconf(device, sub_action)
+        if isinstance(raw, dict) and "error" in raw:
+            tracing.set_error(raw["error"])
         return raw, None
     elif transport_type == "ssh":
         return await execute_ssh(device, sub_action, timeout_ops=timeout_ops)
@@ -29,6 +34,7 @@ async def _execute_single(device: dict, transport_type: str, sub_action,
         return err, err
 
 
+@tracing.traced
 async def execute_command(device_name: str, cmd_or_action,
                           timeout_ops: int | None = None,
                           transport: str | None = None) -> dict:
@@ -37,10 +43,21 @@ async def execute_command(device_name: str, cmd_or_action,
     if not device:
         return {"error": "Unknown device"}
 
+    # State pre-warmed by the On-Call watcher (core/state_cache.py) — served once
+    recording = state_cache.is_recording()
+    cache_key = (device_name, cmd_or_action, transport)
+    if not recording:
+        cached = state_cache.take(*cache_key)
+        if cached is not None:
+            log.info("cache hit: %s (age %.1fs)", device_name, cached["_cache_age_s"])
+            tracing.annotate(device=device_name, cache_hit=True)
+            return cached
+
     cli_style     = device["cli_style"]
     dev_transport = device["transport"]
 
     log.info("dispatch: %s via %s", device_name, dev_transport)
+    tracing.annotate(device=device_name, transport=dev_transport)
 
     # Filter ActionChain to a single tier if transport override is requested
     if isinstance(cmd_or_action, ActionChain) and transport:
@@ -122,4 +139,7 @@ async def execute_command(device_name: str, cmd_or_action,
     if parsed_output is not None:
         result["parsed"] = parsed_output
 
+    if recording:
+        state_cache.store(*cache_key, result)
+
     return result
@@ -14,6 +14,7 @@ try:
 except ImportError:
     _HTTPX_AVAILABLE = False
 
+from core import tracing
 from core.settings import USERNAME, PASSWORD, RESTCONF_PORT, RESTCONF_VERIFY_TLS
 
 log = logging.getLogger("ainoc.transport.restconf")
@@ -25,6 +26,7 @@ _HEADERS = {
 }
 
 
+@tracing.traced
 async def execute_restconf(device: dict, action: dict) -> dict:
     """Execute a RESTCONF read operation.
 
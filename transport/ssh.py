@@ -3,6 +3,7 @@ import asyncio
 import logging
 
 from scrapli import AsyncScrapli
+from core import tracing
 from core.settings import (
     USERNAME, PASSWORD, SSH_STRICT_KEY,
     SSH_TIMEOUT_TRANSPORT, SSH_TIMEOUT_OPS,
@@ -25,6 +26,7 @@ def _connection_params(device: dict) -> dict:
     }
 
 
+@tracing.traced
 async def execute_ssh(device: dict, command: str, timeout_ops: int | None = None) -> tuple[str, object]:
     """Execute a show command via Scrapli SSH.
 
@@ -43,7 +45,8 @@ async def execute_ssh(device: dict, command: str, timeout_ops: int | None = None
                 parsed_output = None
                 if device.get("cli_style") == "ios":
                     try:
-                        parsed_output = response.genie_parse_output()
+                        with tracing.span("genie_parse"):
+                            parsed_output = response.genie_parse_output()
                     except Exception:
                         # Genie lacks a parser for this command or the output format is unexpected.
                         # Fall back to raw text — the caller handles None parsed_output gracefully.